@@ -0,0 +1,108 @@
+"""KnightBot audio output stage, shared by the Pipecat pipeline and the TTS server.
+
+Synthesized speech is resampled exactly once, with a polyphase filter, into the
+LiveKit output rate and pre-sliced into transport-sized frames. Playback then only
+iterates over ready-made frames instead of resampling inside the realtime loop.
+
+Usage:
+    from audio_output import prepare_output
+
+    frames = prepare_output(pcm_bytes, src_rate=24000, dst_rate=48000, frame_ms=20)
+    for chunk in frames:
+        ...
+"""
+
+from fractions import Fraction
+from typing import Iterator, List
+
+import numpy as np
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:  # pragma: no cover - scipy ships with the main requirements
+    resample_poly = None
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    clipped = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+    return (clipped * 32767.0).astype("<i2").tobytes()
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample mono float samples with a Kaiser-windowed polyphase filter."""
+    samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+    if src_rate == dst_rate or samples.size == 0:
+        return samples
+
+    ratio = Fraction(int(dst_rate), int(src_rate)).limit_denominator(1000)
+    if resample_poly is not None:
+        out = resample_poly(samples, ratio.numerator, ratio.denominator, window=("kaiser", 5.0))
+        return out.astype(np.float32, copy=False)
+
+    # Linear interpolation is a last resort; it aliases but keeps audio flowing.
+    n_out = int(round(samples.size * dst_rate / float(src_rate)))
+    x_old = np.arange(samples.size, dtype=np.float64) / src_rate
+    x_new = np.arange(n_out, dtype=np.float64) / dst_rate
+    return np.interp(x_new, x_old, samples).astype(np.float32)
+
+
+class OutputFrames:
+    """Pre-sliced s16le mono frames at the transport rate.
+
+    Every frame except possibly the last has exactly `frame_bytes` bytes; the last is
+    zero-padded so the transport always receives whole frames.
+    """
+
+    def __init__(self, frames: List[bytes], sample_rate: int, frame_ms: int, num_channels: int = 1):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.num_channels = num_channels
+
+    @property
+    def frame_duration_s(self) -> float:
+        return self.frame_ms / 1000.0
+
+    @property
+    def duration_s(self) -> float:
+        return len(self.frames) * self.frame_duration_s
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.frames)
+
+
+def slice_frames(pcm: bytes, sample_rate: int, frame_ms: int, num_channels: int = 1) -> OutputFrames:
+    frame_bytes = int(sample_rate * frame_ms / 1000) * 2 * num_channels
+    if frame_bytes <= 0:
+        raise ValueError(f"Invalid frame size for {sample_rate}Hz/{frame_ms}ms")
+
+    remainder = len(pcm) % frame_bytes
+    if remainder:
+        pcm = pcm + b"\x00" * (frame_bytes - remainder)
+    view = memoryview(pcm)
+    frames = [bytes(view[i : i + frame_bytes]) for i in range(0, len(pcm), frame_bytes)]
+    return OutputFrames(frames, sample_rate, frame_ms, num_channels)
+
+
+def prepare_output(
+    pcm: bytes,
+    src_rate: int,
+    dst_rate: int,
+    frame_ms: int,
+    num_channels: int = 1,
+) -> OutputFrames:
+    """Convert s16le PCM into transport-ready frames at `dst_rate`."""
+    if num_channels != 1:
+        # Chatterbox is mono; downmix anything else before resampling.
+        interleaved = pcm16_to_float(pcm).reshape(-1, num_channels)
+        pcm = float_to_pcm16(interleaved.mean(axis=1))
+    if src_rate != dst_rate:
+        pcm = float_to_pcm16(resample(pcm16_to_float(pcm), src_rate, dst_rate))
+    return slice_frames(pcm, dst_rate, frame_ms)
@@ -9,12 +9,13 @@ import types
 import asyncio
 from contextlib import asynccontextmanager, nullcontext
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi.concurrency import run_in_threadpool
 import torchaudio
+import numpy as np
 import soundfile as sf
 import uvicorn
 import traceback
@@ -67,6 +68,11 @@ ChatterboxTTS = _import_chatterbox_tts()
 from PIL import Image
 import shutil
 
+# Shared output stage (polyphase resampling) lives in the top-level audio/ folder,
+# which holds nothing that can shadow the pipecat or chatterbox packages.
+sys.path.append(str(Path(__file__).resolve().parents[1] / "audio"))
+from audio_output import resample as resample_audio  # noqa: E402
+
 
 def _ensure_perth_watermarker():
     """Ensure `perth.PerthImplicitWatermarker` is callable.
@@ -161,6 +167,21 @@ TTS_MAX_NEW_TOKENS = int(os.getenv("KB_TTS_MAX_NEW_TOKENS", "160"))
 TTS_MIN_NEW_TOKENS = int(os.getenv("KB_TTS_MIN_NEW_TOKENS", "160"))
 TTS_BASE_NEW_TOKENS = int(os.getenv("KB_TTS_BASE_NEW_TOKENS", "120"))
 TTS_TOKENS_PER_CHAR = float(os.getenv("KB_TTS_TOKENS_PER_CHAR", "0.45"))
+TTS_DEFAULT_FORMAT = os.getenv("KB_TTS_DEFAULT_FORMAT", "wav").strip().lower()
+# 0 keeps the model's native rate unless a request asks for a specific one.
+TTS_OUTPUT_RATE = int(os.getenv("KB_TTS_OUTPUT_RATE", "0"))
+
+# Output formats /synthesize can negotiate. Keys are the canonical names accepted in the
+# request body `format` field; values map Accept header media types onto them.
+AUDIO_FORMAT_MEDIA_TYPES = {
+    "wav": ("audio/wav", "audio/x-wav", "audio/wave"),
+    "pcm": ("audio/l16", "audio/pcm", "audio/x-raw", "application/octet-stream"),
+    "ogg": ("audio/ogg", "audio/opus"),
+    "flac": ("audio/flac", "audio/x-flac"),
+}
+AUDIO_FORMAT_ALIASES = {"s16le": "pcm", "raw": "pcm", "l16": "pcm", "opus": "ogg", "wave": "wav"}
+# libsndfile's Opus encoder only accepts these input rates.
+OPUS_SAMPLE_RATES = (48000, 24000, 16000, 12000, 8000)
 
 
 def clip_tts_text(text: str) -> str:
@@ -197,6 +218,71 @@ def choose_tts_max_new_tokens(text: str) -> int:
     estimated = max(TTS_MIN_NEW_TOKENS, estimated)
     return min(estimated, TTS_MAX_NEW_TOKENS)
 
+def normalize_audio_format(value: str | None) -> str | None:
+    if not value:
+        return None
+    key = value.strip().lower()
+    key = AUDIO_FORMAT_ALIASES.get(key, key)
+    return key if key in AUDIO_FORMAT_MEDIA_TYPES else None
+
+
+def negotiate_audio_format(requested: str | None, accept: str | None) -> str:
+    """Pick the output format: explicit request field first, then the Accept header."""
+    explicit = normalize_audio_format(requested)
+    if explicit:
+        return explicit
+
+    candidates = []
+    for idx, part in enumerate((accept or "").split(",")):
+        media, _, params = part.strip().lower().partition(";")
+        if not media:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, val = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        candidates.append((-q, idx, media.strip()))
+
+    for neg_q, _, media in sorted(candidates):
+        if neg_q >= 0:
+            continue
+        for fmt, media_types in AUDIO_FORMAT_MEDIA_TYPES.items():
+            if media in media_types:
+                return fmt
+
+    return normalize_audio_format(TTS_DEFAULT_FORMAT) or "wav"
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int, fmt: str) -> tuple[bytes, str, int]:
+    """Encode mono float samples. Returns (payload, media_type, sample_rate).
+
+    Runs on a worker thread; Opus/FLAC encoding is CPU work we keep off the event loop.
+    """
+    samples = np.clip(np.asarray(samples, dtype=np.float32).reshape(-1), -1.0, 1.0)
+
+    if fmt == "pcm":
+        pcm = (samples * 32767.0).astype("<i2").tobytes()
+        return pcm, f"audio/L16;rate={sample_rate};channels=1", sample_rate
+
+    buf = io.BytesIO()
+    if fmt == "ogg":
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            target = min((r for r in OPUS_SAMPLE_RATES if r >= sample_rate), default=48000)
+            samples, sample_rate = resample_audio(samples, sample_rate, target), target
+        sf.write(buf, samples, sample_rate, format="OGG", subtype="OPUS")
+        return buf.getvalue(), "audio/ogg; codecs=opus", sample_rate
+    if fmt == "flac":
+        sf.write(buf, samples, sample_rate, format="FLAC", subtype="PCM_16")
+        return buf.getvalue(), "audio/flac", sample_rate
+
+    sf.write(buf, samples, sample_rate, format="WAV", subtype="PCM_16")
+    return buf.getvalue(), "audio/wav", sample_rate
+
+
 def load_config():
     global CURRENT_VOICE_ID
     try:
@@ -261,7 +347,9 @@ async def lifespan(app: FastAPI):
         LlamaConfig.__init__ = patched_init
 
         model = ChatterboxTTS.from_pretrained(device=device)
-        print("✓ Chatterbox ready!")
+        print(f"✓ Chatterbox ready! native sample rate={model.sr}Hz")
+        if TTS_OUTPUT_RATE and TTS_OUTPUT_RATE != int(model.sr):
+            print(f"⚡ TTS output resampled {model.sr}Hz -> {TTS_OUTPUT_RATE}Hz (polyphase)")
         CURRENT_CONDITIONED_VOICE_PATH = None
 
         # Perth watermarking can return None in some Windows/CUDA stacks.
@@ -335,10 +423,14 @@ class TTSRequest(BaseModel):
     text: str
     exaggeration: float = 0.5
     voice_id: str | None = None
+    # wav | pcm (raw s16le) | ogg (Opus) | flac. Falls back to the Accept header when unset.
+    format: str | None = None
+    # Output rate (e.g. the LiveKit room rate). Resampled once here, not per frame downstream.
+    sample_rate: int | None = Field(default=None, ge=8000, le=96000)
 
 
 @app.post("/synthesize")
-async def synthesize(req: TTSRequest):
+async def synthesize(req: TTSRequest, accept: str | None = Header(default=None)):
     global CURRENT_CONDITIONED_VOICE_PATH, REQUEST_TTS_MAX_NEW_TOKENS
 
     if not model:
@@ -348,6 +440,7 @@ async def synthesize(req: TTSRequest):
         if not text:
             raise HTTPException(400, "Text is empty")
 
+        output_format = negotiate_audio_format(req.format, accept)
         voice_path = None
         
         # Priority 1: Request specific voice
@@ -397,10 +490,25 @@ async def synthesize(req: TTSRequest):
                     raise RuntimeError("Chatterbox returned empty audio buffer")
             finally:
                 REQUEST_TTS_MAX_NEW_TOKENS = None
-        buf = io.BytesIO()
-        sf.write(buf, audio.squeeze().cpu().numpy(), model.sr, format="WAV")
-        buf.seek(0)
-        return StreamingResponse(buf, media_type="audio/wav")
+        samples = audio.squeeze().cpu().numpy()
+        native_rate = int(model.sr)
+        duration_s = len(samples) / float(native_rate)
+        target_rate = int(req.sample_rate or TTS_OUTPUT_RATE or native_rate)
+        if target_rate != native_rate:
+            samples = await run_in_threadpool(resample_audio, samples, native_rate, target_rate)
+        payload, media_type, out_rate = await run_in_threadpool(
+            encode_audio, samples, target_rate, output_format
+        )
+        headers = {
+            "X-Audio-Format": output_format,
+            "X-Sample-Rate": str(out_rate),
+            "X-Channels": "1",
+            "X-Audio-Duration-S": f"{duration_s:.3f}",
+            "X-Native-Sample-Rate": str(native_rate),
+        }
+        if output_format == "pcm":
+            headers["X-Sample-Format"] = "s16le"
+        return Response(content=payload, media_type=media_type, headers=headers)
     except Exception as e:
         traceback.print_exc()
         print(f"❌ TTS Error: {e}")
@@ -582,6 +690,8 @@ async def health():
         "model": "chatterbox-turbo",
         "device": device,
         "loaded": model is not None,
+        "sample_rate": int(model.sr) if model is not None else None,
+        "output_sample_rate": TTS_OUTPUT_RATE or None,
         "active_voice": CURRENT_VOICE_ID
     }
 
@@ -1,12 +1,19 @@
 import { NextRequest, NextResponse } from 'next/server';
 
+// Headers from chatterbox that describe the negotiated audio payload.
+const PASSTHROUGH_HEADERS = ['x-audio-format', 'x-sample-rate', 'x-channels', 'x-sample-format', 'x-audio-duration-s'];
+
 export async function POST(req: NextRequest) {
   try {
     const body = await req.json();
+    const accept = req.headers.get('accept');
     
     const response = await fetch('http://localhost:8060/synthesize', {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: {
+        'Content-Type': 'application/json',
+        ...(accept ? { Accept: accept } : {}),
+      },
       body: JSON.stringify(body),
     });
     
@@ -15,10 +22,16 @@ export async function POST(req: NextRequest) {
       return NextResponse.json({ error }, { status: response.status });
     }
     
+    const headers: Record<string, string> = {
+      'Content-Type': response.headers.get('content-type') || 'audio/wav',
+    };
+    for (const name of PASSTHROUGH_HEADERS) {
+      const value = response.headers.get(name);
+      if (value) headers[name] = value;
+    }
+
     const data = await response.blob();
-    return new NextResponse(data, {
-      headers: { 'Content-Type': 'audio/wav' },
-    });
+    return new NextResponse(data, { headers });
   } catch (error) {
     return NextResponse.json({ error: 'TTS service unavailable' }, { status: 503 });
   }
@@ -42,11 +42,18 @@ export async function sendMessage(
   }
 }
 
-export async function synthesizeSpeech(text: string, exaggeration = 0.5, voiceId?: string): Promise<Blob> {
+export type TtsAudioFormat = 'wav' | 'ogg' | 'flac' | 'pcm';
+
+export async function synthesizeSpeech(
+  text: string,
+  exaggeration = 0.5,
+  voiceId?: string,
+  format?: TtsAudioFormat
+): Promise<Blob> {
   const r = await fetch(`${TTS_API}/synthesize`, { 
     method: 'POST',
     headers: { 'Content-Type': 'application/json' }, 
-    body: JSON.stringify({ text, exaggeration, voice_id: voiceId }) 
+    body: JSON.stringify({ text, exaggeration, voice_id: voiceId, format }) 
   });
   if (!r.ok) throw new Error('TTS failed');
   return r.blob();
@@ -0,0 +1,97 @@
+"""KnightBot acknowledgement clips that mask LLM latency.
+
+A handful of short phrases ("Mm-hmm.", "Let me think.") are rendered once per voice
+by chatterbox and kept in memory as transport-ready frames, together with a
+mic-rate copy the echo canceller uses as its reference. When a turn is predicted to
+be slow, the pipeline plays one of them right after the user stops speaking, then
+crossfades from the clip's unplayed tail into the real reply.
+
+Usage:
+    bank = AckClipBank(["Mm-hmm.", "Let me think."])
+    bank.warm("Knight", render)  # render(text) -> (OutputFrames, sample_rate)
+    clip = bank.pick("Knight")
+"""
+
+import asyncio
+import random
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from audio_output import OutputFrames, float_to_pcm16, pcm16_to_float, resample, slice_frames
+
+DEFAULT_PHRASES = ("Mm-hmm.", "Okay.", "Let me think.", "Right, one moment.", "Hmm.")
+
+
+class AckClip:
+    def __init__(self, phrase: str, frames: OutputFrames, reference_rate: int):
+        self.phrase = phrase
+        self.frames = frames
+        self.samples = pcm16_to_float(b"".join(frames.frames))
+        self.reference = resample(self.samples, frames.sample_rate, reference_rate)
+
+    @property
+    def frame_samples(self) -> int:
+        return int(self.frames.sample_rate * self.frames.frame_ms / 1000)
+
+    def tail(self, from_frame: int, max_samples: int) -> np.ndarray:
+        """Unplayed audio starting at frame `from_frame`, at most `max_samples` long."""
+        start = from_frame * self.frame_samples
+        return self.samples[start : start + max_samples]
+
+
+def crossfade_into(tail: np.ndarray, frames: OutputFrames) -> OutputFrames:
+    """Linear crossfade from `tail` into the start of `frames`."""
+    head = pcm16_to_float(b"".join(frames.frames))
+    n = min(tail.size, head.size)
+    if n == 0:
+        return frames
+    fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    head[:n] = head[:n] * fade_in + tail[:n] * (1.0 - fade_in)
+    return slice_frames(float_to_pcm16(head), frames.sample_rate, frames.frame_ms, frames.num_channels)
+
+
+class AckClipBank:
+    """Per-voice clip sets, rendered once per process and shared by every room."""
+
+    def __init__(self, phrases: list[str] | tuple[str, ...] = DEFAULT_PHRASES, reference_rate: int = 16000):
+        self.phrases = [p for p in phrases if p.strip()]
+        self.reference_rate = reference_rate
+        self._clips: dict[str, list[AckClip]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._last: dict[str, str] = {}
+
+    def ready(self, voice_id: str) -> bool:
+        return bool(self._clips.get(voice_id))
+
+    def warm(self, voice_id: str, render: Callable[[str], Awaitable[tuple[OutputFrames, int]]]) -> None:
+        """Start rendering `voice_id`'s clips in the background (once)."""
+        if voice_id in self._clips or voice_id in self._tasks:
+            return
+        self._tasks[voice_id] = asyncio.create_task(self._render(voice_id, render))
+
+    async def _render(self, voice_id: str, render) -> None:
+        clips = []
+        for phrase in self.phrases:
+            try:
+                frames, _ = await render(phrase)
+            except Exception as e:
+                print(f"[ack] failed rendering {phrase!r} for voice {voice_id}: {e}")
+                continue
+            clips.append(await asyncio.to_thread(AckClip, phrase, frames, self.reference_rate))
+        if clips:
+            self._clips[voice_id] = clips
+            print(f"✓ Ack clips ready for voice {voice_id} ({len(clips)} phrases)")
+        else:
+            # Let a later room retry.
+            self._tasks.pop(voice_id, None)
+
+    def pick(self, voice_id: str) -> AckClip | None:
+        clips = self._clips.get(voice_id)
+        if not clips:
+            return None
+        # Avoid playing the same phrase twice in a row.
+        choices = [c for c in clips if c.phrase != self._last.get(voice_id)] or clips
+        clip = random.choice(choices)
+        self._last[voice_id] = clip.phrase
+        return clip
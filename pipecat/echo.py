@@ -0,0 +1,197 @@
+"""KnightBot acoustic echo suppression for the bot's own TTS playback.
+
+TTSProcessor hands every chunk it sends to LiveKit to `push_reference()`, resampled
+to the microphone rate and stamped with the time it will start playing. For each
+microphone frame, `process()` returns the residual after removing the echo of that
+reference:
+
+  1. the bulk playback-to-mic delay is estimated by FFT cross-correlation of recent
+     mic audio against the reference, and re-estimated while the bot speaks;
+  2. a block NLMS filter (vectorized updates over 2 ms sub-blocks) models the echo path
+     around that delay;
+  3. adaptation freezes during double-talk (Geigel test), so the user's voice is not
+     learned as echo, and the raw frame is returned if the filter ever makes things
+     worse.
+
+Barge-in features and STT then run on the residual, so the input no longer has to
+be muted or thresholded up while the bot talks.
+
+Usage:
+    from echo import EchoCanceller
+
+    echo = EchoCanceller(sample_rate=16000)
+    echo.push_reference(ref_samples, play_at=time.perf_counter() + 0.08)
+    residual = echo.process(mic_pcm, arrived_at=time.perf_counter())
+"""
+
+import time
+
+import numpy as np
+
+
+class EchoCanceller:
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        taps_ms: float = 32.0,
+        initial_delay_ms: float = 100.0,
+        max_delay_ms: float = 600.0,
+        mu: float = 0.15,
+        block: int = 32,
+        geigel: float = 0.6,
+        history_s: float = 4.0,
+    ):
+        self.sample_rate = sample_rate
+        self.taps = max(16, int(sample_rate * taps_ms / 1000.0))
+        self.max_delay = int(sample_rate * max_delay_ms / 1000.0)
+        self.delay = int(sample_rate * initial_delay_ms / 1000.0)
+        # Start the filter window a little before the bulk delay to absorb timestamp jitter.
+        self.lead = self.taps // 4
+        self.mu = mu
+        self.block = block
+        self.geigel = geigel
+        self.size = int(sample_rate * history_s)
+        self.weights = np.zeros(self.taps, dtype=np.float32)
+        self._ref = np.zeros(self.size, dtype=np.float32)
+        self._mic = np.zeros(self.size, dtype=np.float32)
+        self._ref_until = 0  # absolute sample index just past the newest reference
+        self._mic_until = 0
+        self._next_estimate = 0
+        self._bypass_run = 0
+        self._t0 = time.perf_counter()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._frames = 0
+        self._double_talk = 0
+        self._bypassed = 0
+        self._power_in = 0.0
+        self._power_out = 0.0
+        self._corr_peak: float | None = None
+
+    def _index(self, t: float) -> int:
+        return int(round((t - self._t0) * self.sample_rate))
+
+    @staticmethod
+    def _write(ring: np.ndarray, until: int, start: int, samples: np.ndarray) -> int:
+        size = ring.size
+        if start > until:
+            gap = min(start - until, size)
+            ring[(start - gap + np.arange(gap)) % size] = 0.0
+        ring[(start + np.arange(samples.size)) % size] = samples
+        return max(until, start + samples.size)
+
+    def _read(self, ring: np.ndarray, until: int, start: int, end: int) -> np.ndarray:
+        idx = np.arange(start, end)
+        out = ring[idx % ring.size]
+        # Anything not written yet (or already overwritten) is silence.
+        out[(idx >= until) | (idx < until - ring.size)] = 0.0
+        return out
+
+    def push_reference(self, samples: np.ndarray, play_at: float) -> None:
+        """Float samples at `sample_rate` that start playing at perf_counter time `play_at`."""
+        samples = np.asarray(samples, dtype=np.float32)
+        self._ref_until = self._write(self._ref, self._ref_until, self._index(play_at), samples)
+
+    def drop_reference_after(self, t: float) -> None:
+        """Forget reference audio scheduled after `t` (queued playback was flushed)."""
+        self._ref_until = min(self._ref_until, max(0, self._index(t)))
+
+    def active(self, now: float) -> bool:
+        """True while the mic can still contain echo of the reference."""
+        return self._index(now) < self._ref_until + self.max_delay + self.taps
+
+    def _estimate_delay(self, end: int) -> None:
+        seg = self.sample_rate // 2
+        mic = self._read(self._mic, self._mic_until, end - seg, end)
+        ref = self._read(self._ref, self._ref_until, end - seg - self.max_delay, end)
+        mic_energy = float(np.dot(mic, mic))
+        ref_energy = float(np.dot(ref, ref))
+        if mic_energy < 1e-6 or ref_energy < 1e-6:
+            return
+        # corr[j] = sum_i ref[j + i] * mic[i]; echo lag = max_delay - j.
+        n = 1 << int(np.ceil(np.log2(ref.size + mic.size)))
+        spec = np.fft.rfft(ref, n) * np.conj(np.fft.rfft(mic, n))
+        corr = np.fft.irfft(spec, n)[: self.max_delay + 1]
+        csum = np.concatenate(([0.0], np.cumsum(ref.astype(np.float64) ** 2)))
+        window_energy = csum[seg : seg + self.max_delay + 1] - csum[: self.max_delay + 1]
+        norm = np.abs(corr) / np.sqrt(mic_energy * window_energy + 1e-12)
+        j = int(np.argmax(norm))
+        peak = float(norm[j])
+        self._corr_peak = round(min(1.0, peak), 3)
+        if peak < 0.2:
+            return
+        lag = self.max_delay - j
+        if abs(lag - self.delay) > self.lead:
+            # The echo path moved; the old taps model the wrong alignment.
+            self.weights[:] = 0.0
+        self.delay = lag
+
+    def process(self, pcm: bytes, arrived_at: float) -> bytes:
+        d = np.frombuffer(pcm[: len(pcm) - (len(pcm) % 2)], dtype="<i2").astype(np.float32) / 32768.0
+        n = d.size
+        end = self._index(arrived_at)
+        start = end - n
+        self._mic_until = self._write(self._mic, self._mic_until, start, d)
+        if n == 0 or not self.active(arrived_at):
+            return pcm
+
+        if end >= self._next_estimate:
+            self._estimate_delay(end)
+            self._next_estimate = end + self.sample_rate // 2
+
+        # Row k holds the reference taps for mic sample start + k, newest first.
+        ref_start = start - self.delay + self.lead - self.taps + 1
+        ref = self._read(self._ref, self._ref_until, ref_start, end - self.delay + self.lead)
+        X = np.lib.stride_tricks.sliding_window_view(ref, self.taps)[:, ::-1]
+
+        self._frames += 1
+        ref_peak = float(np.abs(ref).max())
+        if ref_peak < 1e-4:
+            return pcm
+        double_talk = float(np.abs(d).max()) > self.geigel * ref_peak
+        if double_talk:
+            # Near-end speech on top of the echo: keep the filter, don't learn from it.
+            self._double_talk += 1
+            e = d - X @ self.weights
+        else:
+            e = np.empty_like(d)
+            for k in range(0, n, self.block):
+                Xb = X[k : k + self.block]
+                eb = d[k : k + self.block] - Xb @ self.weights
+                e[k : k + self.block] = eb
+                # Mean tap-vector energy: the step matches per-sample NLMS summed over the block.
+                norm = float(np.sum(Xb * Xb)) / Xb.shape[0] + 1e-6
+                self.weights += (self.mu / norm) * (Xb.T @ eb)
+
+        p_in = float(np.dot(d, d))
+        p_out = float(np.dot(e, e))
+        if not np.isfinite(p_out) or p_out > p_in:
+            self._bypassed += 1
+            self._bypass_run += 1
+            if not np.isfinite(p_out) or self._bypass_run >= 25:
+                # Diverged or stuck on a wrong alignment for ~0.5s: start over.
+                self.weights[:] = 0.0
+                self._bypass_run = 0
+            return pcm
+        self._bypass_run = 0
+        if not double_talk:
+            self._power_in += p_in
+            self._power_out += p_out
+        return (np.clip(e, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+    def report(self, reset: bool = True) -> dict:
+        erle = None
+        if self._power_out > 0 and self._power_in > 0:
+            erle = round(float(10.0 * np.log10(self._power_in / self._power_out)), 2)
+        out = {
+            "echo_delay_ms": round(self.delay * 1000.0 / self.sample_rate, 1),
+            "echo_corr_peak": self._corr_peak,
+            "echo_erle_db": erle,
+            "echo_frames": self._frames,
+            "echo_double_talk_frames": self._double_talk,
+            "echo_bypassed_frames": self._bypassed,
+        }
+        if reset:
+            self.reset_stats()
+        return out
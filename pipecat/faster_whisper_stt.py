@@ -13,6 +13,7 @@ Usage:
 """
 
 import os
+import threading
 import torch
 from typing import Optional
 
@@ -27,6 +28,10 @@ except ImportError:
     _FASTER_WHISPER_AVAILABLE = False
     WhisperModel = None
 
+# One model per (name, device, compute type) per process, shared by every room's service.
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
 
 class FasterWhisperSTT(STTService):
     """Faster Whisper STT Service for Pipecat.
@@ -101,7 +106,11 @@ class FasterWhisperSTT(STTService):
         if self._model is None:
             await self._load_model()
         
-        # Transcribe audio
+        # Transcribe off the event loop so other rooms in this process keep running
+        import asyncio
+        return await asyncio.to_thread(self._transcribe_sync, audio)
+    
+    def _transcribe_sync(self, audio: bytes) -> str:
         segments, info = self._model.transcribe(
             audio,
             language=self._language,
@@ -129,17 +138,24 @@ class FasterWhisperSTT(STTService):
         )
     
     def _load_model_sync(self):
-        """Synchronous model loading."""
-        print(f"📦 Loading Faster Whisper: {self._model_name} on {self._device}")
-        if self._device == "cuda" and torch.cuda.is_available():
-            print(f"   GPU: {torch.cuda.get_device_name(0)}")
-        
-        self._model = WhisperModel(
-            self._model_name,
-            device=self._device,
-            compute_type=self._compute_type
-        )
-        print("✓ Faster Whisper model loaded")
+        """Synchronous model loading; reuses the process-wide model when already loaded."""
+        key = (self._model_name, self._device, self._compute_type)
+        with _MODEL_LOCK:
+            model = _MODEL_CACHE.get(key)
+            if model is not None:
+                return model
+            print(f"📦 Loading Faster Whisper: {self._model_name} on {self._device}")
+            if self._device == "cuda" and torch.cuda.is_available():
+                print(f"   GPU: {torch.cuda.get_device_name(0)}")
+            
+            model = WhisperModel(
+                self._model_name,
+                device=self._device,
+                compute_type=self._compute_type
+            )
+            _MODEL_CACHE[key] = model
+            print("✓ Faster Whisper model loaded")
+            return model
     
     def set_language(self, language: str):
         """Set the language for transcription."""
@@ -0,0 +1,193 @@
+"""KnightBot in-process barge-in detector.
+
+While the bot is speaking, every microphone frame is scored with cheap NumPy
+features: RMS energy, zero-crossing rate and the share of spectral energy in the
+speech band (150-4000 Hz). Sustained speech-like audio commits an interruption
+without a round trip to the STT service. Per-frame cost is well under a millisecond.
+
+Optionally, a tiny Faster Whisper model confirms borderline decisions, those
+whose speech share sits just below the fast-path bar, by counting words in the
+last couple of seconds of audio.
+
+Usage:
+    from interruption import InterruptionDetector
+
+    detector = InterruptionDetector(rms_threshold=850, min_speech_s=0.36)
+    decision = await detector.update(pcm_bytes)
+    if decision and decision.commit:
+        ...
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:  # pragma: no cover - optional confirmation model
+    WhisperModel = None
+
+_SPEECH_BAND_HZ = (150.0, 4000.0)
+_ZCR_RANGE = (0.01, 0.35)
+
+_WHISPER_MODELS: dict = {}
+_WHISPER_LOCK = threading.Lock()
+
+
+def _whisper(model_name: str):
+    with _WHISPER_LOCK:
+        if model_name not in _WHISPER_MODELS:
+            print(f"📦 Loading interruption Whisper model: {model_name} (cpu, int8)")
+            _WHISPER_MODELS[model_name] = WhisperModel(model_name, device="cpu", compute_type="int8")
+        return _WHISPER_MODELS[model_name]
+
+
+def frame_features(pcm: bytes, sample_rate: int = 16000) -> dict:
+    samples = np.frombuffer(pcm[: len(pcm) - (len(pcm) % 2)], dtype="<i2").astype(np.float32)
+    if samples.size < 2:
+        return {"rms": 0.0, "zcr": 0.0, "speech_band_ratio": 0.0}
+    rms = float(np.sqrt(np.mean(samples * samples)))
+    signs = np.signbit(samples)
+    zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / (samples.size - 1)
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(samples.size))) ** 2
+    freqs = np.fft.rfftfreq(samples.size, 1.0 / sample_rate)
+    total = float(spectrum.sum())
+    band = (freqs >= _SPEECH_BAND_HZ[0]) & (freqs <= _SPEECH_BAND_HZ[1])
+    ratio = float(spectrum[band].sum()) / total if total > 0 else 0.0
+    return {"rms": rms, "zcr": zcr, "speech_band_ratio": ratio}
+
+
+@dataclass
+class InterruptDecision:
+    commit: bool
+    path: str  # "features" or "whisper"
+    speech_s: float
+    speech_share: float
+    onset_to_decision_ms: float
+    decision_ms: float
+    words: int | None = None
+
+
+class InterruptionDetector:
+    """Decides barge-ins from sustained speech-like frames; one instance per room.
+
+    `speech_s` rises by the frame duration for each speech-like frame and falls by
+    `decay` times that otherwise. Once it reaches `min_speech_s`, the detector commits if
+    at least `min_speech_share` of frames since onset were speech-like. When a Whisper
+    model is configured, it confirms decisions within `gray_zone` below that share.
+
+    Reaching `min_speech_s` only needs a share above decay / (1 + decay), 1/3 by
+    default. That must stay below min_speech_share - gray_zone, or every decision
+    would take the fast path and the gray zone could never be reached.
+    """
+
+    def __init__(
+        self,
+        rms_threshold: float,
+        min_speech_s: float,
+        sample_rate: int = 16000,
+        min_band_ratio: float = 0.55,
+        min_speech_share: float = 0.6,
+        gray_zone: float = 0.2,
+        whisper_model: str | None = None,
+        min_words: int = 2,
+        decay: float = 0.5,
+    ):
+        self.rms_threshold = rms_threshold
+        self.min_speech_s = min_speech_s
+        self.sample_rate = sample_rate
+        self.min_band_ratio = min_band_ratio
+        self.min_speech_share = min_speech_share
+        self.gray_zone = gray_zone
+        self.whisper_model = whisper_model if WhisperModel is not None else None
+        self.min_words = min_words
+        self.decay = decay
+        self._audio = bytearray()
+        self._max_audio_bytes = sample_rate * 2 * 2  # ~2s for the confirmation model
+        self.commits = 0
+        self.false_positives = 0
+        self.confirmed = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.speech_s = 0.0
+        self.onset: float | None = None
+        self._frames = 0
+        self._speech_frames = 0
+        self._audio.clear()
+
+    @property
+    def false_positive_rate(self) -> float | None:
+        judged = self.confirmed + self.false_positives
+        return round(self.false_positives / judged, 4) if judged else None
+
+    def record_outcome(self, confirmed: bool) -> None:
+        """Whether a committed barge-in was followed by a real user utterance."""
+        if confirmed:
+            self.confirmed += 1
+        else:
+            self.false_positives += 1
+
+    def is_speech(self, feats: dict) -> bool:
+        return (
+            feats["rms"] >= self.rms_threshold
+            and _ZCR_RANGE[0] <= feats["zcr"] <= _ZCR_RANGE[1]
+            and feats["speech_band_ratio"] >= self.min_band_ratio
+        )
+
+    async def update(self, pcm: bytes) -> InterruptDecision | None:
+        """Feed one input frame; returns a decision once enough speech has accumulated."""
+        started = time.perf_counter()
+        frame_s = len(pcm) / float(self.sample_rate * 2)
+        speech = self.is_speech(frame_features(pcm, self.sample_rate))
+
+        if speech:
+            if self.onset is None:
+                self.onset = started
+            self.speech_s += frame_s
+        else:
+            self.speech_s = max(0.0, self.speech_s - frame_s * self.decay)
+            if self.speech_s == 0.0:
+                self.reset()
+                return None
+        if self.onset is None:
+            return None
+
+        self._frames += 1
+        self._speech_frames += int(speech)
+        self._audio.extend(pcm)
+        if len(self._audio) > self._max_audio_bytes:
+            del self._audio[: len(self._audio) - self._max_audio_bytes]
+        if self.speech_s < self.min_speech_s:
+            return None
+
+        share = self._speech_frames / self._frames
+        path, words = "features", None
+        commit = share >= self.min_speech_share
+        if not commit and self.whisper_model and share >= self.min_speech_share - self.gray_zone:
+            path = "whisper"
+            words = await asyncio.to_thread(self._count_words, bytes(self._audio))
+            commit = words >= self.min_words
+
+        now = time.perf_counter()
+        decision = InterruptDecision(
+            commit=commit,
+            path=path,
+            speech_s=round(self.speech_s, 3),
+            speech_share=round(share, 3),
+            onset_to_decision_ms=round((now - self.onset) * 1000.0, 1),
+            decision_ms=round((now - started) * 1000.0, 2),
+            words=words,
+        )
+        if commit:
+            self.commits += 1
+        self.reset()
+        return decision
+
+    def _count_words(self, pcm: bytes) -> int:
+        audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        segments, _ = _whisper(self.whisper_model).transcribe(audio, beam_size=1, language="en")
+        return sum(len(s.text.split()) for s in segments)
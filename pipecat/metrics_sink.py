@@ -0,0 +1,282 @@
+"""KnightBot voice metrics sink: append-only turn records written off the event loop.
+
+`submit()` only enqueues the record. A writer thread drains the queue in batches and
+appends them to either
+
+  - JSONL files (`turns-YYYYMMDD-<pid>-NNN.jsonl`, one record per line), rotated
+    daily and whenever a file passes `rotate_bytes`, or
+  - a SQLite database (`turns.db`, WAL mode), one row per turn plus the full record.
+
+The writer also keeps per-session summaries in memory (turn count, statuses, and
+p50/p95 of each derived duration). `serve(port)` exposes them over HTTP:
+
+    GET /metrics/sessions          all sessions in this process
+    GET /metrics/sessions/<id>     one session
+
+Usage:
+    from metrics_sink import MetricsSink
+
+    sink = MetricsSink(Path("data/logs/voice_metrics"), summary_keys=("stt_s", "llm_s"))
+    sink.serve(8095)
+    sink.submit({"session_id": "...", "turn_id": 1, "stt_s": 0.21})
+    sink.close()
+"""
+
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_STOP = object()
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = min(max(1, math.ceil(q / 100.0 * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class SessionSummary:
+    def __init__(self, session_id: str, room_id: str | None, keys: tuple[str, ...], window: int):
+        self.session_id = session_id
+        self.room_id = room_id
+        self.turns = 0
+        self.statuses: dict[str, int] = {}
+        self.first_at: float | None = None
+        self.last_at: float | None = None
+        self.values: dict[str, deque] = {k: deque(maxlen=window) for k in keys}
+
+    def add(self, record: dict) -> None:
+        self.turns += 1
+        status = str(record.get("status") or "unknown")
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        at = record.get("flushed_at")
+        if isinstance(at, (int, float)):
+            self.first_at = at if self.first_at is None else min(self.first_at, at)
+            self.last_at = at if self.last_at is None else max(self.last_at, at)
+        for key, values in self.values.items():
+            value = record.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values.append(float(value))
+
+    def to_dict(self) -> dict:
+        durations = {}
+        for key, values in self.values.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            durations[key] = {
+                "count": len(ordered),
+                "p50": round(percentile(ordered, 50), 4),
+                "p95": round(percentile(ordered, 95), 4),
+            }
+        return {
+            "session_id": self.session_id,
+            "room_id": self.room_id,
+            "turns": self.turns,
+            "status": dict(self.statuses),
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+            "durations": durations,
+        }
+
+
+class MetricsSink:
+    """Batched, rotating turn-record writer plus in-memory per-session summaries."""
+
+    def __init__(
+        self,
+        directory: Path,
+        fmt: str = "jsonl",
+        summary_keys: tuple[str, ...] = (),
+        batch_size: int = 64,
+        flush_interval_s: float = 1.0,
+        rotate_bytes: int = 32 * 1024 * 1024,
+        max_sessions: int = 256,
+        window: int = 1000,
+    ):
+        if fmt not in ("jsonl", "sqlite"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.summary_keys = tuple(summary_keys)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.rotate_bytes = rotate_bytes
+        self.max_sessions = max_sessions
+        self.window = window
+        self.written = 0
+        self.write_errors = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._sessions: OrderedDict[str, SessionSummary] = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_day = ""
+        self._file_seq = 0
+        self._db: sqlite3.Connection | None = None
+        self._server: ThreadingHTTPServer | None = None
+        self._thread = threading.Thread(target=self._run, name="voice-metrics-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict) -> None:
+        """Queue a finished turn record; never blocks. The caller must not mutate it afterwards."""
+        self._queue.put(record)
+
+    # --- writer thread ---
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._summarize(batch)
+                try:
+                    self._write(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    self.write_errors += 1
+                    print(f"[voice-metrics] failed writing {len(batch)} turn records: {e}")
+        self._close_outputs()
+
+    def _summarize(self, batch: list[dict]) -> None:
+        with self._lock:
+            for record in batch:
+                sid = str(record.get("session_id") or "unknown")
+                summary = self._sessions.get(sid)
+                if summary is None:
+                    summary = SessionSummary(sid, record.get("room_id"), self.summary_keys, self.window)
+                    self._sessions[sid] = summary
+                    while len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                else:
+                    self._sessions.move_to_end(sid)
+                summary.add(record)
+
+    def _write(self, batch: list[dict]) -> None:
+        if self.fmt == "sqlite":
+            self._write_sqlite(batch)
+        else:
+            self._write_jsonl(batch)
+
+    def _jsonl_file(self):
+        day = time.strftime("%Y%m%d")
+        if self._file is not None and (day != self._file_day or self._file.tell() >= self.rotate_bytes):
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            if day != self._file_day:
+                self._file_day, self._file_seq = day, 0
+            self._file_seq += 1
+            path = self.directory / f"turns-{day}-{os.getpid()}-{self._file_seq:03d}.jsonl"
+            self._file = path.open("a", encoding="utf-8")
+        return self._file
+
+    def _write_jsonl(self, batch: list[dict]) -> None:
+        f = self._jsonl_file()
+        f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch))
+        f.flush()
+
+    def _write_sqlite(self, batch: list[dict]) -> None:
+        if self._db is None:
+            self._db = sqlite3.connect(self.directory / "turns.db", timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "session_id TEXT, room_id TEXT, turn_id INTEGER, status TEXT, "
+                "created_at REAL, flushed_at REAL, record TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS turns_flushed_at ON turns (flushed_at)")
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO turns VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r.get("session_id"),
+                        r.get("room_id"),
+                        r.get("turn_id"),
+                        r.get("status"),
+                        r.get("created_at"),
+                        r.get("flushed_at"),
+                        json.dumps(r, ensure_ascii=False, default=str),
+                    )
+                    for r in batch
+                ],
+            )
+
+    def _close_outputs(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- summaries ---
+
+    def summaries(self) -> dict:
+        with self._lock:
+            return {sid: s.to_dict() for sid, s in self._sessions.items()}
+
+    def summary(self, session_id: str) -> dict | None:
+        with self._lock:
+            s = self._sessions.get(session_id)
+            return s.to_dict() if s is not None else None
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve session summaries over HTTP from a daemon thread."""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0].rstrip("/")
+                if path == "/metrics/sessions":
+                    body = {"sessions": sink.summaries(), "written": sink.written, "write_errors": sink.write_errors}
+                elif path.startswith("/metrics/sessions/"):
+                    body = sink.summary(path[len("/metrics/sessions/") :])
+                else:
+                    body = None
+                data = json.dumps(body if body is not None else {"error": "not found"}).encode("utf-8")
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"[voice-metrics] summary endpoint unavailable on {host}:{port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="voice-metrics-http", daemon=True).start()
+        print(f"📈 Voice metrics summaries at http://{host}:{port}/metrics/sessions")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write everything queued so far, then stop the writer and the endpoint."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
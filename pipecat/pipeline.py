@@ -5,6 +5,10 @@ import time
 import os
 import sys
 import json
+import io
+import re
+import wave
+from dataclasses import dataclass
 from pathlib import Path
 
 
@@ -25,10 +29,18 @@ _PROJECT_ROOT = str(Path(__file__).resolve().parents[1])
 sys.path = [p for p in sys.path if p not in ("", _PROJECT_ROOT, str(Path(__file__).parent))]
 # Also make sure we can import from our local custom modules
 sys.path.insert(0, str(Path(__file__).parent))  # pipecat/ subfolder
+sys.path.insert(1, str(Path(_PROJECT_ROOT) / "audio"))  # shared with chatterbox/server.py
 
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.task import PipelineTask, PipelineParams
-from pipecat.frames.frames import Frame, AudioRawFrame, TextFrame, TranscriptionFrame
+from pipecat.frames.frames import (
+    DataFrame,
+    Frame,
+    AudioRawFrame,
+    TextFrame,
+    TranscriptionFrame,
+    InterimTranscriptionFrame,
+)
 from pipecat.processors.frame_processor import FrameProcessor
 from pipecat.audio.vad.vad_analyzer import VADParams
 from pipecat.transports.services.livekit import LiveKitTransport, LiveKitParams
@@ -44,6 +56,15 @@ except ImportError as e:
     print(f"[warn] Custom FasterWhisperSTT not available: {e}")
     print("[warn] Will try HTTP fallback to STT services")
 
+# Interruption frame that tells the output transport to drop queued audio.
+try:
+    from pipecat.frames.frames import StartInterruptionFrame as _FlushAudioFrame
+except ImportError:
+    try:
+        from pipecat.frames.frames import InterruptionFrame as _FlushAudioFrame
+    except ImportError:
+        _FlushAudioFrame = None
+
 # Try to import Silero VAD
 try:
     from pipecat.audio.vad.silero import SileroVADAnalyzer
@@ -55,6 +76,12 @@ except Exception as e:
 # Import httpx for fallback HTTP STT
 import httpx
 
+from audio_output import OutputFrames, pcm16_to_float, prepare_output, resample
+from echo import EchoCanceller
+from ack_clips import DEFAULT_PHRASES, AckClip, AckClipBank, crossfade_into
+from interruption import InterruptionDetector
+from metrics_sink import MetricsSink
+
 # LiveKit Config
 LIVEKIT_URL = os.getenv("KB_LIVEKIT_URL", "ws://localhost:7880")
 API_KEY = os.getenv("KB_LIVEKIT_KEY", "devkey")
@@ -62,13 +89,45 @@ API_SECRET = os.getenv("KB_LIVEKIT_SECRET", "secret")
 
 # Configuration
 _TTS_COOLDOWN = float(os.getenv("KB_TTS_COOLDOWN_S", "0.15"))
+# Echo suppression against the TTS reference; when on, the post-TTS cooldown is skipped.
+_ECHO_CANCEL = os.getenv("KB_ECHO_CANCEL", "1") != "0"
+_ECHO_TAPS_MS = float(os.getenv("KB_ECHO_TAPS_MS", "32"))
+_ECHO_MAX_DELAY_MS = float(os.getenv("KB_ECHO_MAX_DELAY_MS", "600"))
+_TTS_URL = os.getenv("KB_TTS_URL", "http://localhost:8060/synthesize")
+_TTS_VOICE_ID = os.getenv("KB_TTS_VOICE_ID", "").strip() or None
+# Latency masking: play a pre-rendered acknowledgement when first audio is predicted to be slow.
+_ACK_ENABLED = os.getenv("KB_ACK_ENABLED", "0") == "1"
+_ACK_THRESHOLD_S = float(os.getenv("KB_ACK_THRESHOLD_S", "1.2"))
+_ACK_PRIOR_S = float(os.getenv("KB_ACK_PRIOR_S", "2.0"))
+_ACK_CROSSFADE_MS = float(os.getenv("KB_ACK_CROSSFADE_MS", "60"))
+_ACK_PHRASES = [p.strip() for p in os.getenv("KB_ACK_PHRASES", "|".join(DEFAULT_PHRASES)).split("|") if p.strip()]
 _INTERRUPT_RMS_THRESHOLD = int(os.getenv("KB_INTERRUPT_RMS", "700"))
-_TTS_CHUNK_MS = int(os.getenv("KB_TTS_CHUNK_MS", "40"))
+_TTS_CHUNK_MS = int(os.getenv("KB_TTS_CHUNK_MS", "20"))
+_TTS_OUTPUT_RATE = int(os.getenv("KB_TTS_OUTPUT_RATE", "48000"))
+_TTS_PLAYOUT_AHEAD_MS = float(os.getenv("KB_TTS_PLAYOUT_AHEAD_MS", "80"))
+_TTS_LOOKAHEAD = max(1, int(os.getenv("KB_TTS_LOOKAHEAD", "2")))
+_TTS_SEGMENT_MIN_CHARS = int(os.getenv("KB_TTS_SEGMENT_MIN_CHARS", "40"))
 _INTERRUPTION_MODE = os.getenv("KB_INTERRUPTION_MODE", "polite").strip().lower()
 _INTERRUPT_MIN_MS = float(os.getenv("KB_INTERRUPT_MIN_MS", "300"))
 _INTERRUPT_MIN_WORDS = int(os.getenv("KB_INTERRUPT_MIN_WORDS", "3"))
 _INTERRUPT_PROBE_COOLDOWN_S = float(os.getenv("KB_INTERRUPT_PROBE_COOLDOWN_S", "0.35"))
+# "features" decides barge-ins in-process; "stt" probes the STT service as before.
+_INTERRUPT_DETECTOR = os.getenv("KB_INTERRUPT_DETECTOR", "features").strip().lower()
+_INTERRUPT_WHISPER_MODEL = os.getenv("KB_INTERRUPT_WHISPER_MODEL", "").strip() or None
+_INTERRUPT_FP_WINDOW_S = float(os.getenv("KB_INTERRUPT_FP_WINDOW_S", "4"))
 _VOICE_METRICS_ENABLED = os.getenv("KB_VOICE_METRICS_ENABLED", "1") != "0"
+_VOICE_METRICS_FORMAT = os.getenv("KB_VOICE_METRICS_FORMAT", "jsonl").strip().lower()
+_VOICE_METRICS_ROTATE_MB = float(os.getenv("KB_VOICE_METRICS_ROTATE_MB", "32"))
+_VOICE_METRICS_ORPHAN_TTL_S = float(os.getenv("KB_VOICE_METRICS_ORPHAN_TTL_S", "600"))
+# Per-session summary endpoint; room workers serve on port + worker index. 0 disables it.
+_VOICE_METRICS_PORT = int(os.getenv("KB_VOICE_METRICS_PORT", "8095"))
+_LLM_SPECULATIVE = os.getenv("KB_LLM_SPECULATIVE", "1") != "0"
+_ROOM_NAME = os.getenv("KB_ROOM_NAME", "knight-room")
+BOT_IDENTITY = "knight-bot"
+_VOICE_TURN_API_VERSION = 1
+_VOICE_PROFILE = os.getenv("KB_VOICE_PROFILE", "").strip() or None
+_VOICE_LATENCY_BUDGET_S = float(os.getenv("KB_VOICE_LATENCY_BUDGET_S", "0")) or None
+_STT_INTERIM_BYTES = int(os.getenv("KB_STT_INTERIM_BYTES", "0"))
 
 # Faster Whisper Config
 _FASTER_WHISPER_MODEL = os.getenv("KB_FASTER_WHISPER_MODEL", "large-v3")
@@ -80,18 +139,29 @@ _FALLBACK_STT_URL = os.getenv("KB_STT_URL", "http://localhost:8070/transcribe")
 # Metrics tracking
 _PROJECT_DIR = Path(__file__).resolve().parents[1]
 _VOICE_METRICS_DIR = _PROJECT_DIR / "data" / "logs" / "voice_metrics"
-if _VOICE_METRICS_ENABLED:
-    _VOICE_METRICS_DIR.mkdir(parents=True, exist_ok=True)
-
-_SESSION_ID = time.strftime("%Y%m%d-%H%M%S")
-_TURN_COUNTER = 0
-_CURRENT_TURN_ID = None
-_TURN_METRICS = {}
 
-# Bot speaking state
-_bot_speaking = False
-_last_tts_time = 0
-_interrupt_requested = False
+# (start mark, end mark, derived duration) computed for every flushed turn.
+_DERIVED_DURATIONS = (
+    ("stt_start", "stt_end", "stt_s"),
+    ("llm_start", "llm_end", "llm_s"),
+    ("tts_start", "tts_end", "tts_s"),
+    ("tts_start", "tts_first_audio", "first_audio_s"),
+    ("stt_end", "tts_first_audio", "stt_to_first_audio_s"),
+    ("llm_start", "tts_first_audio", "llm_to_first_audio_s"),
+    ("interrupt_requested", "interrupt_committed", "barge_in_commit_s"),
+    ("stt_end", "ack_first_audio", "perceived_first_audio_s"),
+    ("ack_first_audio", "tts_first_audio", "ack_masked_s"),
+)
+
+_TURN_REPORT_KEYS = (
+    "status",
+    "stt_s",
+    "llm_s",
+    "llm_total_s_backend",
+    "first_audio_s",
+    "stt_to_first_audio_s",
+    "tts_s",
+)
 
 
 def _now() -> float:
@@ -103,58 +173,133 @@ def _event(event_name: str, **kwargs):
     print(f"[voice-metrics] {json.dumps(payload, ensure_ascii=False)}")
 
 
-def _new_turn(user_text: str) -> int:
-    global _TURN_COUNTER, _CURRENT_TURN_ID
-    _TURN_COUNTER += 1
-    turn_id = _TURN_COUNTER
-    _CURRENT_TURN_ID = turn_id
-    _TURN_METRICS[turn_id] = {
-        "session_id": _SESSION_ID,
-        "turn_id": turn_id,
-        "user_text_preview": user_text[:200],
-        "created_at": time.time(),
-    }
-    return turn_id
-
-
-def _mark_turn(turn_id: int | None, key: str, value: float | str | int | bool | None = None):
-    if not _VOICE_METRICS_ENABLED or turn_id is None:
-        return
-    if turn_id not in _TURN_METRICS:
-        _TURN_METRICS[turn_id] = {"session_id": _SESSION_ID, "turn_id": turn_id}
-    _TURN_METRICS[turn_id][key] = _now() if value is None else value
-
-
-def _flush_turn(turn_id: int | None, status: str = "completed"):
-    if not _VOICE_METRICS_ENABLED or turn_id is None:
-        return
-    m = _TURN_METRICS.get(turn_id)
-    if not m:
-        return
-
-    m["status"] = status
-    m["flushed_at"] = time.time()
-
-    # Derive durations if timestamps exist.
-    for a, b, out_key in [
-        ("stt_start", "stt_end", "stt_s"),
-        ("llm_start", "llm_end", "llm_s"),
-        ("tts_start", "tts_end", "tts_s"),
-        ("tts_start", "tts_first_audio", "first_audio_s"),
-        ("stt_end", "tts_first_audio", "stt_to_first_audio_s"),
-        ("llm_start", "tts_first_audio", "llm_to_first_audio_s"),
-        ("interrupt_requested", "interrupt_committed", "barge_in_commit_s"),
-    ]:
-        if a in m and b in m:
-            m[out_key] = round(float(m[b]) - float(m[a]), 4)
-
-    out_path = _VOICE_METRICS_DIR / f"{_SESSION_ID}-turn-{turn_id:04d}.json"
-    try:
-        out_path.write_text(json.dumps(m, indent=2, ensure_ascii=False), encoding="utf-8")
-    except Exception as e:
-        print(f"[voice-metrics] failed writing turn metrics: {e}")
+class RoomState:
+    """Conversation state for one LiveKit room; every pipeline gets its own instance."""
+
+    def __init__(self, room_name: str, metrics: MetricsSink | None = None):
+        self.room_name = room_name
+        self.metrics = metrics
+        self.session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{room_name}"
+        self.turn_counter = 0
+        self.current_turn_id: int | None = None
+        self.turn_metrics: dict[int, dict] = {}
+        # Derived timings of the last flushed turn, reported to the core with the next turn.
+        self.last_turn_report: dict | None = None
+        self.bot_speaking = False
+        self.last_tts_time = 0.0
+        self.interrupt_requested = False
+        self.turns = TurnManager(self)
+        self.echo = EchoCanceller(taps_ms=_ECHO_TAPS_MS, max_delay_ms=_ECHO_MAX_DELAY_MS) if _ECHO_CANCEL else None
+        # EMA of transcript -> first reply audio, used to decide when to play an ack clip.
+        self.first_audio_ema: float | None = None
+
+    def predicted_first_audio_s(self) -> float:
+        return _ACK_PRIOR_S if self.first_audio_ema is None else self.first_audio_ema
+
+    def event(self, event_name: str, **kwargs):
+        _event(event_name, room=self.room_name, **kwargs)
+
+    def new_turn(self, user_text: str) -> int:
+        self.expire_orphans()
+        self.turn_counter += 1
+        turn_id = self.turn_counter
+        self.current_turn_id = turn_id
+        self.turn_metrics[turn_id] = {
+            "session_id": self.session_id,
+            "room_id": self.room_name,
+            "turn_id": turn_id,
+            "user_text_preview": user_text[:200],
+            "created_at": time.time(),
+        }
+        return turn_id
+
+    def mark(self, turn_id: int | None, key: str, value: float | str | int | bool | None = None):
+        if not _VOICE_METRICS_ENABLED or turn_id is None:
+            return
+        if turn_id not in self.turn_metrics:
+            self.turn_metrics[turn_id] = {
+                "session_id": self.session_id,
+                "room_id": self.room_name,
+                "turn_id": turn_id,
+                "created_at": time.time(),
+            }
+        self.turn_metrics[turn_id][key] = _now() if value is None else value
+
+    def flush(self, turn_id: int | None, status: str = "completed"):
+        if not _VOICE_METRICS_ENABLED or turn_id is None:
+            return
+        m = self.turn_metrics.get(turn_id)
+        if not m:
+            return
 
-    _TURN_METRICS.pop(turn_id, None)
+        m["status"] = status
+        m["flushed_at"] = time.time()
+
+        # Derive durations if timestamps exist.
+        for a, b, out_key in _DERIVED_DURATIONS:
+            if a in m and b in m:
+                m[out_key] = round(float(m[b]) - float(m[a]), 4)
+
+        llm_to_audio = m.get("llm_to_first_audio_s")
+        if status == "completed" and isinstance(llm_to_audio, (int, float)):
+            prev = self.first_audio_ema
+            self.first_audio_ema = llm_to_audio if prev is None else 0.3 * llm_to_audio + 0.7 * prev
+
+        if status != "expired":
+            self.last_turn_report = {"turn_id": turn_id, **{k: m[k] for k in _TURN_REPORT_KEYS if k in m}}
+
+        self.turn_metrics.pop(turn_id, None)
+        if self.metrics is not None:
+            self.metrics.submit(m)
+
+    def expire_orphans(self, ttl_s: float = _VOICE_METRICS_ORPHAN_TTL_S) -> None:
+        """Flush turns that never finished (e.g. dropped before TTS) once they are `ttl_s` old."""
+        cutoff = time.time() - ttl_s
+        for turn_id, m in list(self.turn_metrics.items()):
+            if turn_id != self.current_turn_id and float(m.get("created_at") or 0.0) < cutoff:
+                self.flush(turn_id, status="expired")
+
+    def voice_turn_payload(self, text: str, turn_id: int | None) -> dict:
+        """Request body for the core's versioned /voice/turn contract."""
+        payload = {
+            "api_version": _VOICE_TURN_API_VERSION,
+            "message": text,
+            "include_audio": True,
+            "session_id": self.session_id,
+            "room_id": self.room_name,
+            "turn_id": turn_id,
+        }
+        if _VOICE_PROFILE:
+            payload["voice_profile"] = _VOICE_PROFILE
+        if _VOICE_LATENCY_BUDGET_S:
+            payload["latency_budget_s"] = _VOICE_LATENCY_BUDGET_S
+        return payload
+
+
+class SharedResources:
+    """Per-process clients shared by every room pipeline in the process."""
+
+    def __init__(self, max_connections: int = 64, metrics_port_offset: int = 0):
+        self.http = httpx.AsyncClient(
+            timeout=120,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.acks = AckClipBank(_ACK_PHRASES)
+        self.metrics: MetricsSink | None = None
+        if _VOICE_METRICS_ENABLED:
+            self.metrics = MetricsSink(
+                _VOICE_METRICS_DIR,
+                fmt=_VOICE_METRICS_FORMAT,
+                summary_keys=tuple(out_key for _, _, out_key in _DERIVED_DURATIONS),
+                rotate_bytes=int(_VOICE_METRICS_ROTATE_MB * 1024 * 1024),
+            )
+            if _VOICE_METRICS_PORT:
+                self.metrics.serve(_VOICE_METRICS_PORT + metrics_port_offset)
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+        if self.metrics is not None:
+            await asyncio.to_thread(self.metrics.close)
 
 
 def _words(text: str) -> int:
@@ -168,6 +313,69 @@ def _frame_duration_s(frame: AudioRawFrame) -> float:
     return len(frame.audio) / float(sample_rate * num_channels * bytes_per_sample)
 
 
+def _decode_tts_response(r: httpx.Response) -> tuple[bytes, int, int]:
+    """Return (s16le pcm, sample_rate, channels) from a chatterbox /synthesize response.
+
+    Raw PCM responses carry their format in X-Sample-Rate/X-Channels headers; WAV
+    responses are parsed properly instead of assuming a fixed 44-byte header.
+    """
+    content_type = (r.headers.get("content-type") or "").lower()
+    if r.headers.get("x-audio-format") == "pcm" or content_type.startswith("audio/l16"):
+        sample_rate = int(r.headers.get("x-sample-rate") or 0)
+        channels = int(r.headers.get("x-channels") or 1)
+        if sample_rate <= 0:
+            raise ValueError("PCM TTS response missing X-Sample-Rate header")
+        return r.content, sample_rate, channels
+
+    with wave.open(io.BytesIO(r.content), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Unsupported TTS sample width: {wav.getsampwidth() * 8} bits")
+        return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels()
+
+
+def split_tts_segments(text: str, min_chars: int = _TTS_SEGMENT_MIN_CHARS) -> list[str]:
+    """Split a reply into sentences, merging short ones so each synthesis call is worthwhile."""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", " ".join(text.split())) if s.strip()]
+    segments: list[str] = []
+    for sentence in sentences:
+        if segments and len(segments[-1]) < min_chars:
+            segments[-1] = f"{segments[-1]} {sentence}"
+        else:
+            segments.append(sentence)
+    return segments
+
+
+async def synthesize_segment(client: httpx.AsyncClient, text: str) -> tuple[OutputFrames, int]:
+    """Render `text` with chatterbox into transport-ready frames; returns (frames, source rate)."""
+    payload = {
+        "text": text,
+        "exaggeration": 0.5,
+        "format": "pcm",
+        "sample_rate": _TTS_OUTPUT_RATE,
+    }
+    if _TTS_VOICE_ID:
+        payload["voice_id"] = _TTS_VOICE_ID
+    r = await client.post(
+        _TTS_URL,
+        json=payload,
+        headers={"Accept": "audio/L16, audio/wav;q=0.5"},
+        timeout=60.0,
+    )
+    if r.status_code != 200:
+        raise RuntimeError(f"TTS returned {r.status_code}")
+    audio_data, sample_rate, num_channels = _decode_tts_response(r)
+    # Resample (only if the server could not) and slice once, off the playout loop.
+    frames = await asyncio.to_thread(
+        prepare_output,
+        audio_data,
+        sample_rate,
+        _TTS_OUTPUT_RATE,
+        _TTS_CHUNK_MS,
+        num_channels,
+    )
+    return frames, sample_rate
+
+
 def audio_rms(pcm_bytes: bytes) -> int:
     try:
         import audioop
@@ -194,76 +402,298 @@ def _interrupt_min_speech_s() -> float:
     return max(0.12, _INTERRUPT_MIN_MS / 1000.0)
 
 
+@dataclass
+class ReplyTextFrame(TextFrame):
+    """Assistant reply tagged with the utterance generation it answers."""
+
+    turn_id: int | None = None
+    generation: int | None = None
+
+
+@dataclass
+class AckRequestFrame(DataFrame):
+    """Ask the TTS stage to cover the wait for `turn_id`'s reply with an acknowledgement clip."""
+
+    turn_id: int | None = None
+    generation: int | None = None
+    predicted_s: float = 0.0
+
+
+class TurnManager:
+    """Generation ids for user utterances; newer utterances and barge-ins cancel stale work.
+
+    Every committed utterance starts a new generation. LLM and TTS tasks register
+    under the generation they serve, and starting a new one (or committing a barge-in)
+    cancels everything still in flight, which also aborts their HTTP requests.
+    """
+
+    def __init__(self, room: RoomState):
+        self.room = room
+        self.generation = 0
+        self._tasks: dict[asyncio.Task, dict] = {}
+        self.discarded = {"llm": 0, "tts_synth": 0, "tts_playout": 0}
+
+    def begin(self) -> int:
+        self.cancel_all("superseded")
+        self.generation += 1
+        return self.generation
+
+    def invalidate(self, reason: str) -> None:
+        self.generation += 1
+        self.cancel_all(reason)
+
+    def is_current(self, generation: int | None) -> bool:
+        return generation is None or generation == self.generation
+
+    def track(self, task: asyncio.Task, generation: int, turn_id: int | None, stage: str) -> None:
+        self._tasks[task] = {"generation": generation, "turn_id": turn_id, "stage": stage, "started": _now()}
+        task.add_done_callback(lambda t: self._tasks.pop(t, None))
+
+    def set_stage(self, stage: str) -> None:
+        info = self._tasks.get(asyncio.current_task())
+        if info is not None:
+            info["stage"] = stage
+
+    def record_discard(self, turn_id: int | None, stage: str, reason: str, work_s: float = 0.0) -> None:
+        self.discarded[stage] = self.discarded.get(stage, 0) + 1
+        self.room.mark(turn_id, "discarded_stage", stage)
+        self.room.mark(turn_id, "discarded_reason", reason)
+        self.room.mark(turn_id, "discarded_work_s", round(work_s, 4))
+        self.room.event("turn_discarded", turn_id=turn_id, stage=stage, reason=reason, work_s=round(work_s, 4))
+
+    def cancel_all(self, reason: str) -> None:
+        for task, info in list(self._tasks.items()):
+            if task.done():
+                continue
+            self.record_discard(info["turn_id"], info["stage"], reason, _now() - info["started"])
+            task.cancel()
+
+
+class PlayoutScheduler:
+    """Paces audio against a monotonic clock, keeping at most `ahead_ms` queued downstream.
+
+    Deadlines are derived from the total audio pushed so far rather than per-chunk
+    sleeps, so timing error never accumulates. The bounded lead keeps barge-in
+    latency independent of reply length.
+    """
+
+    def __init__(self, ahead_ms: float = _TTS_PLAYOUT_AHEAD_MS):
+        self.ahead_s = max(0.0, ahead_ms / 1000.0)
+        self._anchor: float | None = None
+        self._pushed_s = 0.0
+        self._ahead_sum_s = 0.0
+        self._ahead_max_s = 0.0
+        self._frames = 0
+        self._underruns = 0
+
+    def pending_s(self) -> float:
+        """Audio already handed to the transport but not yet played."""
+        if self._anchor is None:
+            return 0.0
+        return max(0.0, self._pushed_s - (_now() - self._anchor))
+
+    async def wait_for_slot(self, frame_s: float) -> None:
+        now = _now()
+        if self._anchor is None:
+            self._anchor = now
+        elif self._pushed_s < now - self._anchor:
+            # Transport drained (e.g. waiting on synthesis); re-anchor instead of bursting.
+            self._anchor = now - self._pushed_s
+            self._underruns += 1
+
+        deadline = self._anchor + self._pushed_s + frame_s - self.ahead_s
+        delay = deadline - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def mark_pushed(self, frame_s: float) -> None:
+        self._pushed_s += frame_s
+        ahead = self.pending_s()
+        self._ahead_sum_s += ahead
+        self._ahead_max_s = max(self._ahead_max_s, ahead)
+        self._frames += 1
+
+    def report(self) -> dict:
+        return {
+            "playout_ahead_target_ms": round(self.ahead_s * 1000.0, 1),
+            "playout_ahead_avg_ms": round(self._ahead_sum_s / self._frames * 1000.0, 1) if self._frames else 0.0,
+            "playout_ahead_max_ms": round(self._ahead_max_s * 1000.0, 1),
+            "playout_underruns": self._underruns,
+            "playout_audio_s": round(self._pushed_s, 3),
+        }
+
+
+class _AckPlayback:
+    """An acknowledgement clip being played for `turn_id` until the reply takes over."""
+
+    def __init__(self, clip: AckClip, turn_id: int | None):
+        self.clip = clip
+        self.turn_id = turn_id
+        self.scheduler = PlayoutScheduler()
+        self.pos = 0  # next frame to push
+        self.ended_at: float | None = None
+        self.handoff = False
+        self.task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.pos >= len(self.clip.frames)
+
+
+class EchoSuppressor(FrameProcessor):
+    """Replaces mic audio with the residual after removing the bot's own TTS echo.
+
+    Sits right after transport.input(), so every STT service and barge-in detector
+    downstream gets the cleaned audio.
+    """
+
+    def __init__(self, room: RoomState):
+        super().__init__()
+        self.room = room
+
+    async def process_frame(self, frame: Frame, direction):
+        await super().process_frame(frame, direction)
+        echo = self.room.echo
+        if (
+            isinstance(frame, AudioRawFrame)
+            and frame.audio
+            and echo is not None
+            and getattr(frame, "sample_rate", 16000) == echo.sample_rate
+        ):
+            frame.audio = echo.process(frame.audio, _now())
+        await self.push_frame(frame, direction)
+
+
 class FallbackSTTProcessor(FrameProcessor):
     """Fallback STT processor that uses HTTP to call Parakeet service.
     
     Used when Faster Whisper is not available.
     """
-    def __init__(self):
+    def __init__(self, room: "RoomState", shared: "SharedResources"):
         super().__init__()
+        self.room = room
         self.buffer = bytearray()
         self._stt_target_chunk = 32000  # ~1 second of 16kHz audio
         self._stt_max_buffer = self._stt_target_chunk * 4
         self._empty_stt_count = 0
         self._interrupt_speech_s = 0.0
         self._last_interrupt_probe = 0.0
-        self.client = httpx.AsyncClient(timeout=30)
+        self._interim_task: asyncio.Task | None = None
+        self._interim_sent_at = 0
+        self.client = shared.http
+        self.detector = InterruptionDetector(
+            rms_threshold=_interrupt_rms_threshold(),
+            min_speech_s=_interrupt_min_speech_s(),
+            whisper_model=_INTERRUPT_WHISPER_MODEL,
+            min_words=max(1, _INTERRUPT_MIN_WORDS - 1),
+        )
+        # (committed_at, turn_id) of a barge-in not yet followed by a transcript.
+        self._pending_barge_in: tuple[float, int | None] | None = None
+
+    def _commit_interrupt(self, mode: str, **details) -> None:
+        turn_id = self.room.current_turn_id
+        self.room.interrupt_requested = True
+        self.room.bot_speaking = False
+        self.room.mark(turn_id, "interrupt_committed")
+        for key, value in details.items():
+            self.room.mark(turn_id, key, value)
+        self.room.event("interrupt_committed", mode=mode, **details)
+        self.room.turns.invalidate("barge_in")
+        self.buffer.clear()
+        self._interrupt_speech_s = 0.0
+        self.detector.reset()
+        self._pending_barge_in = (_now(), turn_id)
+
+    def _resolve_barge_in(self, confirmed: bool, turn_id: int | None = None) -> None:
+        """Score the last committed barge-in: a transcript followed, or it was a false positive."""
+        committed_at, interrupted_turn = self._pending_barge_in
+        self._pending_barge_in = None
+        self.detector.record_outcome(confirmed)
+        rate = self.detector.false_positive_rate
+        if confirmed:
+            self.room.mark(turn_id, "barge_in_of_turn", interrupted_turn)
+            self.room.mark(turn_id, "barge_in_to_transcript_s", round(_now() - committed_at, 4))
+            self.room.mark(turn_id, "interrupt_fp_rate", rate)
+        else:
+            self.room.event("interrupt_false_positive", turn_id=interrupted_turn, fp_rate=rate)
 
     async def process_frame(self, frame: Frame, direction):
         await super().process_frame(frame, direction)
 
-        global _bot_speaking, _last_tts_time, _interrupt_requested
+        # Already the echo residual when EchoSuppressor runs upstream.
+        audio = frame.audio if isinstance(frame, AudioRawFrame) else b""
 
         # Barge-in detection while bot is speaking
-        if isinstance(frame, AudioRawFrame) and _bot_speaking:
-            rms = audio_rms(frame.audio)
+        if isinstance(frame, AudioRawFrame) and self.room.bot_speaking:
+            rms = audio_rms(audio)
             frame_s = _frame_duration_s(frame)
             threshold = _interrupt_rms_threshold()
 
-            self.buffer.extend(frame.audio)
+            self.buffer.extend(audio)
             if len(self.buffer) > (16000 * 3):
                 del self.buffer[: len(self.buffer) - (16000 * 3)]
 
+            if _INTERRUPTION_MODE == "legacy" and rms >= _INTERRUPT_RMS_THRESHOLD:
+                self._commit_interrupt("legacy")
+                return
+
+            if _INTERRUPT_DETECTOR != "stt":
+                decision = await self.detector.update(audio)
+                if self.detector.onset is not None and "interrupt_requested" not in self.room.turn_metrics.get(
+                    self.room.current_turn_id, {}
+                ):
+                    self.room.mark(self.room.current_turn_id, "interrupt_requested")
+                if decision is not None and decision.commit:
+                    self._commit_interrupt(
+                        _INTERRUPTION_MODE,
+                        interrupt_detector=decision.path,
+                        interrupt_decision_ms=decision.decision_ms,
+                        interrupt_onset_to_decision_ms=decision.onset_to_decision_ms,
+                        interrupt_speech_share=decision.speech_share,
+                    )
+                elif decision is not None:
+                    self.room.event(
+                        "interrupt_rejected",
+                        path=decision.path,
+                        speech_share=decision.speech_share,
+                        words=decision.words,
+                    )
+                return
+
             if rms >= threshold:
                 self._interrupt_speech_s += frame_s
             else:
                 self._interrupt_speech_s = max(0.0, self._interrupt_speech_s - frame_s * 2.0)
 
-            if _INTERRUPTION_MODE == "legacy" and rms >= _INTERRUPT_RMS_THRESHOLD:
-                _interrupt_requested = True
-                _bot_speaking = False
-                _mark_turn(_CURRENT_TURN_ID, "interrupt_committed")
-                _event("interrupt_committed", mode="legacy")
-                self.buffer.clear()
-                self._interrupt_speech_s = 0.0
-                return
-
             if self._interrupt_speech_s >= _interrupt_min_speech_s():
                 now = _now()
                 if now - self._last_interrupt_probe >= _INTERRUPT_PROBE_COOLDOWN_S and len(self.buffer) >= 4096:
                     self._last_interrupt_probe = now
-                    _mark_turn(_CURRENT_TURN_ID, "interrupt_requested")
+                    self.room.mark(self.room.current_turn_id, "interrupt_requested")
                     text = await self._transcribe()
                     wc = _words(text)
                     should_commit = wc >= max(1, _INTERRUPT_MIN_WORDS) or _INTERRUPTION_MODE == "aggressive"
                     
                     if should_commit:
-                        _interrupt_requested = True
-                        _bot_speaking = False
-                        _mark_turn(_CURRENT_TURN_ID, "interrupt_committed")
-                        _mark_turn(_CURRENT_TURN_ID, "interrupt_text_preview", text[:120])
-                        _event("interrupt_committed", mode=_INTERRUPTION_MODE, words=wc)
-                        self.buffer.clear()
-                        self._interrupt_speech_s = 0.0
+                        self._commit_interrupt(
+                            _INTERRUPTION_MODE,
+                            interrupt_detector="stt",
+                            interrupt_decision_ms=round((_now() - now) * 1000.0, 1),
+                            interrupt_text_preview=text[:120],
+                            words=wc,
+                        )
             return
 
         # Cooldown after TTS
-        if time.time() - _last_tts_time < _TTS_COOLDOWN:
+        if self.room.echo is None and time.time() - self.room.last_tts_time < _TTS_COOLDOWN:
             self.buffer.clear()
             return
 
         if isinstance(frame, AudioRawFrame):
-            self.buffer.extend(frame.audio)
+            if self._pending_barge_in and _now() - self._pending_barge_in[0] > _INTERRUPT_FP_WINDOW_S:
+                self._resolve_barge_in(confirmed=False)
+            self.buffer.extend(audio)
+            self._maybe_emit_interim()
             if len(self.buffer) >= self._stt_target_chunk:
                 stt_start = _now()
                 text = await self._transcribe()
@@ -271,36 +701,62 @@ class FallbackSTTProcessor(FrameProcessor):
                 
                 if text and text.strip():
                     self._empty_stt_count = 0
-                    turn_id = _new_turn(text)
-                    _mark_turn(turn_id, "stt_start", stt_start)
-                    _mark_turn(turn_id, "stt_end", stt_end)
-                    _mark_turn(turn_id, "stt_text", text)
+                    turn_id = self.room.new_turn(text)
+                    self.room.mark(turn_id, "stt_start", stt_start)
+                    self.room.mark(turn_id, "stt_end", stt_end)
+                    self.room.mark(turn_id, "stt_text", text)
+                    if self._pending_barge_in:
+                        self._resolve_barge_in(confirmed=True, turn_id=turn_id)
                     duration = stt_end - stt_start
                     print(f"🎤 STT: {text} ({duration:.3f}s)")
                     await self.push_frame(
                         TranscriptionFrame(text=text, user_id="user", timestamp=0)
                     )
                     self.buffer.clear()
+                    self._interim_sent_at = 0
                 else:
                     self._empty_stt_count += 1
                     if len(self.buffer) >= self._stt_max_buffer or self._empty_stt_count >= 3:
                         self.buffer.clear()
                         self._empty_stt_count = 0
+                        self._interim_sent_at = 0
         else:
             await self.push_frame(frame, direction)
 
-    async def _transcribe(self):
+    def _maybe_emit_interim(self) -> None:
+        """Transcribe a snapshot in the background so the LLM can speculate early."""
+        if _STT_INTERIM_BYTES <= 0 or len(self.buffer) >= self._stt_target_chunk:
+            return
+        if len(self.buffer) - self._interim_sent_at < _STT_INTERIM_BYTES:
+            return
+        if self._interim_task is not None and not self._interim_task.done():
+            return
+        self._interim_sent_at = len(self.buffer)
+        snapshot = bytes(self.buffer)
+
+        async def _run():
+            text = await self._transcribe(snapshot)
+            if text and text.strip():
+                await self.push_frame(
+                    InterimTranscriptionFrame(text=text, user_id="user", timestamp=0)
+                )
+
+        self._interim_task = asyncio.create_task(_run())
+
+    async def _transcribe(self, audio: bytes | None = None):
         """Transcribe using fallback HTTP to Parakeet service."""
         import struct
+        pcm = bytes(self.buffer) if audio is None else audio
         hdr = struct.pack(
             "<4sI4s4sIHHIIHH4sI",
-            b"RIFF", len(self.buffer) + 36, b"WAVE", b"fmt ",
-            16, 1, 1, 16000, 32000, 2, 16, b"data", len(self.buffer)
+            b"RIFF", len(pcm) + 36, b"WAVE", b"fmt ",
+            16, 1, 1, 16000, 32000, 2, 16, b"data", len(pcm)
         )
         try:
             r = await self.client.post(
                 _FALLBACK_STT_URL,
-                files={"audio": ("a.wav", hdr + bytes(self.buffer), "audio/wav")},
+                files={"audio": ("a.wav", hdr + pcm, "audio/wav")},
+                timeout=30.0,
             )
             return r.json().get("text", "") if r.status_code == 200 else ""
         except Exception as e:
@@ -309,143 +765,402 @@ class FallbackSTTProcessor(FrameProcessor):
 
 
 class LLMProcessor(FrameProcessor):
-    def __init__(self):
+    def __init__(self, room: "RoomState", shared: "SharedResources"):
         super().__init__()
-        self.client = httpx.AsyncClient(timeout=120)
-        self._llm_url = os.getenv("KB_LLM_URL", "http://localhost:8100/chat")
+        self.room = room
+        self.client = shared.http
+        self._llm_url = os.getenv("KB_LLM_URL", "http://localhost:8100/voice/turn")
+        self._speculate_url = os.getenv(
+            "KB_LLM_SPECULATE_URL", "http://localhost:8100/voice/turn/speculate"
+        )
+        self._speculate_task: asyncio.Task | None = None
+
+    def _speculate(self, text: str) -> None:
+        """Fire-and-forget prefill of the core's prompt cache for an interim transcript."""
+        if self._speculate_task is not None and not self._speculate_task.done():
+            return
+
+        async def _run():
+            try:
+                r = await self.client.post(
+                    self._speculate_url,
+                    json=self.room.voice_turn_payload(text, self.room.current_turn_id),
+                    timeout=10.0,
+                )
+                if r.status_code == 200:
+                    self.room.event("llm_speculate", status=r.json().get("status"), chars=len(text))
+            except Exception as e:
+                print(f"[speculate] request failed: {e}")
+
+        self._speculate_task = asyncio.create_task(_run())
 
     async def process_frame(self, frame: Frame, direction):
         await super().process_frame(frame, direction)
-        if isinstance(frame, TranscriptionFrame):
-            turn_id = _CURRENT_TURN_ID
+        if isinstance(frame, InterimTranscriptionFrame):
+            # Interims only warm the core's prompt cache; TTS must never see them.
+            if _LLM_SPECULATIVE and frame.text and frame.text.strip():
+                self._speculate(frame.text.strip())
+        elif isinstance(frame, TranscriptionFrame):
+            turn_id = self.room.current_turn_id
             text = frame.text.strip()
             if len(text) < 2:
                 return
-            if turn_id is None or turn_id not in _TURN_METRICS:
-                turn_id = _new_turn(text)
-                _mark_turn(turn_id, "stt_text", text)
-            print(f"🧠 LLM processing: {text}")
-            try:
-                _mark_turn(turn_id, "llm_start")
-                start_time = time.time()
-                r = await self.client.post(self._llm_url, json={"message": text})
-                if r.status_code == 200:
-                    payload = r.json()
-                    resp = payload.get("text", "")
-                    backend_metrics = payload.get("metrics") if isinstance(payload, dict) else None
-                    if isinstance(backend_metrics, dict):
-                        llm_mode = backend_metrics.get("llm_mode")
-                        if llm_mode:
-                            _mark_turn(turn_id, "llm_mode", str(llm_mode))
-                        for k in ("llm_first_token_s", "llm_total_s"):
-                            v = backend_metrics.get(k)
-                            if v is None:
-                                continue
-                            try:
-                                _mark_turn(turn_id, f"{k}_backend", round(float(v), 4))
-                            except (TypeError, ValueError):
-                                pass
-                    _mark_turn(turn_id, "llm_end")
-                    _mark_turn(turn_id, "assistant_text_preview", resp[:300])
-                    duration = time.time() - start_time
-                    print(f"🤖 Knight: {resp} ({duration:.3f}s)")
-                    await self.push_frame(TextFrame(text=resp))
-            except Exception as e:
-                _mark_turn(turn_id, "llm_error", str(e))
-                print(f"LLM Error: {e}")
-                await self.push_frame(TextFrame(text=f"Error: {e}"))
+            # FallbackSTT opens the turn for its own transcript; every other utterance
+            # (e.g. from FasterWhisper) gets a fresh turn instead of reusing the last one.
+            m = self.room.turn_metrics.get(turn_id) if turn_id is not None else None
+            if m is None or str(m.get("stt_text") or "").strip() != text or "llm_start" in m:
+                turn_id = self.room.new_turn(text)
+                self.room.mark(turn_id, "stt_text", text)
+            # Don't make the new utterance wait behind the previous reply.
+            generation = self.room.turns.begin()
+            self.room.mark(turn_id, "generation", generation)
+            task = asyncio.create_task(self._respond(text, turn_id, generation))
+            self.room.turns.track(task, generation, turn_id, "llm")
+            if _ACK_ENABLED:
+                predicted = self.room.predicted_first_audio_s()
+                self.room.mark(turn_id, "ack_predicted_first_audio_s", round(predicted, 4))
+                if predicted >= _ACK_THRESHOLD_S:
+                    await self.push_frame(
+                        AckRequestFrame(turn_id=turn_id, generation=generation, predicted_s=predicted)
+                    )
         else:
             await self.push_frame(frame, direction)
 
+    async def _respond(self, text: str, turn_id: int, generation: int) -> None:
+        print(f"🧠 LLM processing: {text}")
+        try:
+            self.room.mark(turn_id, "llm_start")
+            start_time = time.time()
+            request_payload = self.room.voice_turn_payload(text, turn_id)
+            if self.room.last_turn_report:
+                request_payload["last_turn"] = self.room.last_turn_report
+                self.room.last_turn_report = None
+            r = await self.client.post(self._llm_url, json=request_payload)
+            if r.status_code == 200:
+                payload = r.json()
+                resp = payload.get("text", "")
+                if payload.get("model"):
+                    self.room.mark(turn_id, "llm_model", str(payload["model"]))
+                profile_meta = payload.get("voice_profile")
+                if isinstance(profile_meta, dict) and profile_meta.get("selected"):
+                    self.room.mark(turn_id, "voice_profile", str(profile_meta["selected"]))
+                backend_metrics = payload.get("metrics") if isinstance(payload, dict) else None
+                if isinstance(backend_metrics, dict):
+                    llm_mode = backend_metrics.get("llm_mode")
+                    if llm_mode:
+                        self.room.mark(turn_id, "llm_mode", str(llm_mode))
+                    speculation = backend_metrics.get("speculation")
+                    if speculation:
+                        self.room.mark(turn_id, "llm_speculation", str(speculation))
+                    for k in ("llm_first_token_s", "llm_total_s"):
+                        v = backend_metrics.get(k)
+                        if v is None:
+                            continue
+                        try:
+                            self.room.mark(turn_id, f"{k}_backend", round(float(v), 4))
+                        except (TypeError, ValueError):
+                            pass
+                self.room.mark(turn_id, "llm_end")
+                self.room.mark(turn_id, "assistant_text_preview", resp[:300])
+                duration = time.time() - start_time
+                print(f"🤖 Knight: {resp} ({duration:.3f}s)")
+                await self.push_frame(ReplyTextFrame(text=resp, turn_id=turn_id, generation=generation))
+        except asyncio.CancelledError:
+            self.room.mark(turn_id, "llm_cancelled")
+            self.room.flush(turn_id, status="superseded")
+            raise
+        except Exception as e:
+            self.room.mark(turn_id, "llm_error", str(e))
+            print(f"LLM Error: {e}")
+            await self.push_frame(
+                ReplyTextFrame(text=f"Error: {e}", turn_id=turn_id, generation=generation)
+            )
+
 
 class TTSProcessor(FrameProcessor):
-    def __init__(self):
+    def __init__(self, room: "RoomState", shared: "SharedResources"):
         super().__init__()
-        self.client = httpx.AsyncClient(timeout=60)
-        self._tts_url = os.getenv("KB_TTS_URL", "http://localhost:8060/synthesize")
+        self.room = room
+        self.client = shared.http
+        self.acks = shared.acks
+        self._ack: "_AckPlayback | None" = None
+        self._speak_task: asyncio.Task | None = None
 
     async def process_frame(self, frame: Frame, direction):
         await super().process_frame(frame, direction)
-        if isinstance(frame, TextFrame) and frame.text:
-            global _bot_speaking, _last_tts_time, _interrupt_requested
-            turn_id = _CURRENT_TURN_ID
-
-            print("🔊 TTS synthesizing...")
-            _interrupt_requested = False
-            _bot_speaking = True
-            _mark_turn(turn_id, "tts_start")
-            first_audio_pushed = False
+        if isinstance(frame, AckRequestFrame):
+            if self.room.turns.is_current(frame.generation):
+                self._start_ack(frame.turn_id, frame.generation)
+        elif isinstance(frame, ReplyTextFrame) and frame.text:
+            turn_id = frame.turn_id or self.room.current_turn_id
+            generation = frame.generation
+            if not self.room.turns.is_current(generation):
+                self.room.turns.record_discard(turn_id, "tts_synth", "superseded")
+                self.room.flush(turn_id, status="superseded")
+                return
+            if self._speak_task is not None and not self._speak_task.done():
+                self._speak_task.cancel()
+            generation = self.room.turns.generation if generation is None else generation
+            self._speak_task = asyncio.create_task(self._speak(frame.text, turn_id))
+            self.room.turns.track(self._speak_task, generation, turn_id, "tts_synth")
+        else:
+            await self.push_frame(frame, direction)
 
-            try:
-                start_time = time.time()
-                r = await self.client.post(
-                    self._tts_url,
-                    json={"text": frame.text, "exaggeration": 0.5},
+    def _start_ack(self, turn_id: int | None, generation: int | None) -> None:
+        clip = self.acks.pick(_TTS_VOICE_ID or "default")
+        if clip is None:
+            self.room.mark(turn_id, "ack_skipped", "bank_not_ready")
+            return
+        if self._ack is not None and self._ack.task is not None:
+            self._ack.task.cancel()
+        self._ack = _AckPlayback(clip, turn_id)
+        self._ack.task = asyncio.create_task(self._play_ack(self._ack))
+        self.room.turns.track(self._ack.task, generation, turn_id, "ack")
+        self.room.mark(turn_id, "ack_clip", clip.phrase)
+
+    async def _play_ack(self, ack: _AckPlayback) -> None:
+        frames = ack.clip.frames
+        echo = self.room.echo
+        ref_step = (echo.sample_rate * frames.frame_ms // 1000) if echo is not None else 0
+        self.room.bot_speaking = True
+        try:
+            while not ack.finished:
+                await ack.scheduler.wait_for_slot(frames.frame_duration_s)
+                if self.room.interrupt_requested:
+                    await self._flush_playout(ack.turn_id, ack.scheduler)
+                    return
+                if ack.pos == 0:
+                    self.room.mark(ack.turn_id, "ack_first_audio")
+                if ref_step:
+                    echo.push_reference(
+                        ack.clip.reference[ack.pos * ref_step : (ack.pos + 1) * ref_step],
+                        _now() + ack.scheduler.pending_s(),
+                    )
+                await self.push_frame(
+                    AudioRawFrame(
+                        audio=frames.frames[ack.pos],
+                        sample_rate=frames.sample_rate,
+                        num_channels=frames.num_channels,
+                    )
                 )
-                if r.status_code == 200:
-                    # Skip WAV header (44 bytes)
-                    audio_data = r.content[44:]
-                    duration = time.time() - start_time
-                    print(f"🔊 TTS Audio Ready ({len(audio_data)} bytes) ({duration:.3f}s)")
-
-                    # Stream in realtime-sized chunks for barge-in
-                    sample_rate = 22050
-                    bytes_per_sample = 2
-                    chunk_ms = _TTS_CHUNK_MS
-                    chunk_size = int(sample_rate * (chunk_ms / 1000.0) * bytes_per_sample)
-
-                    for i in range(0, len(audio_data), chunk_size):
-                        if _interrupt_requested:
-                            print("[barge-in] TTS playback interrupted")
-                            _mark_turn(turn_id, "tts_interrupted", True)
-                            _flush_turn(turn_id, status="interrupted")
-                            break
-
-                        chunk = audio_data[i : i + chunk_size]
-                        if not first_audio_pushed:
-                            _mark_turn(turn_id, "tts_first_audio")
-                            first_audio_pushed = True
-                        await self.push_frame(
-                            AudioRawFrame(audio=chunk, sample_rate=sample_rate, num_channels=1)
+                ack.scheduler.mark_pushed(frames.frame_duration_s)
+                ack.pos += 1
+            ack.ended_at = _now() + ack.scheduler.pending_s()
+        except asyncio.CancelledError:
+            if not ack.handoff and ack.pos:
+                # Superseded or barged in before the reply arrived.
+                await self._flush_playout(ack.turn_id, ack.scheduler)
+            raise
+        finally:
+            if not ack.handoff and (self._speak_task is None or self._speak_task.done()):
+                self.room.bot_speaking = False
+                self.room.last_tts_time = time.time()
+
+    async def _take_over_ack(
+        self, ack: _AckPlayback, frames: OutputFrames
+    ) -> tuple[OutputFrames, PlayoutScheduler | None]:
+        """Stop the ack clip and crossfade its unplayed tail into the reply's first segment.
+
+        An ack that never got a frame out is dropped instead, so the reply starts clean.
+        """
+        ack.handoff = True
+        if ack.task is not None and not ack.task.done():
+            ack.task.cancel()
+            await asyncio.gather(ack.task, return_exceptions=True)
+        if ack.finished:
+            gap_s = max(0.0, _now() - ack.ended_at) if ack.ended_at is not None else None
+            self.room.mark(ack.turn_id, "ack_crossfaded", False)
+            if gap_s is not None:
+                self.room.mark(ack.turn_id, "ack_gap_ms", round(gap_s * 1000.0, 1))
+            return frames, None
+        if ack.pos == 0:
+            # The reply beat the clip's first frame: play the reply as synthesized.
+            self.room.mark(ack.turn_id, "ack_skipped", "reply_first")
+            return frames, None
+        tail = ack.clip.tail(ack.pos, int(frames.sample_rate * _ACK_CROSSFADE_MS / 1000.0))
+        self.room.mark(ack.turn_id, "ack_crossfaded", True)
+        clip_frames = ack.clip.frames
+        self.room.mark(ack.turn_id, "ack_played_ms", round(ack.pos * clip_frames.frame_ms, 1))
+        self.room.mark(ack.turn_id, "ack_cut_ms", round((len(clip_frames) - ack.pos) * clip_frames.frame_ms, 1))
+        # Keep the ack's pacing so the reply continues right after the audio already queued.
+        return crossfade_into(tail, frames), ack.scheduler
+
+    async def _produce(self, segments: list[str], queue: asyncio.Queue, turn_id: int | None) -> None:
+        """Synthesize segments in order, at most `_TTS_LOOKAHEAD` ahead of playout."""
+        try:
+            for idx, segment in enumerate(segments):
+                started = _now()
+                frames, sample_rate = await synthesize_segment(self.client, segment)
+                reference = None
+                if self.room.echo is not None:
+                    reference = await asyncio.to_thread(
+                        lambda: resample(
+                            pcm16_to_float(b"".join(frames.frames)), frames.sample_rate, self.room.echo.sample_rate
                         )
+                    )
+                synth_s = _now() - started
+                print(
+                    f"🔊 TTS segment {idx + 1}/{len(segments)} ready "
+                    f"({len(frames)}x{_TTS_CHUNK_MS}ms @ {_TTS_OUTPUT_RATE}Hz) ({synth_s:.3f}s)"
+                )
+                if idx == 0:
+                    self.room.mark(turn_id, "tts_sample_rate", sample_rate)
+                    self.room.mark(turn_id, "tts_resampled_locally", sample_rate != _TTS_OUTPUT_RATE)
+                await queue.put((frames, synth_s, reference))
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+    async def _speak(self, text: str, turn_id: int | None) -> None:
+        print("🔊 TTS synthesizing...")
+        self.room.interrupt_requested = False
+        self.room.bot_speaking = True
+        self.room.mark(turn_id, "tts_start")
+        first_audio_pushed = False
+        scheduler = PlayoutScheduler()
+        status = "completed"
+        segments = split_tts_segments(text) or [text]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_TTS_LOOKAHEAD)
+        producer = asyncio.create_task(self._produce(segments, queue, turn_id))
+        played = 0
+        gaps: list[float] = []
+        synth_max_s = 0.0
+        audio_end: float | None = None
+        ack = self._ack if self._ack is not None and self._ack.turn_id == turn_id else None
+        self._ack = None
 
-                        chunk_duration_s = len(chunk) / float(sample_rate * bytes_per_sample)
-                        await asyncio.sleep(max(0.0, chunk_duration_s * 0.9))
-            except Exception as e:
-                _mark_turn(turn_id, "tts_error", str(e))
-                print(f"TTS Error: {e}")
-            finally:
-                _mark_turn(turn_id, "tts_end")
-                _flush_turn(turn_id, status="completed")
-                _bot_speaking = False
-                _last_tts_time = time.time()
+        try:
+            while status == "completed":
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                frames, synth_s, reference = item
+                if ack is not None:
+                    frames, ack_scheduler = await self._take_over_ack(ack, frames)
+                    scheduler = ack_scheduler or scheduler
+                    ack = None
+                ref_step = (self.room.echo.sample_rate * frames.frame_ms // 1000) if reference is not None else 0
+                synth_max_s = max(synth_max_s, synth_s)
+                if audio_end is not None:
+                    # Silence between the end of the previous sentence and this one being ready.
+                    gaps.append(max(0.0, _now() - audio_end))
+
+                # Stream in realtime-sized chunks for barge-in
+                self.room.turns.set_stage("tts_playout")
+                for idx, chunk in enumerate(frames):
+                    await scheduler.wait_for_slot(frames.frame_duration_s)
+                    if self.room.interrupt_requested:
+                        status = "interrupted"
+                        await self._flush_playout(turn_id, scheduler)
+                        break
+
+                    if not first_audio_pushed:
+                        self.room.mark(turn_id, "tts_first_audio")
+                        first_audio_pushed = True
+                    if ref_step:
+                        # Starts playing once everything already queued downstream has played.
+                        self.room.echo.push_reference(
+                            reference[idx * ref_step : (idx + 1) * ref_step], _now() + scheduler.pending_s()
+                        )
+                    await self.push_frame(
+                        AudioRawFrame(
+                            audio=chunk,
+                            sample_rate=frames.sample_rate,
+                            num_channels=frames.num_channels,
+                        )
+                    )
+                    scheduler.mark_pushed(frames.frame_duration_s)
+                else:
+                    played += 1
+                    audio_end = _now() + scheduler.pending_s()
+
+            for key, value in scheduler.report().items():
+                self.room.mark(turn_id, key, value)
+        except asyncio.CancelledError:
+            if ack is not None and ack.task is not None:
+                ack.task.cancel()
+            reason = self.room.turn_metrics.get(turn_id, {}).get("discarded_reason")
+            status = "interrupted" if reason == "barge_in" else "superseded"
+            if first_audio_pushed:
+                await self._flush_playout(turn_id, scheduler)
+            raise
+        except Exception as e:
+            if ack is not None and ack.task is not None:
+                ack.task.cancel()
+            self.room.mark(turn_id, "tts_error", str(e))
+            print(f"TTS Error: {e}")
+        finally:
+            # Interrupts and errors drop the lookahead queue along with the pending synthesis.
+            producer.cancel()
+            self.room.mark(turn_id, "tts_segments", len(segments))
+            self.room.mark(turn_id, "tts_segments_played", played)
+            self.room.mark(turn_id, "tts_synth_max_s", round(synth_max_s, 4))
+            self.room.mark(turn_id, "tts_gap_total_ms", round(sum(gaps) * 1000.0, 1))
+            self.room.mark(turn_id, "tts_gap_max_ms", round(max(gaps, default=0.0) * 1000.0, 1))
+            if self.room.echo is not None:
+                for key, value in self.room.echo.report().items():
+                    self.room.mark(turn_id, key, value)
+            self.room.mark(turn_id, "tts_end")
+            self.room.flush(turn_id, status=status)
+            if self._speak_task is asyncio.current_task():
+                self.room.bot_speaking = False
+                self.room.last_tts_time = time.time()
+
+    async def _flush_playout(self, turn_id: int | None, scheduler: PlayoutScheduler) -> None:
+        """Drop queued-but-unplayed audio and record how long the bot kept talking."""
+        detected = _now()
+        unplayed_s = scheduler.pending_s()
+        if _FlushAudioFrame is not None and unplayed_s > 0:
+            await self.push_frame(_FlushAudioFrame())
+            silence_at = detected
+            if self.room.echo is not None:
+                self.room.echo.drop_reference_after(detected)
         else:
-            await self.push_frame(frame, direction)
+            silence_at = detected + unplayed_s
 
+        print(f"[barge-in] TTS playback interrupted (flushed {unplayed_s * 1000.0:.0f}ms queued audio)")
+        self.room.mark(turn_id, "tts_interrupted", True)
+        self.room.mark(turn_id, "playout_flushed_ms", round(unplayed_s * 1000.0, 1))
+        committed = self.room.turn_metrics.get(turn_id, {}).get("interrupt_committed")
+        if isinstance(committed, (int, float)):
+            self.room.mark(turn_id, "interrupt_to_silence_s", round(silence_at - float(committed), 4))
+        for key, value in scheduler.report().items():
+            self.room.mark(turn_id, key, value)
 
-async def run_pipeline():
-    global _bot_speaking, _interrupt_requested
-    
-    print("🚀 Starting KnightBot Pipecat Agent with Faster Whisper STT...")
-    print(f"⚙️ Config: mode={_INTERRUPTION_MODE}, interrupt_rms={_INTERRUPT_RMS_THRESHOLD}")
-    print(f"⚙️ STT: {'Faster Whisper ' + _FASTER_WHISPER_MODEL if _faster_whisper_available else 'Fallback HTTP (Parakeet)'}")
-    print(f"⚙️ Metrics: {_VOICE_METRICS_ENABLED}")
 
-    # Connect to LiveKit
-    print(f"🔌 Connecting to LiveKit at {LIVEKIT_URL}...")
+def _room_token(room_name: str) -> str:
     from livekit import api
 
     grant = api.VideoGrants(
-        room_join=True, room="knight-room", can_publish=True, can_subscribe=True
+        room_join=True, room=room_name, can_publish=True, can_subscribe=True
     )
-    token = (
+    return (
         api.AccessToken(API_KEY, API_SECRET)
         .with_grants(grant)
-        .with_identity("knight-bot")
+        .with_identity(BOT_IDENTITY)
         .with_name("KnightBot")
         .to_jwt()
     )
 
+
+def _create_stt(room: RoomState, shared: SharedResources) -> FrameProcessor:
+    if _faster_whisper_available:
+        # Every room gets its own service; the Whisper model itself is loaded once per process.
+        return create_faster_whisper_stt(
+            model=_FASTER_WHISPER_MODEL,
+            device=_FASTER_WHISPER_DEVICE,
+        )
+    return FallbackSTTProcessor(room, shared)
+
+
+async def run_room(room_name: str, shared: SharedResources) -> None:
+    """Run one pipeline in `room_name` until cancelled or the transport ends."""
+    room = RoomState(room_name, shared.metrics)
+    print(f"🔌 [{room_name}] Connecting to LiveKit at {LIVEKIT_URL}...")
+
     # Setup VAD
     vad = None
     if SileroVADAnalyzer is not None:
@@ -453,13 +1168,13 @@ async def run_pipeline():
             sample_rate=16000,
             params=VADParams(confidence=0.6, start_silence_timeout=0.5),
         )
-        print("✓ Silero VAD loaded")
     else:
         print(f"[warn] Silero VAD unavailable: {_silero_import_error}")
 
     livekit_params = {
         "audio_in_enabled": True,
         "audio_out_enabled": True,
+        "audio_out_sample_rate": _TTS_OUTPUT_RATE,
         "vad_enabled": bool(vad),
     }
     if vad is not None:
@@ -467,42 +1182,53 @@ async def run_pipeline():
 
     transport = LiveKitTransport(
         url=LIVEKIT_URL,
-        token=token,
-        room_name="knight-room",
+        token=_room_token(room_name),
+        room_name=room_name,
         params=LiveKitParams(**livekit_params),
     )
 
-    # Build pipeline based on STT availability
-    pipeline_components = [
-        transport.input(),  # Get audio from LiveKit
-        LLMProcessor(),     # Generate text
-        TTSProcessor(),     # Synthesize audio
-        transport.output(), # Send audio back to LiveKit
+    processors = [transport.input()]          # Get audio from LiveKit
+    if room.echo is not None:
+        processors.append(EchoSuppressor(room))   # Remove the bot's own playback
+    processors += [
+        _create_stt(room, shared),      # Transcribe
+        LLMProcessor(room, shared),     # Generate text
+        TTSProcessor(room, shared),     # Synthesize audio
+        transport.output(),             # Send audio back to LiveKit
     ]
+    pipeline = Pipeline(processors)
+    task = PipelineTask(pipeline, params=PipelineParams(allow_interruptions=True))
 
-    if _faster_whisper_available:
-        # Use native Faster Whisper STT service (our custom implementation)
-        print(f"📦 Loading Faster Whisper model: {_FASTER_WHISPER_MODEL} on {_FASTER_WHISPER_DEVICE}")
-        stt_service = create_faster_whisper_stt(
-            model=_FASTER_WHISPER_MODEL,
-            device=_FASTER_WHISPER_DEVICE,
-        )
-        # Insert STT service after transport input
-        pipeline_components.insert(1, stt_service)
-        print("✓ Pipeline: LiveKit → Faster Whisper → LLM → TTS → LiveKit")
-    else:
-        # Use fallback HTTP STT processor
-        print("✓ Pipeline: LiveKit → FallbackSTT → LLM → TTS → LiveKit")
-        pipeline_components.insert(1, FallbackSTTProcessor())
+    if _ACK_ENABLED:
+        shared.acks.warm(_TTS_VOICE_ID or "default", lambda text: synthesize_segment(shared.http, text))
 
-    # Create pipeline
-    pipeline = Pipeline(pipeline_components)
+    print(f"🎯 [{room_name}] Starting pipeline (session {room.session_id})")
+    from pipecat.pipeline.base_task import PipelineTaskParams
+    try:
+        await task.run(PipelineTaskParams(loop=asyncio.get_running_loop()))
+    except asyncio.CancelledError:
+        await task.cancel()
+        raise
+    finally:
+        room.turns.cancel_all("room_closed")
+        for turn_id in list(room.turn_metrics):
+            room.flush(turn_id, status="abandoned")
+        print(f"👋 [{room_name}] Pipeline stopped")
 
-    task = PipelineTask(pipeline, params=PipelineParams(allow_interruptions=True))
 
-    print("🎯 Starting pipeline... (Press Ctrl+C to stop)")
-    from pipecat.pipeline.base_task import PipelineTaskParams
-    await task.run(PipelineTaskParams(loop=asyncio.get_event_loop()))
+async def run_pipeline():
+    """Single-room mode: join KB_ROOM_NAME. See room_worker.py for multi-room serving."""
+    print("🚀 Starting KnightBot Pipecat Agent with Faster Whisper STT...")
+    print(f"⚙️ Config: mode={_INTERRUPTION_MODE}, interrupt_rms={_INTERRUPT_RMS_THRESHOLD}")
+    print(f"⚙️ STT: {'Faster Whisper ' + _FASTER_WHISPER_MODEL if _faster_whisper_available else 'Fallback HTTP (Parakeet)'}")
+    print(f"⚙️ Metrics: {_VOICE_METRICS_ENABLED}")
+
+    shared = SharedResources()
+    try:
+        print("🎯 Starting pipeline... (Press Ctrl+C to stop)")
+        await run_room(_ROOM_NAME, shared)
+    finally:
+        await shared.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+"""KnightBot room-dispatch worker: one voice pipeline per LiveKit room.
+
+The dispatcher polls LiveKit for rooms whose name starts with KB_ROOM_PREFIX and that
+have a human participant, and assigns each room to the least-loaded worker process.
+Every worker process runs up to KB_ROOMS_PER_PROCESS pipelines on one event loop.
+Each pipeline has its own RoomState (turns, barge-in flags, metrics), while the HTTP
+client and the Faster Whisper model are shared by all rooms in that process.
+
+Rooms are released when only the bot is left in them or when LiveKit closes them.
+A worker process that dies is respawned, and its rooms are reassigned on the next poll.
+
+Usage:
+    python pipecat/room_worker.py
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))  # pipecat/ subfolder
+
+_ROOM_PREFIX = os.getenv("KB_ROOM_PREFIX", "knight-")
+_WORKER_PROCESSES = max(1, int(os.getenv("KB_WORKER_PROCESSES", "2")))
+_ROOMS_PER_PROCESS = max(1, int(os.getenv("KB_ROOMS_PER_PROCESS", "8")))
+_DISPATCH_POLL_S = float(os.getenv("KB_DISPATCH_POLL_S", "3"))
+
+# Same settings as pipeline.py, read here so the dispatcher never imports the pipeline
+# (and with it pipecat, torch and Whisper).
+_LIVEKIT_URL = os.getenv("KB_LIVEKIT_URL", "ws://localhost:7880")
+_API_KEY = os.getenv("KB_LIVEKIT_KEY", "devkey")
+_API_SECRET = os.getenv("KB_LIVEKIT_SECRET", "secret")
+_BOT_IDENTITY = "knight-bot"  # pipeline.BOT_IDENTITY
+
+
+def _worker_main(index: int, commands: mp.Queue, events: mp.Queue) -> None:
+    asyncio.run(_worker_loop(index, commands, events))
+
+
+async def _worker_loop(index: int, commands: mp.Queue, events: mp.Queue) -> None:
+    import pipeline
+
+    shared = pipeline.SharedResources(metrics_port_offset=index)
+    rooms: dict[str, asyncio.Task] = {}
+
+    def _on_done(room_name: str, task: asyncio.Task) -> None:
+        if rooms.get(room_name) is task:
+            rooms.pop(room_name, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[worker-{index}] room {room_name} failed: {task.exception()}")
+        events.put(("left", index, room_name))
+
+    print(f"[worker-{index}] ready (limit {_ROOMS_PER_PROCESS} rooms)")
+    try:
+        while True:
+            cmd, room_name = await asyncio.to_thread(commands.get)
+            if cmd == "stop":
+                break
+            if cmd == "join" and room_name not in rooms:
+                task = asyncio.create_task(pipeline.run_room(room_name, shared))
+                task.add_done_callback(lambda t, r=room_name: _on_done(r, t))
+                rooms[room_name] = task
+            elif cmd == "leave" and room_name in rooms:
+                rooms[room_name].cancel()
+    finally:
+        for task in rooms.values():
+            task.cancel()
+        await asyncio.gather(*rooms.values(), return_exceptions=True)
+        await shared.aclose()
+
+
+class _Worker:
+    def __init__(self, ctx, index: int, events: mp.Queue):
+        self.index = index
+        self.commands: mp.Queue = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main, args=(index, self.commands, events), name=f"knight-room-worker-{index}", daemon=True
+        )
+        self.rooms: set[str] = set()
+        self.process.start()
+
+
+class RoomDispatcher:
+    """Assigns LiveKit rooms to worker processes, respecting a per-process room limit."""
+
+    def __init__(self, processes: int = _WORKER_PROCESSES, rooms_per_process: int = _ROOMS_PER_PROCESS):
+        self.rooms_per_process = rooms_per_process
+        self._ctx = mp.get_context("spawn")
+        self._events: mp.Queue = self._ctx.Queue()
+        self.workers = [_Worker(self._ctx, i, self._events) for i in range(processes)]
+        self._full_warned: set[str] = set()
+
+    @property
+    def assigned(self) -> dict[str, int]:
+        return {room: w.index for w in self.workers for room in w.rooms}
+
+    def _drain_events(self) -> None:
+        while True:
+            try:
+                kind, index, room_name = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "left":
+                self.workers[index].rooms.discard(room_name)
+                print(f"[dispatch] {room_name} released by worker-{index}")
+
+    def _respawn_dead(self) -> None:
+        for i, w in enumerate(self.workers):
+            if not w.process.is_alive():
+                print(f"[dispatch] worker-{i} exited ({w.process.exitcode}); respawning, dropping {sorted(w.rooms)}")
+                self.workers[i] = _Worker(self._ctx, i, self._events)
+
+    def join(self, room_name: str) -> bool:
+        candidates = [w for w in self.workers if len(w.rooms) < self.rooms_per_process]
+        if not candidates:
+            if room_name not in self._full_warned:
+                print(f"[dispatch] no capacity for {room_name} ({len(self.workers)}x{self.rooms_per_process} rooms busy)")
+                self._full_warned.add(room_name)
+            return False
+        worker = min(candidates, key=lambda w: len(w.rooms))
+        worker.rooms.add(room_name)
+        worker.commands.put(("join", room_name))
+        self._full_warned.discard(room_name)
+        print(f"[dispatch] {room_name} -> worker-{worker.index} ({len(worker.rooms)}/{self.rooms_per_process})")
+        return True
+
+    def leave(self, room_name: str) -> None:
+        for w in self.workers:
+            if room_name in w.rooms:
+                w.commands.put(("leave", room_name))
+
+    async def _wanted_rooms(self, lkapi) -> set[str]:
+        from livekit import api
+
+        resp = await lkapi.room.list_rooms(api.ListRoomsRequest())
+        assigned = self.assigned
+        wanted = set()
+        for room in resp.rooms:
+            if not room.name.startswith(_ROOM_PREFIX) or room.num_participants == 0:
+                continue
+            if room.name in assigned and room.num_participants <= 1:
+                # Either the bot is alone or it has not joined yet; check identities.
+                parts = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room.name))
+                if not any(p.identity != _BOT_IDENTITY for p in parts.participants):
+                    continue
+            wanted.add(room.name)
+        return wanted
+
+    async def run(self) -> None:
+        from livekit import api
+
+        url = _LIVEKIT_URL.replace("wss://", "https://", 1).replace("ws://", "http://", 1)
+        lkapi = api.LiveKitAPI(url, _API_KEY, _API_SECRET)
+        print(
+            f"🚀 Room dispatcher: {len(self.workers)} processes x {self.rooms_per_process} rooms, "
+            f"prefix '{_ROOM_PREFIX}', LiveKit {url}"
+        )
+        try:
+            while True:
+                self._drain_events()
+                self._respawn_dead()
+                try:
+                    wanted = await self._wanted_rooms(lkapi)
+                except Exception as e:
+                    print(f"[dispatch] LiveKit room listing failed: {e}")
+                else:
+                    assigned = self.assigned
+                    for room_name in sorted(wanted - assigned.keys()):
+                        self.join(room_name)
+                    for room_name in assigned.keys() - wanted:
+                        self.leave(room_name)
+                await asyncio.sleep(_DISPATCH_POLL_S)
+        finally:
+            await lkapi.aclose()
+            self.stop()
+
+    def stop(self) -> None:
+        for w in self.workers:
+            w.commands.put(("stop", None))
+        for w in self.workers:
+            w.process.join(timeout=10)
+            if w.process.is_alive():
+                w.process.terminate()
+
+
+if __name__ == "__main__":
+    dispatcher = RoomDispatcher()
+    try:
+        asyncio.run(dispatcher.run())
+    except KeyboardInterrupt:
+        print("🛑 Room dispatcher stopped")
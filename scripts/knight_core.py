@@ -6,11 +6,17 @@ from pydantic import BaseModel
 from pathlib import Path
 from datetime import datetime
 import httpx, os, json, time, asyncio, re
+import hashlib
 import sqlite3
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Awaitable, Callable
 from contextlib import asynccontextmanager
 from livekit import api
 
+from lm_perf import LMPerfStore
+import memory_maintenance
+from lm_router import LMAdmissionRejected, LMBackendError, LMBackendPool
+
 # Load env
 from dotenv import load_dotenv
 
@@ -25,8 +31,16 @@ async def app_lifespan(_: FastAPI):
     print(f"[startup] LM request timeout: {float(CONFIG.get('lm_request_timeout_s', 180.0)):.0f}s")
     print(f"[startup] LM fallback model: {CONFIG.get('lm_fallback_model_id', 'n/a')}")
     print(f"[startup] LM forced non-stream models: {nonstream_text}")
+    print(f"[startup] LM backends ({CONFIG['lm_routing']}): {', '.join(CONFIG['lm_backends'])}")
+    if len(LM_POOL.backends) > 1:
+        asyncio.create_task(LM_POOL.run_probe_loop())
+    asyncio.create_task(run_mem0_probe_loop())
+    if CONFIG["memory_maintenance_interval_h"] > 0:
+        asyncio.create_task(run_memory_maintenance_loop())
     asyncio.create_task(warmup_lm_model())
     yield
+    if LM_PERF.dirty:
+        LM_PERF.save()
 
 
 app = FastAPI(title="KnightBot API", lifespan=app_lifespan)
@@ -40,6 +54,22 @@ app.add_middleware(
 CONFIG = {
     "lm_studio": os.getenv("LM_STUDIO_URL", "http://192.168.68.111:1234/v1"),
     "mem0": os.getenv("MEM0_URL", "http://localhost:8050"),
+    "mem0_probe_interval_s": float(os.getenv("MEM0_PROBE_INTERVAL_S", "30")),
+    "mem0_backoff_min_s": float(os.getenv("MEM0_BACKOFF_MIN_S", "1")),
+    "mem0_backoff_max_s": float(os.getenv("MEM0_BACKOFF_MAX_S", "60")),
+    "mem0_failure_threshold": int(os.getenv("MEM0_FAILURE_THRESHOLD", "2")),
+    "recall_cache_ttl_s": float(os.getenv("RECALL_CACHE_TTL_S", "30")),
+    "recall_cache_max_entries": int(os.getenv("RECALL_CACHE_MAX_ENTRIES", "128")),
+    # Background memory maintenance (dedupe, retention, VACUUM/ANALYZE); 0 disables.
+    "memory_maintenance_interval_h": float(os.getenv("MEMORY_MAINTENANCE_INTERVAL_H", "24")),
+    "memory_maintenance_mem0": os.getenv("MEMORY_MAINTENANCE_MEM0", "1").strip().lower()
+    in {"1", "true", "yes", "on"},
+    "memory_rules": {
+        "dedupe_threshold": float(os.getenv("MEMORY_DEDUPE_THRESHOLD", "0.85")),
+        "retention_days": float(os.getenv("MEMORY_RETENTION_DAYS", "90")),
+        "low_value_days": float(os.getenv("MEMORY_LOW_VALUE_DAYS", "7")),
+        "keep_latest": int(os.getenv("MEMORY_KEEP_LATEST", "200")),
+    },
     "tts": os.getenv("TTS_URL", "http://localhost:8060"),
     "user_id": os.getenv("USER_ID", "knight_user"),
     "temperature": float(os.getenv("TEMPERATURE", "0.7")),
@@ -60,9 +90,25 @@ CONFIG = {
     "voice_latency_target_s": float(os.getenv("VOICE_LATENCY_TARGET_S", "8.0")),
     "voice_latency_critical_s": float(os.getenv("VOICE_LATENCY_CRITICAL_S", "14.0")),
     "voice_latency_fast_s": float(os.getenv("VOICE_LATENCY_FAST_S", "4.0")),
+    # Profile planning: fit the target at this percentile of per-(model, profile) history.
+    "voice_latency_percentile": float(os.getenv("VOICE_LATENCY_PERCENTILE", "0.9")),
+    "voice_min_tokens": int(os.getenv("VOICE_MIN_TOKENS", "48")),
+    "voice_perf_path": os.getenv("VOICE_PERF_PATH", "F:/KnightBot/data/voice_perf.json"),
+    "voice_perf_save_every": int(os.getenv("VOICE_PERF_SAVE_EVERY", "5")),
     "voice_latency_ema_alpha": float(os.getenv("VOICE_LATENCY_EMA_ALPHA", "0.35")),
     "max_history_messages": int(os.getenv("MAX_HISTORY_MESSAGES", "6")),
+    # History start only advances in steps of this many messages so consecutive turns
+    # share a byte-identical prompt prefix (0 = plain sliding window).
+    "history_cache_stride": int(os.getenv("HISTORY_CACHE_STRIDE", "4")),
     "voice_max_history_messages": int(os.getenv("VOICE_MAX_HISTORY_MESSAGES", "2")),
+    # Messages evicted from the voice window are folded into a running per-session
+    # summary by a cheap model in the background and sent as one fixed-size block.
+    "history_summary_enabled": os.getenv("HISTORY_SUMMARY_ENABLED", "1").strip().lower()
+    in {"1", "true", "yes", "on"},
+    "history_summary_model_id": os.getenv("HISTORY_SUMMARY_MODEL_ID", ""),
+    "history_summary_max_tokens": int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "160")),
+    "history_summary_min_batch": int(os.getenv("HISTORY_SUMMARY_MIN_BATCH", "4")),
+    "max_sessions": int(os.getenv("MAX_SESSIONS", "64")),
     "voice_memory_limit": int(os.getenv("VOICE_MEMORY_LIMIT", "1")),
     "model_id": os.getenv(
         "MODEL_ID",
@@ -77,13 +123,76 @@ CONFIG = {
     ),
     "lm_fallback_model_id": os.getenv("LM_FALLBACK_MODEL_ID", "phi-4-14b-instruct-sft"),
     "lm_request_timeout_s": float(os.getenv("LM_REQUEST_TIMEOUT_S", "180")),
+    # Latency SLO: if no first token arrives within the deadline, hedge the request on
+    # the fallback model (or the same model on LM_HEDGE_URL) and keep whichever streams first.
+    "voice_first_token_deadline_s": float(os.getenv("VOICE_FIRST_TOKEN_DEADLINE_S", "2.0")),
+    "text_first_token_deadline_s": float(os.getenv("TEXT_FIRST_TOKEN_DEADLINE_S", "0")),
+    "lm_hedge_url": os.getenv("LM_HEDGE_URL", "").strip().rstrip("/"),
+    # Incremental garble detection on streamed replies.
+    "lm_garble_check_chars": int(os.getenv("LM_GARBLE_CHECK_CHARS", "48")),
+    "lm_garble_window_chars": int(os.getenv("LM_GARBLE_WINDOW_CHARS", "480")),
+    "lm_garble_demote_rate": float(os.getenv("LM_GARBLE_DEMOTE_RATE", "0.4")),
+    "lm_garble_demote_min_samples": int(os.getenv("LM_GARBLE_DEMOTE_MIN_SAMPLES", "5")),
+    "lm_garble_demote_s": float(os.getenv("LM_GARBLE_DEMOTE_S", "600")),
     "lm_stream_enabled": os.getenv("LM_STREAM_ENABLED", "1").strip().lower()
     in {"1", "true", "yes", "on"},
+    "speculative_enabled": os.getenv("SPECULATIVE_PREFILL", "1").strip().lower()
+    in {"1", "true", "yes", "on"},
+    "speculative_max_per_turn": int(os.getenv("SPECULATIVE_MAX_PER_TURN", "3")),
+    "speculative_min_chars": int(os.getenv("SPECULATIVE_MIN_CHARS", "12")),
+    "speculative_ttl_s": float(os.getenv("SPECULATIVE_TTL_S", "15")),
+    # Text-mode response cache with single-flight dedupe (opt-in).
+    "response_cache_enabled": os.getenv("RESPONSE_CACHE_ENABLED", "0").strip().lower()
+    in {"1", "true", "yes", "on"},
+    "response_cache_ttl_s": float(os.getenv("RESPONSE_CACHE_TTL_S", "300")),
+    "response_cache_max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+    "response_cache_max_temperature": float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.7")),
     "livekit_url": os.getenv("LIVEKIT_URL", "ws://localhost:7880"),
     "livekit_api_key": os.getenv("LIVEKIT_API_KEY", "devkey"),
     "livekit_api_secret": os.getenv("LIVEKIT_API_SECRET", "secret"),
 }
 CONFIG["lm_studio"] = (CONFIG["lm_studio"] or "http://192.168.68.111:1234/v1").strip().rstrip("/")
+# Additional OpenAI-compatible backends (comma separated). LM_STUDIO_URL is always included.
+CONFIG["lm_backends"] = [CONFIG["lm_studio"]] + [
+    u.strip().rstrip("/")
+    for u in os.getenv("LM_STUDIO_URLS", "").split(",")
+    if u.strip() and u.strip().rstrip("/") != CONFIG["lm_studio"]
+]
+CONFIG["lm_routing"] = os.getenv("LM_ROUTING", "fastest").strip().lower()
+CONFIG["lm_probe_interval_s"] = float(os.getenv("LM_PROBE_INTERVAL_S", "15"))
+# Admission control: concurrent requests per backend, optionally overridden per host
+# ("box-a:1234=4,box-b:1234=1"), slots reserved for voice, and per-class queue deadlines.
+# Voice and text requests that miss their deadline are admitted with a smaller token
+# budget; background work is shed. Voice gives up on a backend after its max wait and
+# moves on to the next one.
+CONFIG["lm_max_concurrency"] = int(os.getenv("LM_MAX_CONCURRENCY", "2"))
+CONFIG["lm_backend_concurrency"] = {
+    k.strip(): int(v)
+    for k, _, v in (
+        item.partition("=") for item in os.getenv("LM_BACKEND_CONCURRENCY", "").split(",") if "=" in item
+    )
+    if k.strip() and v.strip().isdigit()
+}
+CONFIG["lm_voice_reserved_slots"] = int(os.getenv("LM_VOICE_RESERVED_SLOTS", "1"))
+CONFIG["lm_admission_policies"] = {
+    "voice": (
+        float(os.getenv("LM_QUEUE_DEADLINE_VOICE_S", "1.5")),
+        "downgrade",
+        float(os.getenv("LM_QUEUE_MAX_WAIT_VOICE_S", "8")),
+    ),
+    "text": (float(os.getenv("LM_QUEUE_DEADLINE_TEXT_S", "20")), "downgrade"),
+    "background": (float(os.getenv("LM_QUEUE_DEADLINE_BACKGROUND_S", "5")), "shed"),
+}
+CONFIG["mem0_infer_admission"] = os.getenv("MEM0_INFER_ADMISSION", "1").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+CONFIG["lm_admission_downgrade_tokens"] = {
+    "voice": int(os.getenv("LM_DOWNGRADE_VOICE_TOKENS", "120")),
+    "text": int(os.getenv("LM_DOWNGRADE_TEXT_TOKENS", "1024")),
+}
 CONFIG["lm_force_nonstream_models"] = [
     m.strip().lower()
     for m in os.getenv(
@@ -92,20 +201,93 @@ CONFIG["lm_force_nonstream_models"] = [
     ).split(",")
     if m.strip()
 ]
+LM_POOL = LMBackendPool(
+    CONFIG["lm_backends"],
+    routing=CONFIG["lm_routing"],
+    probe_interval_s=CONFIG["lm_probe_interval_s"],
+    concurrency=CONFIG["lm_max_concurrency"],
+    concurrency_overrides=CONFIG["lm_backend_concurrency"],
+    admission_policies=CONFIG["lm_admission_policies"],
+    max_queue_wait_s=CONFIG["lm_request_timeout_s"],
+    voice_reserve=CONFIG["lm_voice_reserved_slots"],
+)
+LM_PERF = LMPerfStore.load(Path(CONFIG["voice_perf_path"]))
 SYSTEM_PROMPT = Path("F:/KnightBot/config/knight-prompt.md").read_text(encoding="utf-8")
 conversation_history = []
+# Per-session chat history, least recently used first; the default session is the
+# legacy global list and is never evicted.
+SESSION_HISTORIES: "OrderedDict[str, list]" = OrderedDict(default=conversation_history)
+# session -> {"text", "covered" (history messages folded in), "updated_at", "task"}
+SESSION_SUMMARIES: Dict[str, Dict[str, Any]] = {}
+HISTORY_SUMMARY_STATS: Dict[str, Any] = {
+    "compactions": 0,
+    "failures": 0,
+    "last_compaction_s": None,
+    "turns_with_summary": 0,
+    "prompt_tokens_saved_est": 0,
+}
 LOCAL_MEMORY_DB = Path("F:/KnightBot/data/memory/knight_memory.db")
 VOICE_PROFILE_ORDER = ["brief", "chat", "story", "story_max"]
-
-# OpenMemory/Mem0 sometimes requires the user_id to be "initialized" via the MCP SSE endpoint
-# before the REST API will accept memory operations. We cache a best-effort init flag.
-_MEM0_USER_READY = False
+# Versions of the pipeline -> core voice-turn contract (/voice/turn) this server accepts.
+VOICE_TURN_API_VERSIONS = {1}
+
+# mem0 upstream readiness, maintained by a background probe loop. While the circuit is
+# "open", recall and store go straight to the local SQLite store instead of paying for a
+# failing network round trip on every voice turn.
+MEM0_HEALTH: Dict[str, Any] = {
+    "state": "unknown",  # unknown -> closed (healthy) / open (skipping mem0)
+    "consecutive_failures": 0,
+    "backoff_s": None,
+    "next_probe_at": None,
+    "last_ok_at": None,
+    "last_error": None,
+    "opened_at": None,
+    "probes": 0,
+    "skipped_calls": 0,
+}
+_MEM0_WAKE = asyncio.Event()
+# Recall results keyed by (user_id, limit, normalized query); insertion order is LRU order.
+RECALL_CACHE: "OrderedDict[tuple, tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+# Bumped on every store so recalls that started before a write don't cache stale results.
+RECALL_CACHE_GENERATION: Dict[str, int] = {}
+RECALL_CACHE_STATS: Dict[str, Any] = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0}
+MEMORY_MAINTENANCE_STATS: Dict[str, Any] = {"runs": 0, "last_run_at": None, "last_report": None, "running": False}
+RECALL_STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from had has have how i if in is it "
+    "its me my of on or so tell that the their them there this to was we what when where which "
+    "who why will with you your".split()
+)
+# Speculative prefill state, keyed by session. Each entry warms LM Studio's prompt cache
+# and prefetches memories for an interim transcript so /chat can reuse the work.
+SPECULATIONS: Dict[str, Dict[str, Any]] = {}
+SPECULATION_STATS: Dict[str, Any] = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "expired": 0,
+    "budget_exhausted": 0,
+}
+# Prompt prefix reuse between consecutive turns, as a proxy for LM Studio's KV-cache hits.
+# Least recently used first, bounded by max_sessions like the history store.
+_LAST_PROMPT_TEXT: "OrderedDict[str, str]" = OrderedDict()
+PROMPT_CACHE_STATS: Dict[str, Any] = {
+    "turns": 0,
+    "reuse_ratio_sum": 0.0,
+    "last_reuse_ratio": None,
+    "last_reuse_chars": None,
+    "ttft_high_reuse_s_ema": None,
+    "ttft_low_reuse_s_ema": None,
+}
 VOICE_RUNTIME: Dict[str, Any] = {
     "llm_total_s_ema": None,
     "last_llm_total_s": None,
     "last_llm_first_token_s": None,
     "samples": 0,
     "last_profile": "chat",
+    # Learned from the pipeline's own measurements (STT, network, TTS first audio).
+    "pipeline_overhead_s_ema": None,
+    "pipeline_first_audio_s_ema": None,
+    "pipeline_samples": 0,
 }
 
 
@@ -135,6 +317,7 @@ def build_voice_profiles() -> Dict[str, Dict[str, Any]]:
     base_words = int(CONFIG["voice_max_words"])
     base_sentences = int(CONFIG["voice_max_sentences"])
     base_style = str(CONFIG["voice_reply_style"])
+    base_deadline = float(CONFIG["voice_first_token_deadline_s"])
 
     return {
         "brief": {
@@ -142,6 +325,7 @@ def build_voice_profiles() -> Dict[str, Dict[str, Any]]:
             "max_words": _env_int("VOICE_PROFILE_BRIEF_WORDS", 36),
             "max_sentences": _env_int("VOICE_PROFILE_BRIEF_SENTENCES", 2),
             "temperature": _env_float("VOICE_PROFILE_BRIEF_TEMP", max(base_temp - 0.1, 0.2)),
+            "first_token_deadline_s": _env_float("VOICE_PROFILE_BRIEF_FIRST_TOKEN_S", base_deadline),
             "style_prompt": os.getenv(
                 "VOICE_PROFILE_BRIEF_STYLE",
                 "Voice mode (brief): answer in 1-2 concise sentences, no markdown symbols.",
@@ -152,6 +336,7 @@ def build_voice_profiles() -> Dict[str, Dict[str, Any]]:
             "max_words": base_words,
             "max_sentences": base_sentences,
             "temperature": _env_float("VOICE_PROFILE_CHAT_TEMP", base_temp),
+            "first_token_deadline_s": _env_float("VOICE_PROFILE_CHAT_FIRST_TOKEN_S", base_deadline),
             "style_prompt": base_style,
         },
         "story": {
@@ -159,6 +344,7 @@ def build_voice_profiles() -> Dict[str, Dict[str, Any]]:
             "max_words": _env_int("VOICE_PROFILE_STORY_WORDS", 160),
             "max_sentences": _env_int("VOICE_PROFILE_STORY_SENTENCES", 7),
             "temperature": _env_float("VOICE_PROFILE_STORY_TEMP", min(base_temp + 0.08, 1.2)),
+            "first_token_deadline_s": _env_float("VOICE_PROFILE_STORY_FIRST_TOKEN_S", base_deadline),
             "style_prompt": os.getenv(
                 "VOICE_PROFILE_STORY_STYLE",
                 "Voice mode (story): reply with a rich, immersive narrative in 4-7 sentences. Keep it spoken, vivid, and markdown-free.",
@@ -169,6 +355,7 @@ def build_voice_profiles() -> Dict[str, Dict[str, Any]]:
             "max_words": _env_int("VOICE_PROFILE_STORY_MAX_WORDS", 280),
             "max_sentences": _env_int("VOICE_PROFILE_STORY_MAX_SENTENCES", 12),
             "temperature": _env_float("VOICE_PROFILE_STORY_MAX_TEMP", min(base_temp + 0.12, 1.25)),
+            "first_token_deadline_s": _env_float("VOICE_PROFILE_STORY_MAX_FIRST_TOKEN_S", base_deadline),
             "style_prompt": os.getenv(
                 "VOICE_PROFILE_STORY_MAX_STYLE",
                 "Voice mode (story max): deliver an extended, highly detailed narrative in 8-12 sentences. Keep it natural speech and avoid markdown symbols.",
@@ -230,7 +417,12 @@ def infer_voice_profile_from_message(message: str) -> tuple[str, bool, bool, str
     return "chat", False, False, "default chat profile"
 
 
-def select_voice_profile(message: str, requested_profile: str | None) -> tuple[str, Dict[str, Any], Dict[str, Any]]:
+def select_voice_profile(
+    message: str,
+    requested_profile: str | None,
+    latency_budget_s: float | None = None,
+    model: str | None = None,
+) -> tuple[str, Dict[str, Any], Dict[str, Any]]:
     requested = normalize_voice_profile(requested_profile)
     explicit_requested = requested is not None
     if requested:
@@ -243,20 +435,41 @@ def select_voice_profile(message: str, requested_profile: str | None) -> tuple[s
 
     selected = base_profile
     latency_ema = VOICE_RUNTIME.get("llm_total_s_ema")
-
-    apply_latency_adjustments = (
-        CONFIG.get("voice_dynamic_profiles", True)
-        and isinstance(latency_ema, (int, float))
-        and not (
-            explicit_requested and CONFIG.get("voice_explicit_profile_strict", True)
-        )
+    overhead_ema = VOICE_RUNTIME.get("pipeline_overhead_s_ema")
+    overhead_s = max(0.0, float(overhead_ema)) if isinstance(overhead_ema, (int, float)) else 0.0
+    if isinstance(latency_ema, (int, float)):
+        # Judge profiles on what the listener waits for, not just LLM time.
+        latency_ema = float(latency_ema) + overhead_s
+
+    adjustable = CONFIG.get("voice_dynamic_profiles", True) and not (
+        explicit_requested and CONFIG.get("voice_explicit_profile_strict", True)
     )
-    if apply_latency_adjustments:
-        latency_ema = float(latency_ema)
-        target = float(CONFIG.get("voice_latency_target_s", 8.0))
-        critical = float(CONFIG.get("voice_latency_critical_s", 14.0))
-        fast = float(CONFIG.get("voice_latency_fast_s", 4.0))
-
+    target = float(CONFIG.get("voice_latency_target_s", 8.0))
+    critical = float(CONFIG.get("voice_latency_critical_s", 14.0))
+    fast = float(CONFIG.get("voice_latency_fast_s", 4.0))
+    if latency_budget_s and latency_budget_s > 0:
+        # Scale the configured thresholds to the caller's per-turn budget.
+        scale = float(latency_budget_s) / target
+        target, critical, fast = float(latency_budget_s), critical * scale, fast * scale
+
+    plan = (
+        plan_voice_profile(model, base_profile, forced, story_intent, target - overhead_s)
+        if adjustable and model
+        else None
+    )
+    token_budget = None
+    predicted_s = None
+    if plan is not None:
+        selected, token_budget, predicted_s = plan
+        percentile = round(float(CONFIG["voice_latency_percentile"]) * 100)
+        if selected != base_profile:
+            upgraded = VOICE_PROFILE_ORDER.index(selected) > VOICE_PROFILE_ORDER.index(base_profile)
+            direction = "upgraded" if upgraded else "downgraded"
+            reason += f"; {direction} to fit p{percentile} prediction"
+        reason += f"; predicted p{percentile}={predicted_s + overhead_s:.2f}s of {target:.2f}s"
+        if token_budget is not None:
+            reason += f"; max_tokens trimmed to {token_budget}"
+    elif adjustable and isinstance(latency_ema, (int, float)):
         if latency_ema >= critical:
             selected = shift_voice_profile(base_profile, -1 if forced else -2)
             reason += f"; downgraded for critical latency ema={latency_ema:.2f}s"
@@ -271,20 +484,76 @@ def select_voice_profile(message: str, requested_profile: str | None) -> tuple[s
         reason += "; explicit profile honored"
 
     profile_cfg = dict(VOICE_PROFILES.get(selected, VOICE_PROFILES["chat"]))
+    if token_budget is not None:
+        profile_cfg["max_tokens"] = token_budget
     meta = {
         "requested": base_profile,
         "selected": selected,
         "forced": forced,
         "reason": reason,
         "latency_ema_s": latency_ema,
+        "latency_budget_s": latency_budget_s,
+        "predicted_s": round(predicted_s + overhead_s, 3) if predicted_s is not None else None,
+        "max_tokens": profile_cfg.get("max_tokens"),
     }
     return selected, profile_cfg, meta
 
 
-def update_voice_runtime_from_metrics(metrics: Dict[str, Any], selected_profile: str) -> None:
+def plan_voice_profile(
+    model: str,
+    base_profile: str,
+    forced: bool,
+    story_intent: bool,
+    llm_budget_s: float,
+) -> tuple[str, int | None, float] | None:
+    """Pick the richest allowed profile whose predicted LLM time fits the budget.
+
+    Returns (profile, trimmed max_tokens or None, predicted_s), or None while the
+    performance store has no data for `model`. If nothing fits, the smallest allowed
+    profile is used with its token budget trimmed to what fits.
+    """
+    percentile = float(CONFIG["voice_latency_percentile"])
+    base_idx = VOICE_PROFILE_ORDER.index(base_profile)
+    top_idx = base_idx + 1 if (story_intent and not forced) else base_idx
+    low_idx = max(0, base_idx - 1) if forced else 0
+    candidates = [VOICE_PROFILE_ORDER[i] for i in range(min(top_idx, len(VOICE_PROFILE_ORDER) - 1), low_idx - 1, -1)]
+
+    for name in candidates:
+        tokens = int(VOICE_PROFILES[name]["max_tokens"])
+        predicted = LM_PERF.predict_total_s(model, name, tokens, percentile)
+        if predicted is None:
+            return None
+        if predicted <= llm_budget_s:
+            return name, None, predicted
+
+    floor_name = candidates[-1]
+    budget = LM_PERF.token_budget(model, floor_name, llm_budget_s, percentile) or 0
+    budget = max(int(CONFIG["voice_min_tokens"]), min(budget, int(VOICE_PROFILES[floor_name]["max_tokens"])))
+    predicted = LM_PERF.predict_total_s(model, floor_name, budget, percentile)
+    return floor_name, budget, predicted if predicted is not None else llm_budget_s
+
+
+def update_voice_runtime_from_metrics(metrics: Dict[str, Any], selected_profile: str, model: str) -> None:
     llm_total = metrics.get("llm_total_s")
     llm_first = metrics.get("llm_first_token_s")
 
+    completion = metrics.get("completion_tokens") or metrics.get("completion_tokens_est")
+    if (
+        metrics.get("llm_mode") == "stream"
+        and not metrics.get("llm_hedged")
+        and isinstance(llm_first, (int, float))
+        and isinstance(llm_total, (int, float))
+        and completion
+        and llm_total > llm_first
+    ):
+        # Hedged and non-stream turns have no clean TTFT/decode split; skip them.
+        LM_PERF.record(model, selected_profile, llm_first, completion / (llm_total - llm_first))
+        if LM_PERF.dirty >= int(CONFIG["voice_perf_save_every"]):
+            try:
+                LM_PERF.save()
+            except Exception as e:
+                print(f"[lm-perf] save failed: {e}")
+
     if isinstance(llm_total, (int, float)) and llm_total > 0:
         alpha = float(CONFIG.get("voice_latency_ema_alpha", 0.35))
         alpha = max(0.05, min(0.9, alpha))
@@ -303,6 +572,24 @@ def update_voice_runtime_from_metrics(metrics: Dict[str, Any], selected_profile:
     VOICE_RUNTIME["last_profile"] = selected_profile
 
 
+def update_voice_runtime_from_pipeline(last_turn: "VoiceTurnMetrics") -> None:
+    """Fold the pipeline's measured end-to-end timings into the adaptive runtime."""
+    alpha = max(0.05, min(0.9, float(CONFIG.get("voice_latency_ema_alpha", 0.35))))
+
+    def _ema(key: str, value: float) -> None:
+        prev = VOICE_RUNTIME.get(key)
+        ema = value if not isinstance(prev, (int, float)) else (alpha * value) + ((1.0 - alpha) * float(prev))
+        VOICE_RUNTIME[key] = round(ema, 4)
+
+    first_audio = last_turn.stt_to_first_audio_s
+    backend_llm = last_turn.llm_total_s_backend
+    if isinstance(first_audio, (int, float)) and first_audio > 0:
+        _ema("pipeline_first_audio_s_ema", float(first_audio))
+        if isinstance(backend_llm, (int, float)) and backend_llm > 0:
+            _ema("pipeline_overhead_s_ema", max(0.0, float(first_audio) - float(backend_llm)))
+        VOICE_RUNTIME["pipeline_samples"] = int(VOICE_RUNTIME.get("pipeline_samples", 0)) + 1
+
+
 def compact_voice_reply(text: str, max_words: int, max_sentences: int) -> str:
     normalized = " ".join((text or "").split()).strip()
     if not normalized:
@@ -345,6 +632,7 @@ async def warmup_lm_model() -> None:
                     messages=[{"role": "user", "content": "Reply with one word: ready."}],
                     temperature=0.1,
                     max_tokens=16,
+                    priority="background",
                 )
                 elapsed = round(time.perf_counter() - started, 3)
                 print(f"[warmup] LM model '{model_id}' ready in {elapsed}s")
@@ -352,39 +640,90 @@ async def warmup_lm_model() -> None:
         print(f"[warmup] skipped/failed: {e}")
 
 
-async def ensure_mem0_user_ready() -> None:
-    """Best-effort init of the Mem0/OpenMemory user.
+async def probe_mem0() -> None:
+    """Check that Mem0/OpenMemory is up and the user is initialized.
 
     The openmemory-mcp container exposes an SSE endpoint at:
       /mcp/{client_name}/sse/{user_id}
 
     In some versions, REST memory endpoints return 404 {"detail":"User not found"}
-    until this endpoint has been hit at least once.
+    until this endpoint has been hit at least once, so a 2xx here means both that the
+    service is reachable and that memory calls will be accepted.
     """
+    sse_url = f"{CONFIG['mem0']}/mcp/knightbot/sse/{CONFIG['user_id']}"
+    timeout = httpx.Timeout(3.0, connect=2.0, read=1.0)
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async with client.stream("GET", sse_url) as r:
+            if not 200 <= r.status_code < 300:
+                raise RuntimeError(f"mem0 SSE init returned {r.status_code}")
+            # Read a small chunk then close.
+            async for _ in r.aiter_text():
+                break
+
+
+def mem0_available() -> bool:
+    if MEM0_HEALTH["state"] == "closed":
+        return True
+    MEM0_HEALTH["skipped_calls"] += 1
+    return False
 
-    global _MEM0_USER_READY
-    if _MEM0_USER_READY:
-        return
 
-    user_id = CONFIG.get("user_id")
-    mem0_base = CONFIG.get("mem0")
-    if not user_id or not mem0_base:
-        return
+def record_mem0_failure(error: Any) -> None:
+    """Count a failed mem0 call; enough of them open the circuit and wake the prober."""
+    MEM0_HEALTH["consecutive_failures"] += 1
+    MEM0_HEALTH["last_error"] = str(error)[:200]
+    if (
+        MEM0_HEALTH["state"] == "closed"
+        and MEM0_HEALTH["consecutive_failures"] >= max(1, int(CONFIG["mem0_failure_threshold"]))
+    ):
+        _open_mem0_circuit()
 
-    sse_url = f"{mem0_base}/mcp/knightbot/sse/{user_id}"
-    try:
-        timeout = httpx.Timeout(3.0, connect=2.0, read=1.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            async with client.stream("GET", sse_url) as r:
-                # Any 2xx is enough to consider the user initialized.
-                if 200 <= r.status_code < 300:
-                    # Read a small chunk then close.
-                    async for _ in r.aiter_text():
-                        break
-                    _MEM0_USER_READY = True
-    except Exception:
-        # Non-fatal. Knight Core has a local sqlite fallback.
-        return
+
+def record_mem0_success() -> None:
+    MEM0_HEALTH["consecutive_failures"] = 0
+    MEM0_HEALTH["last_ok_at"] = datetime.now().isoformat()
+
+
+def _open_mem0_circuit() -> None:
+    if MEM0_HEALTH["state"] != "open":
+        print(f"[mem0] circuit open, using local memory: {MEM0_HEALTH['last_error']}")
+        MEM0_HEALTH["state"] = "open"
+        MEM0_HEALTH["opened_at"] = datetime.now().isoformat()
+        _MEM0_WAKE.set()
+
+
+async def run_mem0_probe_loop() -> None:
+    """Probe mem0 every interval while healthy, with exponential backoff while not."""
+    while True:
+        MEM0_HEALTH["probes"] += 1
+        try:
+            await probe_mem0()
+        except Exception as e:
+            MEM0_HEALTH["last_error"] = str(e)[:200] or type(e).__name__
+            _open_mem0_circuit()
+            prev = MEM0_HEALTH["backoff_s"]
+            delay = float(CONFIG["mem0_backoff_min_s"]) if prev is None else prev * 2
+            delay = min(delay, float(CONFIG["mem0_backoff_max_s"]))
+            MEM0_HEALTH["backoff_s"] = delay
+        else:
+            if MEM0_HEALTH["state"] != "closed":
+                print("[mem0] upstream ready, circuit closed")
+            MEM0_HEALTH["state"] = "closed"
+            MEM0_HEALTH["backoff_s"] = None
+            MEM0_HEALTH["opened_at"] = None
+            record_mem0_success()
+            delay = float(CONFIG["mem0_probe_interval_s"])
+
+        MEM0_HEALTH["next_probe_at"] = time.time() + delay
+        _MEM0_WAKE.clear()
+        if MEM0_HEALTH["state"] == "closed":
+            # Failing calls open the circuit and wake us for an immediate re-probe.
+            try:
+                await asyncio.wait_for(_MEM0_WAKE.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(delay)
 
 
 def init_local_memory_db() -> None:
@@ -401,6 +740,7 @@ def init_local_memory_db() -> None:
             )
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_user_id ON memories (user_id, id)")
         conn.commit()
 
 
@@ -467,12 +807,40 @@ async def create_token(req: TokenRequest):
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: str | None = None
     include_audio: bool = False
     voice_id: str | None = None
     voice_profile: str | None = None
     model_id: str | None = None
     system_prompt: str | None = None
     images: list[str] | None = None  # List of base64 strings
+    # Probes and one-off calls: no session history, recalled memories or memory writes,
+    # so the prompt (and the response cache key) depends only on the request itself.
+    stateless: bool = False
+
+
+class VoiceTurnMetrics(BaseModel):
+    """Timings the pipeline measured for its previous completed turn."""
+
+    turn_id: int | None = None
+    status: str | None = None
+    stt_s: float | None = None
+    llm_s: float | None = None
+    llm_total_s_backend: float | None = None
+    first_audio_s: float | None = None
+    stt_to_first_audio_s: float | None = None
+    tts_s: float | None = None
+
+
+class VoiceTurnRequest(ChatRequest):
+    """Versioned contract for realtime voice turns from the Pipecat pipeline."""
+
+    api_version: int = 1
+    include_audio: bool = True
+    room_id: str | None = None
+    turn_id: int | None = None
+    latency_budget_s: float | None = None
+    last_turn: VoiceTurnMetrics | None = None
 
 
 def should_stream_from_model(model: str) -> bool:
@@ -483,7 +851,12 @@ def should_stream_from_model(model: str) -> bool:
     return not any(entry and entry in model_l for entry in blocked)
 
 
-def looks_like_garbled_response(text: str) -> bool:
+def looks_like_garbled_response(text: str, symbols: bool = True) -> bool:
+    """Heuristic check for wrong-script or symbol-soup output.
+
+    `symbols=False` skips the symbol-density rule: a partial reply that opens with a
+    code fence, JSON or a shell pipe is dense in brackets and backticks but fine.
+    """
     if not text or not isinstance(text, str):
         return True
     sample = text.strip()
@@ -505,11 +878,121 @@ def looks_like_garbled_response(text: str) -> bool:
         return True
     if ascii_alpha < 2 and len(sample) > 12:
         return True
-    if noisy >= max(4, len(sample) // 8):
+    if symbols and noisy >= max(4, len(sample) // 8):
         return True
     return False
 
 
+class GarbledStreamError(Exception):
+    """Raised mid-stream when the partial reply already looks garbled."""
+
+    def __init__(self, model: str, partial_text: str, metrics: dict):
+        super().__init__(f"garbled stream from '{model}' after {len(partial_text)} chars")
+        self.model = model
+        self.partial_text = partial_text
+        self.metrics = metrics
+
+
+class GarbleMonitor:
+    """Scores a streamed reply every `check_chars` characters within the opening window."""
+
+    def __init__(self, check_chars: int, window_chars: int):
+        self.check_chars = max(12, int(check_chars))
+        self.window_chars = max(self.check_chars, int(window_chars))
+        self._text: list[str] = []
+        self._length = 0
+        self._next_check = self.check_chars
+
+    def feed(self, piece: str) -> bool:
+        """Return True once the accumulated text is judged garbled."""
+        if self._next_check > self.window_chars:
+            return False
+        self._text.append(piece)
+        self._length += len(piece)
+        if self._length < self._next_check:
+            return False
+        self._next_check = self._length + self.check_chars
+        # Only the script rules are safe on an opening fragment; the full reply gets all of them.
+        return looks_like_garbled_response("".join(self._text), symbols=False)
+
+
+# Per-model garble counters; models that keep tripping are demoted to the fallback.
+LM_MODEL_QUALITY: Dict[str, Dict[str, Any]] = {}
+
+
+def record_model_output(model: str, garbled: bool, early: bool = False) -> None:
+    stats = LM_MODEL_QUALITY.setdefault(
+        model,
+        {"replies": 0, "garbled": 0, "stream_aborts": 0, "recent": [], "demoted_until": 0.0, "demotions": 0},
+    )
+    stats["replies"] += 1
+    stats["garbled"] += int(garbled)
+    stats["stream_aborts"] += int(early)
+    recent = stats["recent"]
+    recent.append(bool(garbled))
+    del recent[:-20]
+
+    min_samples = int(CONFIG.get("lm_garble_demote_min_samples", 5))
+    if garbled and len(recent) >= min_samples:
+        rate = sum(recent) / len(recent)
+        if rate >= float(CONFIG.get("lm_garble_demote_rate", 0.4)) and not is_model_demoted(model):
+            stats["demoted_until"] = time.time() + float(CONFIG.get("lm_garble_demote_s", 600.0))
+            stats["demotions"] += 1
+            print(f"[warn] Model '{model}' demoted: garble rate {rate:.0%} over last {len(recent)} replies")
+
+
+def is_model_demoted(model: str) -> bool:
+    stats = LM_MODEL_QUALITY.get(model)
+    return bool(stats) and float(stats.get("demoted_until", 0.0)) > time.time()
+
+
+def model_quality_stats() -> Dict[str, Any]:
+    return {
+        model: {
+            "replies": st["replies"],
+            "garbled": st["garbled"],
+            "stream_aborts": st["stream_aborts"],
+            "recent_garble_rate": round(sum(st["recent"]) / len(st["recent"]), 3) if st["recent"] else None,
+            "demoted": is_model_demoted(model),
+            "demotions": st["demotions"],
+        }
+        for model, st in LM_MODEL_QUALITY.items()
+    }
+
+
+class ReplyLimitTracker:
+    """Incrementally counts words and finished sentences in a streamed reply.
+
+    Mirrors compact_voice_reply's rules so generation can stop as soon as the
+    compacted reply is already decided.
+    """
+
+    def __init__(self, max_words: int, max_sentences: int):
+        self.max_words = max(0, int(max_words))
+        self.max_sentences = max(0, int(max_sentences))
+        self.words = 0
+        self.sentences = 0
+        self._prev = " "
+
+    def feed(self, piece: str) -> str | None:
+        """Consume a streamed piece; return the stop reason once a limit is hit."""
+        for ch in piece:
+            if ch.isspace():
+                if self._prev in ".!?":
+                    self.sentences += 1
+            elif self._prev.isspace():
+                self.words += 1
+            self._prev = ch
+        if self.max_sentences and self.sentences >= self.max_sentences:
+            return "max_sentences"
+        if self.max_words and self.words > self.max_words:
+            return "max_words"
+        return None
+
+
+LM_EARLY_STOP_STATS: Dict[str, Any] = {"streams": 0, "early_stops": 0, "tokens_saved_est": 0}
+
+
 async def run_lm_studio_chat(
     client: httpx.AsyncClient,
     *,
@@ -517,9 +1000,93 @@ async def run_lm_studio_chat(
     messages: list[dict],
     temperature: float,
     max_tokens: int,
+    base_url: str | None = None,
+    priority: str = "text",
+    **kwargs,
+) -> tuple[str, dict]:
+    """Route a chat call through the backend pool, failing over on connection errors.
+
+    Each attempt first waits for an admission slot on the chosen backend in its
+    `priority` class ("voice", "text" or "background"); a request shed by every
+    backend raises LMAdmissionRejected. An explicit `base_url` bypasses routing and admission.
+    Timeouts are not retried elsewhere; the first-token hedge covers slow backends.
+    """
+    if base_url:
+        return await _lm_studio_chat_request(
+            client,
+            base_url=base_url,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+
+    last_error: Exception | None = None
+    for backend in LM_POOL.candidates(model, max_tokens):
+        try:
+            ticket = await LM_POOL.admit(backend, priority)
+        except LMAdmissionRejected as e:
+            # Busy here; another backend may still have room.
+            last_error = e
+            if len(LM_POOL.backends) > 1:
+                print(f"[lm-router] {backend.name}: {e}; trying next backend")
+            continue
+        admitted_tokens = max_tokens
+        if ticket.downgraded:
+            admitted_tokens = min(max_tokens, CONFIG["lm_admission_downgrade_tokens"].get(priority, max_tokens))
+        with LM_POOL.lease(backend, model) as lease:
+            try:
+                text, metrics = await _lm_studio_chat_request(
+                    client,
+                    base_url=backend.url,
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=admitted_tokens,
+                    **kwargs,
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, LMBackendError) as e:
+                LM_POOL.mark_failure(backend, e)
+                last_error = e
+                if len(LM_POOL.backends) > 1:
+                    print(f"[lm-router] {backend.name} failed for '{model}': {e}; failing over")
+                continue
+            lease.record(
+                metrics.get("llm_first_token_s"),
+                metrics.get("llm_total_s"),
+                metrics.get("completion_tokens") or metrics.get("completion_tokens_est"),
+            )
+            metrics["lm_backend"] = backend.name
+            metrics["lm_priority"] = ticket.priority
+            metrics["lm_queue_wait_s"] = round(ticket.waited_s, 4)
+            metrics["lm_admission_downgraded"] = ticket.downgraded
+            return text, metrics
+
+    raise last_error or LMBackendError("No LM backends configured")
+
+
+async def _lm_studio_chat_request(
+    client: httpx.AsyncClient,
+    *,
+    base_url: str,
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    reply_limit: tuple[int, int] | None = None,
+    garble_guard: bool = False,
+    on_first_token: Callable[[], None] | None = None,
 ) -> tuple[str, dict]:
-    """Call LM Studio and capture first-token latency when streaming is available."""
-    target_url = f"{CONFIG['lm_studio']}/chat/completions"
+    """Call LM Studio and capture first-token latency when streaming is available.
+
+    `reply_limit` is (max_words, max_sentences): the stream is closed as soon as the
+    reply passes it, so LM Studio stops generating tokens we would discard.
+    With `garble_guard`, the opening of the stream is scored as it arrives and a
+    GarbledStreamError aborts the generation early. `on_first_token` fires when the
+    first content arrives (or when a non-stream response completes).
+    """
+    target_url = f"{base_url}/chat/completions"
     request_timeout = float(CONFIG.get("lm_request_timeout_s", 180.0))
     base_payload = {
         "model": model,
@@ -546,6 +1113,16 @@ async def run_lm_studio_chat(
 
                 chunks: list[str] = []
                 first_token_s: float | None = None
+                tracker = ReplyLimitTracker(*reply_limit) if reply_limit else None
+                stop_reason: str | None = None
+                monitor = (
+                    GarbleMonitor(
+                        int(CONFIG.get("lm_garble_check_chars", 48)),
+                        int(CONFIG.get("lm_garble_window_chars", 480)),
+                    )
+                    if garble_guard
+                    else None
+                )
 
                 async for line in r.aiter_lines():
                     if not line or not line.startswith("data:"):
@@ -569,27 +1146,55 @@ async def run_lm_studio_chat(
                     choice0 = choices[0] or {}
                     delta = choice0.get("delta") or {}
                     token_piece = delta.get("content")
+                    if not (isinstance(token_piece, str) and token_piece):
+                        message = choice0.get("message") or {}
+                        token_piece = message.get("content")
                     if isinstance(token_piece, str) and token_piece:
                         if first_token_s is None:
                             first_token_s = round(time.perf_counter() - started, 4)
+                            if on_first_token is not None:
+                                on_first_token()
                         chunks.append(token_piece)
-                        continue
-
-                    message = choice0.get("message") or {}
-                    message_piece = message.get("content")
-                    if isinstance(message_piece, str) and message_piece:
-                        if first_token_s is None:
-                            first_token_s = round(time.perf_counter() - started, 4)
-                        chunks.append(message_piece)
+                        if monitor is not None and monitor.feed(token_piece):
+                            total_s = round(time.perf_counter() - started, 4)
+                            raise GarbledStreamError(
+                                model,
+                                "".join(chunks),
+                                {
+                                    "llm_mode": "stream",
+                                    "llm_first_token_s": first_token_s,
+                                    "llm_total_s": total_s,
+                                    "completion_tokens_est": len(chunks),
+                                    "llm_garble_abort": True,
+                                },
+                            )
+                        if tracker is not None:
+                            stop_reason = tracker.feed(token_piece)
+                            if stop_reason:
+                                # Leaving the stream context closes the connection, which
+                                # aborts generation upstream and frees the LM Studio slot.
+                                break
 
                 response_text = "".join(chunks).strip()
                 if response_text:
                     total_s = round(time.perf_counter() - started, 4)
-                    return response_text, {
+                    metrics = {
                         "llm_mode": "stream",
                         "llm_first_token_s": first_token_s if first_token_s is not None else total_s,
                         "llm_total_s": total_s,
+                        "completion_tokens_est": len(chunks),
                     }
+                    if tracker is not None:
+                        LM_EARLY_STOP_STATS["streams"] += 1
+                    if stop_reason:
+                        saved = max(0, int(max_tokens) - len(chunks))
+                        LM_EARLY_STOP_STATS["early_stops"] += 1
+                        LM_EARLY_STOP_STATS["tokens_saved_est"] += saved
+                        metrics["llm_early_stop"] = stop_reason
+                        metrics["tokens_saved_est"] = saved
+                    return response_text, metrics
+        except GarbledStreamError:
+            raise
         except Exception as e:
             # Keep chat alive if stream mode is unavailable for a model/backend.
             print(f"[warn] LM Studio streaming unavailable, using fallback mode: {e}")
@@ -598,12 +1203,14 @@ async def run_lm_studio_chat(
 
     r = await client.post(target_url, json=base_payload, timeout=request_timeout)
     if r.status_code != 200:
-        raise Exception(f"LM Studio Error: {r.status_code} - {r.text}")
+        raise LMBackendError(f"LM Studio Error: {r.status_code} - {r.text}")
 
     body = r.json()
     response_text = str(body["choices"][0]["message"]["content"]).strip()
     if not response_text:
         raise Exception("LM Studio returned an empty response")
+    if on_first_token is not None:
+        on_first_token()
     total_s = round(time.perf_counter() - started, 4)
     usage = body.get("usage") or {}
     prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
@@ -621,10 +1228,254 @@ async def run_lm_studio_chat(
     }
 
 
+async def run_guarded_lm_chat(client: httpx.AsyncClient, **kwargs) -> tuple[str, dict, bool]:
+    """run_lm_studio_chat with early garble aborts; returns (text, metrics, garbled)."""
+    model = kwargs["model"]
+    try:
+        text, metrics = await run_lm_studio_chat(client, garble_guard=True, **kwargs)
+    except GarbledStreamError as e:
+        print(f"[warn] {e}; aborting stream")
+        record_model_output(model, garbled=True, early=True)
+        return e.partial_text, e.metrics, True
+
+    garbled = looks_like_garbled_response(text)
+    record_model_output(model, garbled=garbled)
+    return text, metrics, garbled
+
+
+LM_HEDGE_STATS: Dict[str, Any] = {"requests": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0}
+
+
+def hedge_stats() -> Dict[str, Any]:
+    requests = LM_HEDGE_STATS["requests"]
+    hedged = LM_HEDGE_STATS["hedged"]
+    return {
+        **LM_HEDGE_STATS,
+        "hedge_rate": round(hedged / requests, 4) if requests else None,
+        "hedge_win_rate": round(LM_HEDGE_STATS["hedge_wins"] / hedged, 4) if hedged else None,
+    }
+
+
+# key -> (expires_at, value); insertion order doubles as LRU order.
+RESPONSE_CACHE: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+RESPONSE_INFLIGHT: Dict[str, asyncio.Future] = {}
+RESPONSE_CACHE_STATS: Dict[str, Any] = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evicted": 0}
+
+
+def response_cache_key(model: str, messages: list[dict], temperature: float, max_tokens: int) -> str:
+    normalized = []
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            content = " ".join(content.split())
+        normalized.append([m.get("role", ""), content])
+    blob = json.dumps(
+        {"model": model.lower(), "messages": normalized, "t": round(float(temperature), 3), "n": int(max_tokens)},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+async def cached_generation(key: str, produce: Callable[[], Awaitable[Any]]) -> tuple[Any, str]:
+    """Return `(value, status)` for `key`, generating at most once across concurrent callers.
+
+    status is "hit", "coalesced" (shared an in-flight generation) or "miss". Failures
+    are not cached; every waiter of a failed generation sees the same exception.
+    """
+    now = time.monotonic()
+    entry = RESPONSE_CACHE.get(key)
+    if entry is not None:
+        if entry[0] > now:
+            RESPONSE_CACHE.move_to_end(key)
+            RESPONSE_CACHE_STATS["hits"] += 1
+            return entry[1], "hit"
+        RESPONSE_CACHE.pop(key, None)
+        RESPONSE_CACHE_STATS["expired"] += 1
+
+    inflight = RESPONSE_INFLIGHT.get(key)
+    if inflight is not None:
+        RESPONSE_CACHE_STATS["coalesced"] += 1
+        try:
+            return await asyncio.shield(inflight), "coalesced"
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The leading request was cancelled (client went away); generate for ourselves.
+            return await cached_generation(key, produce)
+
+    RESPONSE_CACHE_STATS["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    RESPONSE_INFLIGHT[key] = future
+    try:
+        value = await produce()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        if not future.done():
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited failure doesn't log "exception never retrieved".
+            future.exception()
+        raise
+    finally:
+        RESPONSE_INFLIGHT.pop(key, None)
+
+    future.set_result(value)
+    RESPONSE_CACHE[key] = (time.monotonic() + float(CONFIG["response_cache_ttl_s"]), value)
+    while len(RESPONSE_CACHE) > max(1, int(CONFIG["response_cache_max_entries"])):
+        RESPONSE_CACHE.popitem(last=False)
+        RESPONSE_CACHE_STATS["evicted"] += 1
+    return value, "miss"
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    lookups = RESPONSE_CACHE_STATS["hits"] + RESPONSE_CACHE_STATS["misses"] + RESPONSE_CACHE_STATS["coalesced"]
+    saved = RESPONSE_CACHE_STATS["hits"] + RESPONSE_CACHE_STATS["coalesced"]
+    return {
+        **RESPONSE_CACHE_STATS,
+        "entries": len(RESPONSE_CACHE),
+        "inflight": len(RESPONSE_INFLIGHT),
+        "hit_rate": round(saved / lookups, 4) if lookups else None,
+    }
+
+
+async def run_hedged_lm_chat(
+    client: httpx.AsyncClient,
+    *,
+    first_token_deadline_s: float,
+    **kwargs,
+) -> tuple[str, dict, bool]:
+    """Guarded chat with a first-token SLO.
+
+    If the primary request has not streamed a token within the deadline, a hedge is
+    fired at the fallback model (or the same model on LM_HEDGE_URL). Whichever streams
+    first wins; the loser is cancelled, which closes its connection upstream.
+    """
+    model = kwargs["model"]
+    hedge_url = str(CONFIG.get("lm_hedge_url") or "")
+    hedge_model = model if hedge_url else str(CONFIG.get("lm_fallback_model_id", "")).strip()
+    can_hedge = first_token_deadline_s > 0 and hedge_model and (
+        hedge_url or hedge_model.lower() != model.lower()
+    )
+    if not can_hedge:
+        return await run_guarded_lm_chat(client, **kwargs)
+
+    LM_HEDGE_STATS["requests"] += 1
+    primary_first = asyncio.Event()
+    primary = asyncio.create_task(run_guarded_lm_chat(client, on_first_token=primary_first.set, **kwargs))
+    primary_waiter = asyncio.create_task(primary_first.wait())
+    tasks = [primary, primary_waiter]
+    try:
+        done, _ = await asyncio.wait(
+            {primary, primary_waiter}, timeout=first_token_deadline_s, return_when=asyncio.FIRST_COMPLETED
+        )
+        if done:
+            primary_waiter.cancel()
+            return await primary
+
+        print(
+            f"[hedge] no first token from '{model}' within {first_token_deadline_s:.1f}s; "
+            f"hedging on '{hedge_model}'{' via ' + hedge_url if hedge_url else ''}"
+        )
+        LM_HEDGE_STATS["hedged"] += 1
+        hedge_first = asyncio.Event()
+        hedge_kwargs = dict(kwargs, model=hedge_model)
+        if hedge_url:
+            hedge_kwargs["base_url"] = hedge_url
+        hedge = asyncio.create_task(run_guarded_lm_chat(client, on_first_token=hedge_first.set, **hedge_kwargs))
+        hedge_waiter = asyncio.create_task(hedge_first.wait())
+        tasks += [hedge, hedge_waiter]
+
+        contenders = {"primary": (primary, primary_waiter), "hedge": (hedge, hedge_waiter)}
+        winner: str | None = None
+        last_error: BaseException | None = None
+        while winner is None and contenders:
+            pending = [t for pair in contenders.values() for t in pair if not t.done()]
+            if pending:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for label, (task, waiter) in list(contenders.items()):
+                if waiter.done() and not waiter.cancelled():
+                    winner = label
+                    break
+                if task.done():
+                    if task.exception() is None:
+                        winner = label
+                        break
+                    last_error = task.exception()
+                    contenders.pop(label)
+                    waiter.cancel()
+            if winner is None and len(contenders) == 1:
+                winner = next(iter(contenders))
+
+        for label, (task, waiter) in contenders.items():
+            waiter.cancel()
+            if label != winner:
+                task.cancel()
+        if winner is None:
+            raise last_error or RuntimeError("hedged LM request failed")
+
+        LM_HEDGE_STATS["hedge_wins" if winner == "hedge" else "primary_wins"] += 1
+        text, metrics, garbled = await contenders[winner][0]
+        metrics["llm_hedged"] = True
+        metrics["llm_hedge_winner"] = winner
+        metrics["llm_model_used"] = hedge_model if winner == "hedge" else model
+        return text, metrics, garbled
+    finally:
+        # Covers the caller being cancelled mid-race: nothing may outlive this call.
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+def recall_cache_key(query: str, limit: int) -> tuple:
+    terms = {t for t in re.findall(r"[\w']+", (query or "").lower()) if t not in RECALL_STOPWORDS}
+    return (CONFIG["user_id"], limit, " ".join(sorted(terms)))
+
+
+def invalidate_recall_cache(user_id: str) -> None:
+    RECALL_CACHE_GENERATION[user_id] = RECALL_CACHE_GENERATION.get(user_id, 0) + 1
+    stale = [k for k in RECALL_CACHE if k[0] == user_id]
+    for k in stale:
+        del RECALL_CACHE[k]
+    RECALL_CACHE_STATS["invalidations"] += 1
+
+
+def recall_cache_stats() -> Dict[str, Any]:
+    lookups = RECALL_CACHE_STATS["hits"] + RECALL_CACHE_STATS["misses"]
+    return {
+        **RECALL_CACHE_STATS,
+        "entries": len(RECALL_CACHE),
+        "hit_rate": round(RECALL_CACHE_STATS["hits"] / lookups, 4) if lookups else None,
+    }
+
+
 async def recall_memories(query: str, limit: int = 3):
     limit = max(1, min(8, int(limit)))
+    key = recall_cache_key(query, limit)
+    entry = RECALL_CACHE.get(key)
+    if entry is not None:
+        if entry[0] > time.monotonic():
+            RECALL_CACHE.move_to_end(key)
+            RECALL_CACHE_STATS["hits"] += 1
+            return list(entry[1])
+        del RECALL_CACHE[key]
+        RECALL_CACHE_STATS["expired"] += 1
+    RECALL_CACHE_STATS["misses"] += 1
+
+    generation = RECALL_CACHE_GENERATION.get(key[0], 0)
+    results = await _recall_memories_uncached(query, limit)
+    if RECALL_CACHE_GENERATION.get(key[0], 0) == generation:
+        RECALL_CACHE[key] = (time.monotonic() + float(CONFIG["recall_cache_ttl_s"]), list(results))
+        while len(RECALL_CACHE) > max(1, int(CONFIG["recall_cache_max_entries"])):
+            RECALL_CACHE.popitem(last=False)
+    return results
+
+
+async def _recall_memories_uncached(query: str, limit: int) -> List[Dict[str, str]]:
+    if not mem0_available():
+        return local_recall_memories(query, limit=limit)
     try:
-        await ensure_mem0_user_ready()
         async with httpx.AsyncClient(timeout=3.0) as client:
             # OpenMemory API (newer): /api/v1/memories/filter
             r = await client.post(
@@ -637,43 +1488,60 @@ async def recall_memories(query: str, limit: int = 3):
                 },
             )
             if r.status_code == 200:
+                record_mem0_success()
                 items = r.json().get("items", [])
                 parsed = [
                     {"memory": m.get("content", "")} for m in items if m.get("content")
                 ]
                 if parsed:
                     return parsed
-
-            # Some mem0 versions require a user initialization step.
-            if r.status_code == 404 and "User not found" in (r.text or ""):
-                await ensure_mem0_user_ready()
-                r2 = await client.post(
-                    f"{CONFIG['mem0']}/api/v1/memories/filter",
-                    json={
-                        "user_id": CONFIG["user_id"],
-                        "search_query": query,
-                        "page": 1,
-                        "size": limit,
-                    },
-                )
-                if r2.status_code == 200:
-                    items = r2.json().get("items", [])
-                    parsed = [
-                        {"memory": m.get("content", "")} for m in items if m.get("content")
-                    ]
-                    if parsed:
-                        return parsed
+            elif r.status_code == 404 and "User not found" in (r.text or ""):
+                # The user needs re-initializing; the prober does that off the hot path.
+                MEM0_HEALTH["last_error"] = "User not found"
+                _open_mem0_circuit()
+            elif r.status_code >= 500:
+                record_mem0_failure(f"recall returned {r.status_code}")
 
             return local_recall_memories(query, limit=limit)
     except Exception as e:
         print(f"[warn] Memory search failed: {e}")
+        record_mem0_failure(e)
         return local_recall_memories(query, limit=limit)
 
 
-async def store_memory(content: str):
+async def store_memory(content: str, invalidate_recall: bool = True):
+    """Persist a memory to mem0 (best-effort) and the local store.
+
+    Per-turn logs pass `invalidate_recall=False`: the exchange is already in the
+    session history verbatim, so recall may pick it up when the short cache TTL
+    lapses instead of every turn emptying the user's recall cache.
+    """
     stored_remote = False
+    if mem0_available():
+        stored_remote = await _store_memory_remote(content)
+
+    # Always persist locally for deterministic fallback durability.
+    local_store_memory(content)
+    if invalidate_recall:
+        invalidate_recall_cache(CONFIG["user_id"])
+
+    if not stored_remote:
+        print("[warn] Stored memory locally (remote mem0 unavailable or degraded)")
+
+
+async def _store_memory_remote(content: str) -> bool:
+    # mem0's `infer` runs an extraction LLM call on the primary LM Studio box, so it
+    # takes a background admission slot there; if shed, store the raw text instead.
+    infer = True
+    admitted_backend = None
+    if CONFIG["mem0_infer_admission"] and LM_POOL.backends:
+        try:
+            await LM_POOL.admit(LM_POOL.backends[0], "background")
+            admitted_backend = LM_POOL.backends[0]
+        except LMAdmissionRejected as e:
+            print(f"[memory] {e}; storing without infer")
+            infer = False
     try:
-        await ensure_mem0_user_ready()
         async with httpx.AsyncClient(timeout=10.0) as client:
             # OpenMemory API (newer): /api/v1/memories/
             r = await client.post(
@@ -681,75 +1549,517 @@ async def store_memory(content: str):
                 json={
                     "user_id": CONFIG["user_id"],
                     "text": content,
-                    "infer": True,
+                    "infer": infer,
                     # Keep OpenMemory's default app; store origin as metadata instead.
                     "metadata": {"source": "knightbot"},
                 },
             )
             if r.status_code in (200, 201):
+                record_mem0_success()
                 try:
                     body = r.json()
                 except Exception:
                     body = {}
-                if not (isinstance(body, dict) and body.get("error")):
-                    stored_remote = True
-            elif r.status_code == 404 and "User not found" in (r.text or ""):
-                # Retry once after attempting user init.
-                await ensure_mem0_user_ready()
-                r2 = await client.post(
-                    f"{CONFIG['mem0']}/api/v1/memories/",
-                    json={
-                        "user_id": CONFIG["user_id"],
-                        "text": content,
-                        "infer": True,
-                        "metadata": {"source": "knightbot"},
-                    },
-                )
-                if r2.status_code in (200, 201):
-                    stored_remote = True
+                return not (isinstance(body, dict) and body.get("error"))
+            if r.status_code == 404 and "User not found" in (r.text or ""):
+                MEM0_HEALTH["last_error"] = "User not found"
+                _open_mem0_circuit()
+            elif r.status_code >= 500:
+                record_mem0_failure(f"store returned {r.status_code}")
+            return False
     except Exception as e:
         print(f"[warn] Remote memory store failed: {e}")
+        record_mem0_failure(e)
+        return False
+    finally:
+        if admitted_backend is not None:
+            admitted_backend.admission.release()
 
-    # Always persist locally for deterministic fallback durability.
-    local_store_memory(content)
 
-    if not stored_remote:
-        print("[warn] Stored memory locally (remote mem0 unavailable or degraded)")
+async def run_memory_maintenance(dry_run: bool = False) -> Dict[str, Any]:
+    """Dedupe and expire memories in both stores, then compact the SQLite file."""
+    if MEMORY_MAINTENANCE_STATS["running"]:
+        return {"status": "already_running"}
+    MEMORY_MAINTENANCE_STATS["running"] = True
+    report: Dict[str, Any] = {"started_at": datetime.now().isoformat(), "dry_run": dry_run}
+    try:
+        init_local_memory_db()
+        try:
+            # SQLite work blocks; keep it off the event loop.
+            report["sqlite"] = await asyncio.to_thread(
+                memory_maintenance.maintain_sqlite,
+                LOCAL_MEMORY_DB,
+                CONFIG["user_id"],
+                CONFIG["memory_rules"],
+                dry_run,
+            )
+        except Exception as e:
+            report["sqlite"] = {"error": str(e)}
+
+        if CONFIG["memory_maintenance_mem0"] and MEM0_HEALTH["state"] == "closed":
+            try:
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    report["mem0"] = await memory_maintenance.dedupe_mem0(
+                        client,
+                        CONFIG["mem0"],
+                        CONFIG["user_id"],
+                        CONFIG["memory_rules"]["dedupe_threshold"],
+                        dry_run,
+                    )
+            except Exception as e:
+                report["mem0"] = {"error": str(e)}
+        else:
+            report["mem0"] = {"skipped": "disabled" if not CONFIG["memory_maintenance_mem0"] else "mem0 unavailable"}
+
+        if not dry_run:
+            invalidate_recall_cache(CONFIG["user_id"])
+        MEMORY_MAINTENANCE_STATS["runs"] += 1
+        MEMORY_MAINTENANCE_STATS["last_run_at"] = report["started_at"]
+        MEMORY_MAINTENANCE_STATS["last_report"] = report
+        print(f"[memory] maintenance: {report}")
+        return report
+    finally:
+        MEMORY_MAINTENANCE_STATS["running"] = False
+
+
+async def run_memory_maintenance_loop() -> None:
+    # Let startup and the first turns settle before touching the stores.
+    await asyncio.sleep(600)
+    while True:
+        try:
+            await run_memory_maintenance()
+        except Exception as e:
+            print(f"[memory] maintenance failed: {e}")
+        await asyncio.sleep(float(CONFIG["memory_maintenance_interval_h"]) * 3600)
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s']", " ", (text or "").lower()).split())
+
+
+def chat_memory_limit(include_audio: bool) -> int:
+    if include_audio:
+        return max(0, int(CONFIG.get("voice_memory_limit", 1)))
+    return 3
+
+
+def chat_history_window(include_audio: bool) -> int:
+    if include_audio:
+        return max(0, int(CONFIG.get("voice_max_history_messages", 2)))
+    return max(0, int(CONFIG.get("max_history_messages", 6)))
+
+
+def stable_history_start(length: int, window: int) -> int:
+    if window <= 0:
+        return length
+    stride = max(0, int(CONFIG.get("history_cache_stride", 0)))
+    start = max(0, length - window)
+    if stride > 0:
+        start = (start // stride) * stride
+    return start
+
+
+def stable_history_slice(history: list[dict], window: int) -> list[dict]:
+    """Recent history whose start index only moves in steps of `history_cache_stride`.
+
+    A plain `[-window:]` slide changes the first history message every turn, which
+    invalidates the server's prefix cache from that point on. Here the start stays put
+    while the slice grows from `window` to `window + stride - 1` messages, then jumps
+    forward by `stride`; the prompt prefix changes only on those jumps.
+    """
+    if window <= 0 or not history:
+        return []
+    return history[stable_history_start(len(history), window) :]
+
+
+def session_history(session: str) -> list[dict]:
+    history = SESSION_HISTORIES.get(session)
+    if history is not None:
+        SESSION_HISTORIES.move_to_end(session)
+        return history
+    if len(SESSION_HISTORIES) >= max(2, int(CONFIG["max_sessions"])):
+        evict_session(next(k for k in SESSION_HISTORIES if k != "default"))
+    history = SESSION_HISTORIES[session] = []
+    return history
+
+
+def evict_session(session: str) -> None:
+    """Drop everything kept for `session`, including a compaction still in flight."""
+    SESSION_HISTORIES.pop(session, None)
+    _LAST_PROMPT_TEXT.pop(session, None)
+    summary = SESSION_SUMMARIES.pop(session, None)
+    task = summary.get("task") if summary else None
+    if task is not None and not task.done():
+        task.cancel()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _history_tokens(history: list[dict]) -> int:
+    return sum(estimate_tokens(str(m.get("content", ""))) for m in history)
+
+
+def session_prompt_context(session: str, include_audio: bool) -> tuple[str | None, list[dict], Dict[str, Any]]:
+    """Summary block, history slice and prompt-savings metrics for a chat turn.
+
+    The summary only stands in for messages it actually covers; anything evicted but
+    not yet folded in is simply absent until the background compaction catches up.
+    """
+    history = session_history(session)
+    window = chat_history_window(include_audio)
+    summary = SESSION_SUMMARIES.get(session) or {}
+    summary_text = summary.get("text") or None
+    if not CONFIG.get("history_summary_enabled", True) or window <= 0:
+        summary_text = None
+    recent = stable_history_slice(history, window)
+    if summary_text and recent:
+        # The summary is built against the smallest window, so for wider windows it can
+        # already cover the oldest messages of the slice; drop those verbatim copies.
+        start = stable_history_start(len(history), window)
+        covered = min(int(summary.get("covered", 0)), len(history))
+        if covered > start:
+            recent = history[covered:]
+
+    metrics: Dict[str, Any] = {}
+    if summary_text:
+        baseline = _history_tokens(history)
+        used = estimate_tokens(summary_text) + _history_tokens(recent)
+        saved = max(0, baseline - used)
+        metrics = {
+            "history_summary_tokens_est": estimate_tokens(summary_text),
+            "history_summary_covered": int(summary.get("covered", 0)),
+            "history_full_tokens_est": baseline,
+            "prompt_tokens_saved_est": saved,
+        }
+    return summary_text, recent, metrics
+
+
+def schedule_history_compaction(session: str) -> None:
+    """Fold messages evicted from the voice window into the session summary, off the hot path."""
+    if not CONFIG.get("history_summary_enabled", True):
+        return
+    history = session_history(session)
+    # Summarize against the smallest window so every chat mode is covered.
+    window = min(chat_history_window(True), chat_history_window(False)) or 1
+    evict_end = stable_history_start(len(history), window)
+    summary = SESSION_SUMMARIES.setdefault(session, {"text": "", "covered": 0, "updated_at": None, "task": None})
+    if summary["covered"] > len(history):
+        # History was reset underneath us.
+        summary.update(text="", covered=0)
+    if evict_end - summary["covered"] < max(1, int(CONFIG["history_summary_min_batch"])):
+        return
+    task = summary.get("task")
+    if task is not None and not task.done():
+        return
+    summary["task"] = asyncio.create_task(_compact_history(session, evict_end))
+
+
+async def _compact_history(session: str, evict_end: int) -> None:
+    summary = SESSION_SUMMARIES.get(session)
+    history = SESSION_HISTORIES.get(session)
+    if summary is None or history is None:
+        # The session was evicted before the task ran.
+        return
+    start = summary["covered"]
+    evicted = history[start:evict_end]
+    if not evicted:
+        return
+
+    max_tokens = max(32, int(CONFIG["history_summary_max_tokens"]))
+    max_words = int(max_tokens * 0.7)
+    transcript = "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in evicted)
+    prompt = (
+        f"Previous summary:\n{summary['text'] or '(none)'}\n\n"
+        f"New conversation turns:\n{transcript}\n\n"
+        f"Rewrite the summary to include the new turns in at most {max_words} words. "
+        "Keep names, facts, decisions, open questions and the user's preferences. "
+        "Plain prose, no preamble."
+    )
+    model = str(CONFIG.get("history_summary_model_id") or CONFIG["voice_model_id"])
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            text, _ = await run_lm_studio_chat(
+                client,
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You maintain a compact running summary of a conversation."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=max_tokens,
+                priority="background",
+            )
+    except Exception as e:
+        HISTORY_SUMMARY_STATS["failures"] += 1
+        print(f"[history] compaction for session '{session}' failed: {e}")
+        return
+
+    text = " ".join(text.split())
+    # Hard cap so the block stays fixed-size even if the model overruns its word budget.
+    text = text[: max_tokens * 4]
+    summary.update(text=text, covered=evict_end, updated_at=time.time())
+    HISTORY_SUMMARY_STATS["compactions"] += 1
+    HISTORY_SUMMARY_STATS["last_compaction_s"] = round(time.perf_counter() - started, 3)
+
+
+def history_summary_stats() -> Dict[str, Any]:
+    return {
+        **HISTORY_SUMMARY_STATS,
+        "sessions": {
+            name: {"covered": s["covered"], "summary_tokens_est": estimate_tokens(s["text"])}
+            for name, s in SESSION_SUMMARIES.items()
+        },
+    }
+
+
+def assemble_chat_messages(
+    *,
+    system_prompt: str,
+    style_prompt: str | None,
+    history: list[dict],
+    memories: List[Dict[str, Any]],
+    user_content: Any,
+    summary: str | None = None,
+) -> list[dict]:
+    """Order prompt blocks from most to least stable for prefix-cache reuse.
+
+    fixed system prompt -> voice style -> conversation summary -> rolling history
+    -> recalled memories -> user turn
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if style_prompt:
+        messages.append({"role": "system", "content": style_prompt})
+    if summary:
+        messages.append({"role": "system", "content": f"Conversation so far (summary):\n{summary}"})
+    messages.extend(history)
+    if memories:
+        mem_text = "\n".join([f"- {m.get('memory', '')}" for m in memories])
+        messages.append({"role": "system", "content": f"Relevant memories:\n{mem_text}"})
+    messages.append({"role": "user", "content": user_content})
+    return messages
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    parts = []
+    for m in messages:
+        content = m.get("content")
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        parts.append(f"<|{m.get('role', '')}|>{content}")
+    return "\n".join(parts)
+
+
+def measure_prompt_prefix_reuse(session: str, messages: list[dict]) -> Dict[str, Any]:
+    """Compare this prompt with the session's previous one and report the shared prefix."""
+    current = _prompt_text(messages)
+    previous = _LAST_PROMPT_TEXT.pop(session, "")
+    _LAST_PROMPT_TEXT[session] = current
+    while len(_LAST_PROMPT_TEXT) > max(2, int(CONFIG["max_sessions"])):
+        _LAST_PROMPT_TEXT.popitem(last=False)
+
+    shared = 0
+    limit = min(len(current), len(previous))
+    while shared < limit and current[shared] == previous[shared]:
+        shared += 1
+    ratio = round(shared / len(current), 4) if current else 0.0
+
+    PROMPT_CACHE_STATS["turns"] += 1
+    PROMPT_CACHE_STATS["reuse_ratio_sum"] += ratio
+    PROMPT_CACHE_STATS["last_reuse_ratio"] = ratio
+    PROMPT_CACHE_STATS["last_reuse_chars"] = shared
+    return {"prompt_chars": len(current), "prompt_prefix_reuse_chars": shared, "prompt_prefix_reuse_ratio": ratio}
+
+
+def record_prompt_cache_timing(reuse_ratio: float, first_token_s: Any) -> None:
+    if not isinstance(first_token_s, (int, float)) or first_token_s <= 0:
+        return
+    key = "ttft_high_reuse_s_ema" if reuse_ratio >= 0.8 else "ttft_low_reuse_s_ema"
+    prev = PROMPT_CACHE_STATS.get(key)
+    value = float(first_token_s) if prev is None else (0.3 * float(first_token_s)) + (0.7 * float(prev))
+    PROMPT_CACHE_STATS[key] = round(value, 4)
+
+
+def prompt_cache_stats() -> Dict[str, Any]:
+    turns = PROMPT_CACHE_STATS["turns"]
+    stats = {k: v for k, v in PROMPT_CACHE_STATS.items() if k != "reuse_ratio_sum"}
+    stats["avg_reuse_ratio"] = round(PROMPT_CACHE_STATS["reuse_ratio_sum"] / turns, 4) if turns else None
+    return stats
+
+
+def voice_style_prompt(profile_cfg: Dict[str, Any]) -> str:
+    return str(profile_cfg.get("style_prompt", CONFIG["voice_reply_style"]))
+
+
+def speculation_stats() -> Dict[str, Any]:
+    decided = SPECULATION_STATS["hits"] + SPECULATION_STATS["misses"]
+    return {
+        **SPECULATION_STATS,
+        "hit_rate": round(SPECULATION_STATS["hits"] / decided, 4) if decided else None,
+        "active": len(SPECULATIONS),
+    }
+
+
+async def _speculative_warm(model: str, messages: list[dict]) -> None:
+    """Prefill the prompt on LM Studio with a 1-token generation to warm its KV cache."""
+    try:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            await run_lm_studio_chat(
+                client, model=model, messages=messages, temperature=0.0, max_tokens=1, priority="background"
+            )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[speculate] warm request failed: {e}")
+
+
+def _cancel_speculation(spec: Dict[str, Any]) -> None:
+    task = spec.get("warm_task")
+    if task is not None and not task.done():
+        task.cancel()
+
+
+async def start_speculation(req: ChatRequest) -> Dict[str, Any]:
+    session = req.session_id or "default"
+    prefix = normalize_transcript(req.message)
+    if not CONFIG.get("speculative_enabled", True) or req.images:
+        return {"status": "disabled"}
+    if len(prefix) < int(CONFIG.get("speculative_min_chars", 12)):
+        return {"status": "too_short"}
+
+    spec = SPECULATIONS.get(session)
+    if spec and spec["prefix"] == prefix:
+        return {"status": "unchanged", "count": spec["count"]}
+
+    count = spec["count"] if spec else 0
+    if count >= max(0, int(CONFIG.get("speculative_max_per_turn", 3))):
+        SPECULATION_STATS["budget_exhausted"] += 1
+        return {"status": "budget_exhausted", "count": count}
+    if spec:
+        _cancel_speculation(spec)
+
+    memory_limit = chat_memory_limit(req.include_audio)
+    memories = await recall_memories(req.message, limit=memory_limit) if memory_limit > 0 else []
+
+    model = (req.model_id or "").strip() or (
+        CONFIG["voice_model_id"] if req.include_audio else CONFIG["model_id"]
+    )
+    style_prompt = None
+    if req.include_audio:
+        _, profile_cfg, _ = select_voice_profile(
+            req.message, req.voice_profile, getattr(req, "latency_budget_s", None), model
+        )
+        style_prompt = voice_style_prompt(profile_cfg)
+    summary, history, _ = session_prompt_context(session, req.include_audio)
+    messages = assemble_chat_messages(
+        system_prompt=req.system_prompt or SYSTEM_PROMPT,
+        style_prompt=style_prompt,
+        history=history,
+        memories=memories,
+        user_content=req.message,
+        summary=summary,
+    )
+
+    # A newer interim may have landed while memories were being recalled.
+    superseded = SPECULATIONS.get(session)
+    if superseded is not None:
+        _cancel_speculation(superseded)
+    SPECULATIONS[session] = {
+        "prefix": prefix,
+        "count": count + 1,
+        "model": model,
+        "memories": memories,
+        "memory_limit": memory_limit,
+        "started_at": time.perf_counter(),
+        "warm_task": asyncio.create_task(_speculative_warm(model, messages)),
+    }
+    SPECULATION_STATS["started"] += 1
+    return {"status": "started", "count": count + 1, "memories": len(memories)}
+
+
+def take_speculation(session: str, message: str, model: str, memory_limit: int) -> Dict[str, Any] | None:
+    """Commit the session's speculation if the final transcript extends its prefix."""
+    spec = SPECULATIONS.pop(session, None)
+    if spec is None:
+        return None
+
+    age = time.perf_counter() - float(spec["started_at"])
+    final = normalize_transcript(message)
+    if age > float(CONFIG.get("speculative_ttl_s", 15.0)):
+        SPECULATION_STATS["expired"] += 1
+        _cancel_speculation(spec)
+        return None
+    if final.startswith(spec["prefix"]) and spec["model"] == model and spec["memory_limit"] == memory_limit:
+        SPECULATION_STATS["hits"] += 1
+        spec["outcome"] = "hit" if final == spec["prefix"] else "prefix_hit"
+        return spec
+
+    SPECULATION_STATS["misses"] += 1
+    _cancel_speculation(spec)
+    return {"outcome": "miss"}
+
+
+@app.post("/memory/maintenance")
+async def memory_maintenance_now(dry_run: bool = False):
+    """Run memory dedupe/retention/compaction now and return the before/after report."""
+    return await run_memory_maintenance(dry_run=dry_run)
+
+
+@app.post("/chat/speculate")
+async def chat_speculate(req: ChatRequest):
+    """Warm the LLM prompt cache and memory recall for an interim transcript."""
+    result = await start_speculation(req)
+    result["stats"] = speculation_stats()
+    return result
 
 
 @app.post("/chat")
 async def chat(req: ChatRequest):
-    global conversation_history
     print(
         f"📩 Incoming request: msg='{req.message[:50]}...' images={len(req.images) if req.images else 0}"
     )
 
-    memory_limit = 3
-    if req.include_audio:
-        memory_limit = max(0, int(CONFIG.get("voice_memory_limit", 1)))
+    session = req.session_id or "default"
+    memory_limit = 0 if req.stateless else chat_memory_limit(req.include_audio)
+    requested_model = (req.model_id or "").strip()
+    speculation = None
+    if not req.images and not req.stateless:
+        speculated_model = requested_model or (
+            CONFIG["voice_model_id"] if req.include_audio else CONFIG["model_id"]
+        )
+        speculation = take_speculation(session, req.message, speculated_model, memory_limit)
 
     memories: List[Dict[str, Any]] = []
-    if memory_limit > 0:
+    if speculation and speculation.get("outcome") != "miss":
+        # Reuse memories recalled for the interim transcript; the warm request has
+        # already pushed this prompt prefix through LM Studio.
+        memories = list(speculation.get("memories") or [])
+    elif memory_limit > 0:
         memories = await recall_memories(req.message, limit=memory_limit)
 
-    current_system_prompt = req.system_prompt or SYSTEM_PROMPT
-    messages = [{"role": "system", "content": current_system_prompt}]
-
-    if memories:
-        mem_text = "\n".join([f"- {m.get('memory', '')}" for m in memories])
-        messages.append(
-            {"role": "system", "content": f"Relevant memories:\n{mem_text}"}
-        )
+    voice_profile_name = "chat"
+    voice_profile_cfg = VOICE_PROFILES["chat"]
+    voice_profile_meta: Dict[str, Any] | None = None
+    temperature = CONFIG["temperature"]
+    max_tokens = CONFIG["max_tokens"]
+    style_prompt = None
 
-    # Keep history window bounded to reduce prompt latency.
-    history_window = max(0, int(CONFIG.get("max_history_messages", 6)))
     if req.include_audio:
-        history_window = max(0, int(CONFIG.get("voice_max_history_messages", 2)))
-    if history_window > 0:
-        messages.extend(conversation_history[-history_window:])
+        voice_profile_name, voice_profile_cfg, voice_profile_meta = select_voice_profile(
+            req.message,
+            req.voice_profile,
+            getattr(req, "latency_budget_s", None),
+            requested_model or CONFIG["voice_model_id"],
+        )
+        temperature = float(voice_profile_cfg.get("temperature", CONFIG["temperature"]))
+        max_tokens = int(voice_profile_cfg.get("max_tokens", CONFIG["voice_max_tokens"]))
+        style_prompt = voice_style_prompt(voice_profile_cfg)
 
     # Handle Multimodal Content
-    requested_model = (req.model_id or "").strip()
+    prompt_reuse: Dict[str, Any] = {}
+    history_metrics: Dict[str, Any] = {}
 
     if req.images:
         print(f"📸 Received {len(req.images)} images. Switching to vision model.")
@@ -788,29 +2098,31 @@ async def chat(req: ChatRequest):
         else:
             model_to_use = CONFIG["vision_model_id"]
     else:
-        messages.append({"role": "user", "content": req.message})
+        # Keep history window bounded to reduce prompt latency; older turns arrive
+        # through the session summary instead.
+        if req.stateless:
+            summary, history = None, []
+        else:
+            summary, history, history_metrics = session_prompt_context(session, req.include_audio)
+        messages = assemble_chat_messages(
+            system_prompt=req.system_prompt or SYSTEM_PROMPT,
+            style_prompt=style_prompt,
+            history=history,
+            memories=memories,
+            user_content=req.message,
+            summary=summary,
+        )
+        prompt_reuse = measure_prompt_prefix_reuse(session, messages)
         if requested_model:
             model_to_use = requested_model
         else:
             model_to_use = CONFIG["voice_model_id"] if req.include_audio else CONFIG["model_id"]
 
-    voice_profile_name = "chat"
-    voice_profile_cfg = VOICE_PROFILES["chat"]
-    voice_profile_meta: Dict[str, Any] | None = None
-    temperature = CONFIG["temperature"]
-    max_tokens = CONFIG["max_tokens"]
-
+    reply_limit = None
     if req.include_audio:
-        voice_profile_name, voice_profile_cfg, voice_profile_meta = select_voice_profile(
-            req.message, req.voice_profile
-        )
-        temperature = float(voice_profile_cfg.get("temperature", CONFIG["temperature"]))
-        max_tokens = int(voice_profile_cfg.get("max_tokens", CONFIG["voice_max_tokens"]))
-        messages.append(
-            {
-                "role": "system",
-                "content": str(voice_profile_cfg.get("style_prompt", CONFIG["voice_reply_style"])),
-            }
+        reply_limit = (
+            int(voice_profile_cfg.get("max_words", CONFIG.get("voice_max_words", 70))),
+            int(voice_profile_cfg.get("max_sentences", CONFIG.get("voice_max_sentences", 4))),
         )
 
     print(f"🤖 Using model: {model_to_use}")
@@ -819,45 +2131,96 @@ async def chat(req: ChatRequest):
         f"profile={voice_profile_name} temp={temperature}"
     )
 
-    try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response_text, lm_metrics = await run_lm_studio_chat(
+    async def _generate(client: httpx.AsyncClient) -> tuple[str, Dict[str, Any], str]:
+        model_to_use = model_selected
+        fallback_model = str(CONFIG.get("lm_fallback_model_id", "")).strip()
+        can_fail_over = bool(fallback_model) and fallback_model.lower() != model_to_use.lower()
+        demoted_model = None
+        if can_fail_over and is_model_demoted(model_to_use):
+            print(f"[warn] Model '{model_to_use}' is demoted for garbled output; using '{fallback_model}'")
+            demoted_model, model_to_use = model_to_use, fallback_model
+            can_fail_over = False
+
+        lm_priority = "voice" if req.include_audio else "text"
+        first_token_deadline_s = float(CONFIG.get("text_first_token_deadline_s", 0.0))
+        if req.include_audio:
+            first_token_deadline_s = float(
+                voice_profile_cfg.get(
+                    "first_token_deadline_s", CONFIG.get("voice_first_token_deadline_s", 0.0)
+                )
+            )
+        response_text, lm_metrics, garbled = await run_hedged_lm_chat(
+            client,
+            first_token_deadline_s=first_token_deadline_s if not req.images else 0.0,
+            model=model_to_use,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            reply_limit=reply_limit,
+            priority=lm_priority,
+        )
+        model_to_use = lm_metrics.get("llm_model_used", model_to_use)
+        if garbled:
+            print("[warn] Garbled/empty LM response detected; retrying with strict English rescue prompt")
+            rescue_messages = list(messages)
+            rescue_messages.append(
+                {
+                    "role": "system",
+                    "content": "Respond in plain English only. Use normal punctuation and no markdown.",
+                }
+            )
+            response_text, lm_metrics, garbled = await run_guarded_lm_chat(
                 client,
                 model=model_to_use,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+                messages=rescue_messages,
+                temperature=min(float(temperature), 0.4),
+                max_tokens=min(int(max_tokens), 256),
+                reply_limit=reply_limit,
+                priority=lm_priority,
             )
-            if looks_like_garbled_response(response_text):
-                print("[warn] Garbled/empty LM response detected; retrying with strict English rescue prompt")
-                rescue_messages = list(messages)
-                rescue_messages.append(
-                    {
-                        "role": "system",
-                        "content": "Respond in plain English only. Use normal punctuation and no markdown.",
-                    }
-                )
+            lm_metrics["llm_retry"] = "english_rescue"
+            if garbled and can_fail_over:
+                print(f"[warn] Rescue response still garbled; retrying on fallback model '{fallback_model}'")
                 response_text, lm_metrics = await run_lm_studio_chat(
                     client,
-                    model=model_to_use,
+                    model=fallback_model,
                     messages=rescue_messages,
-                    temperature=min(float(temperature), 0.4),
+                    temperature=min(float(temperature), 0.35),
                     max_tokens=min(int(max_tokens), 256),
+                    reply_limit=reply_limit,
+                    priority=lm_priority,
+                )
+                lm_metrics["llm_retry"] = "fallback_model"
+                lm_metrics["fallback_model"] = fallback_model
+                model_to_use = fallback_model
+        if demoted_model:
+            lm_metrics["demoted_model"] = demoted_model
+        return response_text, lm_metrics, model_to_use
+
+    model_selected = model_to_use
+
+    cache_key = None
+    if (
+        CONFIG["response_cache_enabled"]
+        and not req.include_audio
+        and not req.images
+        and float(temperature) <= float(CONFIG["response_cache_max_temperature"])
+    ):
+        cache_key = response_cache_key(model_to_use, messages, temperature, max_tokens)
+
+    try:
+        async with httpx.AsyncClient(timeout=300.0) as client:
+            cache_status = None
+            if cache_key:
+                (response_text, lm_metrics, model_to_use), cache_status = await cached_generation(
+                    cache_key, lambda: _generate(client)
                 )
-                lm_metrics["llm_retry"] = "english_rescue"
-                if looks_like_garbled_response(response_text):
-                    fallback_model = str(CONFIG.get("lm_fallback_model_id", "")).strip()
-                    if fallback_model and fallback_model.lower() != model_to_use.lower():
-                        print(f"[warn] Rescue response still garbled; retrying on fallback model '{fallback_model}'")
-                        response_text, lm_metrics = await run_lm_studio_chat(
-                            client,
-                            model=fallback_model,
-                            messages=rescue_messages,
-                            temperature=min(float(temperature), 0.35),
-                            max_tokens=min(int(max_tokens), 256),
-                        )
-                        lm_metrics["llm_retry"] = "fallback_model"
-                        lm_metrics["fallback_model"] = fallback_model
+            else:
+                response_text, lm_metrics, model_to_use = await _generate(client)
+            # Cached results are shared between requests; never mutate them in place.
+            lm_metrics = dict(lm_metrics)
+            if cache_status:
+                lm_metrics["response_cache"] = cache_status
 
             prompt_tokens = lm_metrics.get("prompt_tokens")
             completion_tokens = lm_metrics.get("completion_tokens")
@@ -866,25 +2229,39 @@ async def chat(req: ChatRequest):
                 "⏱️ LLM metrics "
                 f"mode={lm_metrics.get('llm_mode')} total={lm_metrics.get('llm_total_s')}s "
                 f"first={lm_metrics.get('llm_first_token_s')}s "
-                f"prompt_toks={prompt_tokens} completion_toks={completion_tokens} tok/s={tok_per_s}"
+                f"prompt_toks={prompt_tokens} completion_toks={completion_tokens} tok/s={tok_per_s} "
+                f"prefix_reuse={prompt_reuse.get('prompt_prefix_reuse_ratio')} "
+                f"early_stop={lm_metrics.get('llm_early_stop')} saved_toks={lm_metrics.get('tokens_saved_est')}"
             )
-            if req.include_audio:
-                update_voice_runtime_from_metrics(lm_metrics, voice_profile_name)
-                response_text = compact_voice_reply(
-                    response_text,
-                    int(voice_profile_cfg.get("max_words", CONFIG.get("voice_max_words", 70))),
-                    int(voice_profile_cfg.get("max_sentences", CONFIG.get("voice_max_sentences", 4))),
+            if speculation:
+                lm_metrics["speculation"] = speculation.get("outcome")
+            if prompt_reuse:
+                lm_metrics.update(prompt_reuse)
+                record_prompt_cache_timing(
+                    prompt_reuse["prompt_prefix_reuse_ratio"], lm_metrics.get("llm_first_token_s")
                 )
-
-        conversation_history.append({"role": "user", "content": req.message})
-        conversation_history.append({"role": "assistant", "content": response_text})
-        # Memory persistence is best-effort and should not block chat latency.
-        asyncio.create_task(
-            store_memory(f"User: {req.message[:100]}. Knight: {response_text[:200]}")
-        )
+            if history_metrics:
+                lm_metrics.update(history_metrics)
+                HISTORY_SUMMARY_STATS["turns_with_summary"] += 1
+                HISTORY_SUMMARY_STATS["prompt_tokens_saved_est"] += history_metrics["prompt_tokens_saved_est"]
+            if req.include_audio:
+                update_voice_runtime_from_metrics(lm_metrics, voice_profile_name, model_to_use)
+                response_text = compact_voice_reply(response_text, *reply_limit)
+
+        if cache_status in (None, "miss") and not req.stateless:
+            # A cache hit or coalesced request replays a turn that is already recorded.
+            history_log = session_history(session)
+            history_log.append({"role": "user", "content": req.message})
+            history_log.append({"role": "assistant", "content": response_text})
+            schedule_history_compaction(session)
+            # Memory persistence is best-effort and should not block chat latency.
+            asyncio.create_task(
+                store_memory(f"User: {req.message[:100]}. Knight: {response_text[:200]}", invalidate_recall=False)
+            )
 
         payload: Dict[str, Any] = {
             "text": response_text,
+            "model": model_to_use,
             "memories_used": len(memories),
             "metrics": lm_metrics,
         }
@@ -896,6 +2273,8 @@ async def chat(req: ChatRequest):
                 "last_llm_first_token_s": VOICE_RUNTIME.get("last_llm_first_token_s"),
                 "samples": VOICE_RUNTIME.get("samples", 0),
                 "last_profile": VOICE_RUNTIME.get("last_profile", "chat"),
+                "pipeline_overhead_s_ema": VOICE_RUNTIME.get("pipeline_overhead_s_ema"),
+                "pipeline_first_audio_s_ema": VOICE_RUNTIME.get("pipeline_first_audio_s_ema"),
             }
         return payload
     except httpx.TimeoutException:
@@ -906,6 +2285,9 @@ async def chat(req: ChatRequest):
         )
         print(f"⏱️ {detail}")
         raise HTTPException(status_code=504, detail=detail)
+    except LMAdmissionRejected as e:
+        print(f"🚦 {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
 
@@ -914,6 +2296,41 @@ async def chat(req: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _accept_voice_turn(req: VoiceTurnRequest) -> None:
+    """Checks shared by every voice-turn endpoint: contract version and session id."""
+    if req.api_version not in VOICE_TURN_API_VERSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported voice turn api_version={req.api_version}; "
+            f"supported={sorted(VOICE_TURN_API_VERSIONS)}",
+        )
+    if not req.session_id and req.room_id:
+        req.session_id = req.room_id
+
+
+@app.post("/voice/turn")
+async def voice_turn(req: VoiceTurnRequest):
+    """Realtime voice turn: voice model, profiles, compact replies and pipeline feedback."""
+    _accept_voice_turn(req)
+    if req.last_turn is not None:
+        update_voice_runtime_from_pipeline(req.last_turn)
+
+    print(f"🎙️ Voice turn room={req.room_id} turn={req.turn_id} budget={req.latency_budget_s}")
+    payload = await chat(req)
+    payload["api_version"] = req.api_version
+    payload["turn_id"] = req.turn_id
+    return payload
+
+
+@app.post("/voice/turn/speculate")
+async def voice_turn_speculate(req: VoiceTurnRequest):
+    """Speculative prefill with the same voice-turn fields /voice/turn will receive."""
+    _accept_voice_turn(req)
+    result = await start_speculation(req)
+    result["stats"] = speculation_stats()
+    return result
+
+
 @app.get("/config")
 async def get_config():
     return {
@@ -933,18 +2350,64 @@ async def get_config():
         "voice_latency_target_s": CONFIG["voice_latency_target_s"],
         "voice_latency_critical_s": CONFIG["voice_latency_critical_s"],
         "voice_latency_fast_s": CONFIG["voice_latency_fast_s"],
+        "voice_latency_percentile": CONFIG["voice_latency_percentile"],
+        "voice_perf": LM_PERF.snapshot(CONFIG["voice_latency_percentile"]),
         "voice_explicit_profile_strict": CONFIG["voice_explicit_profile_strict"],
         "voice_max_history_messages": CONFIG["voice_max_history_messages"],
         "voice_memory_limit": CONFIG["voice_memory_limit"],
         "voice_profiles": VOICE_PROFILES,
         "voice_runtime": VOICE_RUNTIME,
         "max_history_messages": CONFIG["max_history_messages"],
+        "speculative_enabled": CONFIG["speculative_enabled"],
+        "speculative_max_per_turn": CONFIG["speculative_max_per_turn"],
+        "speculation": speculation_stats(),
+        "history_cache_stride": CONFIG["history_cache_stride"],
+        "prompt_cache": prompt_cache_stats(),
+        "lm_early_stop": LM_EARLY_STOP_STATS,
+        "lm_model_quality": model_quality_stats(),
+        "voice_first_token_deadline_s": CONFIG["voice_first_token_deadline_s"],
+        "text_first_token_deadline_s": CONFIG["text_first_token_deadline_s"],
+        "lm_hedge": hedge_stats(),
+        "history_summary_enabled": CONFIG["history_summary_enabled"],
+        "history_summary_max_tokens": CONFIG["history_summary_max_tokens"],
+        "history_summary": history_summary_stats(),
+        "response_cache_enabled": CONFIG["response_cache_enabled"],
+        "response_cache_ttl_s": CONFIG["response_cache_ttl_s"],
+        "response_cache_max_temperature": CONFIG["response_cache_max_temperature"],
+        "response_cache": response_cache_stats(),
+        "recall_cache_ttl_s": CONFIG["recall_cache_ttl_s"],
+        "recall_cache": recall_cache_stats(),
+        "memory_maintenance_interval_h": CONFIG["memory_maintenance_interval_h"],
+        "memory_rules": CONFIG["memory_rules"],
+        "memory_maintenance": MEMORY_MAINTENANCE_STATS,
+        "lm_max_concurrency": CONFIG["lm_max_concurrency"],
+        "lm_admission_policies": CONFIG["lm_admission_policies"],
+        "lm_backends": LM_POOL.snapshot(),
     }
 
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "lm_backends": {b.name: b.healthy for b in LM_POOL.backends},
+        "lm_queue_depth": {b.name: b.admission.queued for b in LM_POOL.backends},
+        "mem0": {
+            "state": MEM0_HEALTH["state"],
+            "consecutive_failures": MEM0_HEALTH["consecutive_failures"],
+            "backoff_s": MEM0_HEALTH["backoff_s"],
+            "next_probe_in_s": (
+                round(max(0.0, MEM0_HEALTH["next_probe_at"] - time.time()), 1)
+                if MEM0_HEALTH["next_probe_at"]
+                else None
+            ),
+            "last_ok_at": MEM0_HEALTH["last_ok_at"],
+            "last_error": MEM0_HEALTH["last_error"],
+            "opened_at": MEM0_HEALTH["opened_at"],
+            "skipped_calls": MEM0_HEALTH["skipped_calls"],
+        },
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""KnightBot per-(model, voice profile) LLM performance store.
+
+Time-to-first-token and decode throughput are kept as log-bucketed histograms for
+every (model, profile) pair, plus a per-model aggregate used while a specific pair
+has few samples. Old samples decay so the store follows the backend as it warms up,
+gets busier or swaps quantization. State is persisted as JSON so adaptation does
+not start cold after a restart.
+
+Usage:
+    store = LMPerfStore.load(Path("F:/KnightBot/data/voice_perf.json"))
+    store.record("qwen3-4b", "chat", first_token_s=0.42, tok_per_s=38.0)
+    store.predict_total_s("qwen3-4b", "story", max_tokens=520, percentile=0.9)
+"""
+
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+ANY_PROFILE = "*"
+
+
+class LogHistogram:
+    """Fixed log-spaced buckets over [lo, hi] with exponentially decayed counts."""
+
+    def __init__(self, lo: float, hi: float, buckets: int = 40, counts: list[float] | None = None):
+        self.lo = lo
+        self.hi = hi
+        self.buckets = buckets
+        self._log_lo = math.log(lo)
+        self._step = (math.log(hi) - self._log_lo) / buckets
+        self.counts = list(counts) if counts and len(counts) == buckets else [0.0] * buckets
+
+    @property
+    def total(self) -> float:
+        return sum(self.counts)
+
+    def _edge(self, i: float) -> float:
+        return math.exp(self._log_lo + i * self._step)
+
+    def add(self, value: float, decay: float = 1.0) -> None:
+        if decay < 1.0:
+            self.counts = [c * decay for c in self.counts]
+        value = min(max(float(value), self.lo), self.hi)
+        idx = min(self.buckets - 1, int((math.log(value) - self._log_lo) / self._step))
+        self.counts[idx] += 1.0
+
+    def quantile(self, q: float) -> float | None:
+        total = self.total
+        if total <= 0:
+            return None
+        target = max(0.0, min(1.0, q)) * total
+        running = 0.0
+        for i, c in enumerate(self.counts):
+            if c <= 0:
+                continue
+            if running + c >= target:
+                # Geometric interpolation inside the bucket.
+                frac = (target - running) / c
+                return self._edge(i + frac)
+            running += c
+        return self.hi
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"lo": self.lo, "hi": self.hi, "buckets": self.buckets, "counts": [round(c, 4) for c in self.counts]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogHistogram":
+        return cls(float(data["lo"]), float(data["hi"]), int(data["buckets"]), data.get("counts"))
+
+
+def _ttft_histogram() -> LogHistogram:
+    return LogHistogram(0.03, 60.0)
+
+
+def _tps_histogram() -> LogHistogram:
+    return LogHistogram(1.0, 500.0)
+
+
+class LMPerfStore:
+    def __init__(self, path: Path | None = None, decay: float = 0.98, min_samples: int = 5):
+        self.path = path
+        self.decay = decay
+        self.min_samples = min_samples
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = 0
+
+    @staticmethod
+    def _key(model: str, profile: str) -> str:
+        return f"{(model or '').lower()}|{profile}"
+
+    def _entry(self, model: str, profile: str) -> Dict[str, Any]:
+        key = self._key(model, profile)
+        if key not in self.entries:
+            self.entries[key] = {
+                "samples": 0,
+                "updated_at": None,
+                "ttft_s": _ttft_histogram(),
+                "tok_per_s": _tps_histogram(),
+            }
+        return self.entries[key]
+
+    def record(self, model: str, profile: str, first_token_s: float | None, tok_per_s: float | None) -> None:
+        for p in {profile, ANY_PROFILE}:
+            entry = self._entry(model, p)
+            if isinstance(first_token_s, (int, float)) and first_token_s > 0:
+                entry["ttft_s"].add(first_token_s, self.decay)
+            if isinstance(tok_per_s, (int, float)) and tok_per_s > 0:
+                entry["tok_per_s"].add(tok_per_s, self.decay)
+            entry["samples"] += 1
+            entry["updated_at"] = time.time()
+        self.dirty += 1
+
+    def _usable(self, model: str, profile: str) -> Dict[str, Any] | None:
+        for p in (profile, ANY_PROFILE):
+            entry = self.entries.get(self._key(model, p))
+            if entry and entry["samples"] >= self.min_samples and entry["tok_per_s"].total > 0:
+                return entry
+        return None
+
+    def predict(self, model: str, profile: str, percentile: float) -> tuple[float, float] | None:
+        """(first_token_s, tok_per_s) at `percentile` of slowness, or None when cold."""
+        entry = self._usable(model, profile)
+        if entry is None:
+            return None
+        ttft = entry["ttft_s"].quantile(percentile)
+        # Slow decode is the low end of the throughput distribution.
+        tps = entry["tok_per_s"].quantile(1.0 - percentile)
+        if ttft is None or not tps:
+            return None
+        return ttft, tps
+
+    def predict_total_s(self, model: str, profile: str, max_tokens: int, percentile: float) -> float | None:
+        pred = self.predict(model, profile, percentile)
+        if pred is None:
+            return None
+        ttft, tps = pred
+        return ttft + (max_tokens / tps)
+
+    def token_budget(self, model: str, profile: str, budget_s: float, percentile: float) -> int | None:
+        """Largest max_tokens whose predicted completion fits in `budget_s`."""
+        pred = self.predict(model, profile, percentile)
+        if pred is None:
+            return None
+        ttft, tps = pred
+        return max(0, int((budget_s - ttft) * tps))
+
+    def snapshot(self, percentile: float = 0.9) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key, entry in self.entries.items():
+            ttft = entry["ttft_s"].quantile(percentile)
+            tps = entry["tok_per_s"].quantile(1.0 - percentile)
+            out[key] = {
+                "samples": entry["samples"],
+                "ttft_s_p50": round(entry["ttft_s"].quantile(0.5), 3) if ttft is not None else None,
+                f"ttft_s_p{round(percentile * 100)}": round(ttft, 3) if ttft is not None else None,
+                "tok_per_s_p50": round(entry["tok_per_s"].quantile(0.5), 2) if tps is not None else None,
+                f"tok_per_s_p{round((1.0 - percentile) * 100)}": round(tps, 2) if tps is not None else None,
+            }
+        return out
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data = {
+            "version": 1,
+            "entries": {
+                key: {
+                    "samples": e["samples"],
+                    "updated_at": e["updated_at"],
+                    "ttft_s": e["ttft_s"].to_dict(),
+                    "tok_per_s": e["tok_per_s"].to_dict(),
+                }
+                for key, e in self.entries.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.dirty = 0
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "LMPerfStore":
+        store = cls(path, **kwargs)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return store
+        except Exception as e:
+            print(f"[lm-perf] ignoring unreadable {path}: {e}")
+            return store
+        for key, e in (data.get("entries") or {}).items():
+            try:
+                store.entries[key] = {
+                    "samples": int(e.get("samples", 0)),
+                    "updated_at": e.get("updated_at"),
+                    "ttft_s": LogHistogram.from_dict(e["ttft_s"]),
+                    "tok_per_s": LogHistogram.from_dict(e["tok_per_s"]),
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+        return store
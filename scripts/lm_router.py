@@ -0,0 +1,358 @@
+"""KnightBot LLM backend pool for Knight Core.
+
+Tracks several LM Studio / OpenAI-compatible servers: the models each one serves
+(probed from `/v1/models`), live health, in-flight requests and per-model latency
+and throughput. `candidates()` orders backends for a request so Knight Core can
+route to the least-loaded or fastest-expected box and fail over automatically.
+
+Each backend also owns an admission controller: a concurrency limit with a
+priority queue (voice > text > background), slots reserved for voice, and
+per-class queue deadlines that either shed the request or admit it downgraded.
+
+Usage:
+    pool = LMBackendPool(["http://box-a:1234/v1", "http://box-b:1234/v1"])
+    for backend in pool.candidates("qwen3-4b", max_tokens=260):
+        ticket = await pool.admit(backend, "voice")
+        with pool.lease(backend, "qwen3-4b") as lease:  # releases the admission slot
+            ...
+            lease.record(first_token_s=0.4, total_s=2.1, completion_tokens=120)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+from urllib.parse import urlparse
+
+import httpx
+
+
+class LMBackendError(Exception):
+    """Backend answered, but with an error that another backend might not have."""
+
+
+class LMAdmissionRejected(Exception):
+    """Request was shed because it waited past its class's queue deadline."""
+
+    def __init__(self, priority: str, waited_s: float):
+        super().__init__(f"LLM backend busy: {priority} request shed after {waited_s:.2f}s in queue")
+        self.priority = priority
+        self.waited_s = waited_s
+
+
+# Lower rank is served first.
+PRIORITY_CLASSES = {"voice": 0, "text": 1, "background": 2}
+
+
+class AdmissionTicket:
+    def __init__(self, priority: str, waited_s: float, downgraded: bool):
+        self.priority = priority
+        self.waited_s = waited_s
+        self.downgraded = downgraded
+
+
+class LMAdmissionController:
+    """Concurrency limit with a priority queue and per-class queue deadlines.
+
+    `policies` maps a class to (deadline_s, action[, max_wait_s]). When a queued request
+    passes its deadline, "shed" rejects it and "downgrade" keeps it queued but flags the
+    ticket so the caller can shrink the request. Anything still queued at the class's
+    `max_wait_s` (default: the controller's) is shed regardless.
+
+    `voice_reserve` slots are kept for voice: text and background requests never take
+    more than `limit - voice_reserve` slots, so long generations cannot block voice.
+    With a limit of 1 nothing can be reserved.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        policies: Dict[str, tuple],
+        max_wait_s: float,
+        voice_reserve: int = 1,
+    ):
+        self.limit = max(1, int(limit))
+        self.policies = policies
+        self.max_wait_s = max_wait_s
+        self.voice_reserve = max(0, min(int(voice_reserve), self.limit - 1))
+        self.active = 0
+        self._heap: list = []
+        self._seq = itertools.count()
+        self.max_depth = 0
+        self.stats: Dict[str, Dict[str, Any]] = {
+            name: {"admitted": 0, "shed": 0, "downgraded": 0, "waits": deque(maxlen=200)}
+            for name in PRIORITY_CLASSES
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, fut in self._heap if not fut.done())
+
+    def _cap(self, rank: int) -> int:
+        return self.limit if rank == PRIORITY_CLASSES["voice"] else self.limit - self.voice_reserve
+
+    def _grant_next(self) -> None:
+        # The heap is ordered by class, so once the head is over its cap so is the rest.
+        while self._heap:
+            rank, _, fut = self._heap[0]
+            if fut.done():
+                heapq.heappop(self._heap)
+                continue
+            if self.active >= self._cap(rank):
+                return
+            heapq.heappop(self._heap)
+            self.active += 1
+            fut.set_result(True)
+
+    async def acquire(self, priority: str) -> AdmissionTicket:
+        priority = priority if priority in PRIORITY_CLASSES else "text"
+        rank = PRIORITY_CLASSES[priority]
+        stats = self.stats[priority]
+        started = time.perf_counter()
+        downgraded = False
+
+        ahead = any(r <= rank and not f.done() for r, _, f in self._heap)
+        if self.active < self._cap(rank) and not ahead:
+            self.active += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._heap, (rank, next(self._seq), fut))
+            self.max_depth = max(self.max_depth, self.queued)
+            policy = self.policies.get(priority, (0.0, "shed"))
+            deadline_s, action = policy[0], policy[1]
+            max_wait_s = policy[2] if len(policy) > 2 and policy[2] > 0 else self.max_wait_s
+            try:
+                if deadline_s > 0:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(fut), deadline_s)
+                    except asyncio.TimeoutError:
+                        if action != "downgrade":
+                            raise
+                        downgraded = True
+                        remaining = max_wait_s - deadline_s
+                        if remaining <= 0:
+                            raise
+                        await asyncio.wait_for(asyncio.shield(fut), remaining)
+                else:
+                    await asyncio.wait_for(asyncio.shield(fut), max_wait_s)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if fut.done() and not fut.cancelled():
+                    # Granted in the same tick we gave up; hand the slot back.
+                    self.release()
+                else:
+                    fut.cancel()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                waited = time.perf_counter() - started
+                stats["shed"] += 1
+                stats["waits"].append(waited)
+                raise LMAdmissionRejected(priority, waited) from None
+
+        waited = time.perf_counter() - started
+        stats["admitted"] += 1
+        stats["downgraded"] += int(downgraded)
+        stats["waits"].append(waited)
+        return AdmissionTicket(priority, waited, downgraded)
+
+    def release(self) -> None:
+        self.active = max(0, self.active - 1)
+        self._grant_next()
+
+    def snapshot(self) -> Dict[str, Any]:
+        classes = {}
+        for name, st in self.stats.items():
+            waits = sorted(st["waits"])
+            classes[name] = {
+                "admitted": st["admitted"],
+                "shed": st["shed"],
+                "downgraded": st["downgraded"],
+                "wait_p50_s": round(waits[len(waits) // 2], 4) if waits else None,
+                "wait_p95_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else None,
+            }
+        return {
+            "limit": self.limit,
+            "voice_reserve": self.voice_reserve,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue_depth": self.max_depth,
+            "classes": classes,
+        }
+
+
+def _ema(prev: float | None, value: float, alpha: float = 0.3) -> float:
+    return value if prev is None else (alpha * value) + ((1.0 - alpha) * prev)
+
+
+class LMBackend:
+    def __init__(self, base_url: str, admission: LMAdmissionController):
+        self.url = base_url.strip().rstrip("/")
+        self.name = urlparse(self.url).netloc or self.url
+        self.admission = admission
+        self.models: set[str] = set()
+        self.healthy = True
+        self.inflight = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_probe_at: float | None = None
+        self.last_error: str | None = None
+        self.model_stats: Dict[str, Dict[str, Any]] = {}
+
+    def serves(self, model: str) -> bool:
+        return not self.models or model.lower() in self.models
+
+    def expected_latency_s(self, model: str, max_tokens: int) -> float | None:
+        stats = self.model_stats.get(model)
+        if not stats or stats.get("ttft_s_ema") is None:
+            return None
+        tok_per_s = stats.get("tok_per_s_ema") or 0.0
+        decode_s = (max_tokens / tok_per_s) if tok_per_s > 0 else 0.0
+        return float(stats["ttft_s_ema"]) + decode_s
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_probe_at": self.last_probe_at,
+            "models": sorted(self.models),
+            "model_stats": self.model_stats,
+            "admission": self.admission.snapshot(),
+        }
+
+
+class _Lease:
+    def __init__(self, backend: LMBackend, model: str):
+        self.backend = backend
+        self.model = model
+        self.ok = False
+
+    def record(self, first_token_s: float | None, total_s: float | None, completion_tokens: int | None) -> None:
+        self.ok = True
+        stats = self.backend.model_stats.setdefault(
+            self.model, {"requests": 0, "ttft_s_ema": None, "tok_per_s_ema": None}
+        )
+        stats["requests"] += 1
+        if isinstance(first_token_s, (int, float)) and first_token_s > 0:
+            stats["ttft_s_ema"] = round(_ema(stats["ttft_s_ema"], float(first_token_s)), 4)
+        if (
+            isinstance(total_s, (int, float))
+            and isinstance(first_token_s, (int, float))
+            and completion_tokens
+            and total_s > first_token_s
+        ):
+            tok_per_s = completion_tokens / (total_s - first_token_s)
+            stats["tok_per_s_ema"] = round(_ema(stats["tok_per_s_ema"], tok_per_s), 3)
+
+
+class LMBackendPool:
+    def __init__(
+        self,
+        urls: List[str],
+        *,
+        routing: str = "fastest",
+        probe_interval_s: float = 15.0,
+        failure_threshold: int = 2,
+        concurrency: int = 2,
+        concurrency_overrides: Dict[str, int] | None = None,
+        admission_policies: Dict[str, tuple] | None = None,
+        max_queue_wait_s: float = 180.0,
+        voice_reserve: int = 1,
+    ):
+        overrides = concurrency_overrides or {}
+        policies = admission_policies or {}
+        self.backends = []
+        for u in urls:
+            if not (u and u.strip()):
+                continue
+            netloc = urlparse(u.strip()).netloc
+            limit = overrides.get(netloc, overrides.get(u.strip().rstrip("/"), concurrency))
+            self.backends.append(
+                LMBackend(u, LMAdmissionController(limit, policies, max_queue_wait_s, voice_reserve))
+            )
+        self.routing = routing
+        self.probe_interval_s = probe_interval_s
+        self.failure_threshold = max(1, failure_threshold)
+
+    def candidates(self, model: str, max_tokens: int = 256) -> List[LMBackend]:
+        """Backends to try, best first. Unhealthy ones are kept last as a final resort."""
+        model_l = (model or "").lower()
+        measured = [e for b in self.backends if (e := b.expected_latency_s(model, max_tokens)) is not None]
+        typical = sum(measured) / len(measured) if measured else 0.0
+
+        def score(b: LMBackend) -> tuple:
+            # Same shape for every backend: (unhealthy, affinity, not_sampling, cost, load).
+            affinity = 0 if b.serves(model_l) else 1
+            expected = b.expected_latency_s(model, max_tokens)
+            load = b.admission.active + b.admission.queued
+            if self.routing == "least_loaded":
+                return (not b.healthy, affinity, 1, float(load), expected if expected is not None else typical)
+            # Idle untried backends go first so they get sampled; busy ones are costed
+            # at the pool's typical latency for this model.
+            sampling = expected is None and load == 0
+            cost = (expected if expected is not None else typical) * (1 + load / b.admission.limit)
+            return (not b.healthy, affinity, not sampling, cost, load)
+
+        return sorted(self.backends, key=score)
+
+    async def admit(self, backend: LMBackend, priority: str) -> AdmissionTicket:
+        return await backend.admission.acquire(priority)
+
+    @contextmanager
+    def lease(self, backend: LMBackend, model: str) -> Iterator[_Lease]:
+        lease = _Lease(backend, model)
+        backend.inflight += 1
+        try:
+            yield lease
+        finally:
+            backend.inflight -= 1
+            backend.admission.release()
+            if lease.ok:
+                self.mark_success(backend)
+
+    def mark_success(self, backend: LMBackend) -> None:
+        backend.consecutive_failures = 0
+        if not backend.healthy:
+            print(f"[lm-router] backend {backend.name} recovered")
+        backend.healthy = True
+
+    def mark_failure(self, backend: LMBackend, error: Exception) -> None:
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        backend.last_error = str(error)[:200]
+        if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+            backend.healthy = False
+            print(f"[lm-router] backend {backend.name} marked unhealthy: {backend.last_error}")
+
+    async def probe(self, client: httpx.AsyncClient, backend: LMBackend) -> None:
+        backend.last_probe_at = time.time()
+        try:
+            r = await client.get(f"{backend.url}/models", timeout=5.0)
+            if r.status_code != 200:
+                raise LMBackendError(f"/models returned {r.status_code}")
+            data = r.json().get("data") or []
+            backend.models = {str(m.get("id", "")).lower() for m in data if m.get("id")}
+            self.mark_success(backend)
+        except Exception as e:
+            # A failed probe alone takes the backend out of rotation immediately.
+            backend.consecutive_failures = max(backend.consecutive_failures, self.failure_threshold - 1)
+            self.mark_failure(backend, e)
+
+    async def probe_all(self) -> None:
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*(self.probe(client, b) for b in self.backends))
+
+    async def run_probe_loop(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.probe_interval_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "routing": self.routing,
+            "backends": {b.name: b.snapshot() for b in self.backends},
+        }
@@ -0,0 +1,308 @@
+"""KnightBot memory maintenance: near-duplicate removal, retention and SQLite upkeep.
+
+Knight Core stores a "User: ... Knight: ..." log line for every turn in both mem0 and
+the local SQLite fallback, so both stores grow without bound and recall gets slower
+and noisier. A maintenance run:
+
+  1. drops near-duplicate memories (word-shingle MinHash + LSH, verified by exact
+     Jaccard similarity), keeping the newest copy;
+  2. expires old turn logs by retention rules (low-value turns go sooner, the newest
+     `keep_latest` rows and non-turn memories are never expired);
+  3. runs incremental VACUUM and ANALYZE on knight_memory.db;
+  4. reports store size and local recall latency before and after.
+
+mem0 gets the same near-duplicate pass, best-effort, through the OpenMemory REST API.
+
+Knight Core schedules this in the background; it can also be run by hand:
+    python scripts/memory_maintenance.py --dry-run
+"""
+
+import argparse
+import asyncio
+import re
+import sqlite3
+import statistics
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+DEFAULT_DB = Path("F:/KnightBot/data/memory/knight_memory.db")
+
+DEFAULT_RULES: Dict[str, Any] = {
+    "dedupe_threshold": 0.85,
+    "retention_days": 90,
+    "low_value_days": 7,
+    "keep_latest": 200,
+}
+
+_TURN_LOG = re.compile(r"^User: (?P<user>.*?)\. Knight: ", re.S)
+_LOW_VALUE_USER = re.compile(
+    r"^(ok(ay)?|thanks?( you)?|thank you|yes|yeah|yep|no|nope|hi|hello|hey|bye|goodbye|"
+    r"cool|nice|great|sure|hmm+|uh+|um+|what|sorry)[.!? ]*$",
+    re.I,
+)
+
+_NUM_PERM = 64
+_BANDS = 16
+_MERSENNE = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240611)
+_PERM_A = _rng.integers(1, int(_MERSENNE), size=_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE), size=_NUM_PERM, dtype=np.uint64)
+
+
+def normalize_memory_text(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+", (text or "").lower())
+
+
+def shingles(text: str, k: int = 3) -> set:
+    words = normalize_memory_text(text)
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash_signature(shingle_set: set) -> np.ndarray:
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(_NUM_PERM, _MERSENNE, dtype=np.uint64)
+    # (a * h + b) mod p for every permutation at once; a, h < 2^32 so nothing overflows.
+    return ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE).min(axis=1)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def near_duplicates(texts: List[str], threshold: float) -> List[int]:
+    """Indices of texts that near-duplicate a later text (the later copy is kept)."""
+    sets = [shingles(t) for t in texts]
+    sigs = [minhash_signature(s) for s in sets]
+    rows = _NUM_PERM // _BANDS
+    buckets: Dict[tuple, List[int]] = {}
+    for idx, sig in enumerate(sigs):
+        if not sets[idx]:
+            continue
+        for band in range(_BANDS):
+            key = (band, sig[band * rows : (band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(idx)
+
+    drop: set = set()
+    checked: set = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i_pos, i in enumerate(members):
+            if i in drop:
+                continue
+            for j in members[i_pos + 1 :]:
+                pair = (i, j) if i < j else (j, i)
+                if pair in checked or j in drop:
+                    continue
+                checked.add(pair)
+                if jaccard(sets[i], sets[j]) >= threshold:
+                    drop.add(min(i, j))
+                    break
+    return sorted(drop)
+
+
+def is_low_value_turn(content: str) -> bool:
+    m = _TURN_LOG.match(content or "")
+    if not m:
+        return False
+    user = m.group("user").strip()
+    return bool(_LOW_VALUE_USER.match(user)) or len(normalize_memory_text(user)) <= 2
+
+
+def expired_ids(rows: List[sqlite3.Row], rules: Dict[str, Any], now: datetime) -> List[int]:
+    """Turn logs past retention; `rows` must be newest first."""
+    out = []
+    retention = timedelta(days=float(rules["retention_days"]))
+    low_value = timedelta(days=float(rules["low_value_days"]))
+    for pos, row in enumerate(rows):
+        if pos < int(rules["keep_latest"]) or not _TURN_LOG.match(row["content"] or ""):
+            continue
+        try:
+            age = now - datetime.fromisoformat(row["created_at"])
+        except (TypeError, ValueError):
+            continue
+        if age > retention or (age > low_value and is_low_value_turn(row["content"])):
+            out.append(int(row["id"]))
+    return out
+
+
+def _sample_queries(conn: sqlite3.Connection, user_id: str, n: int = 5) -> List[str]:
+    rows = conn.execute(
+        "SELECT content FROM memories WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, n)
+    ).fetchall()
+    queries = []
+    for (content,) in rows:
+        m = _TURN_LOG.match(content or "")
+        words = normalize_memory_text(m.group("user") if m else content)
+        if words:
+            queries.append(" ".join(words[:4]))
+    return queries
+
+
+def _timed_recall_ms(conn: sqlite3.Connection, user_id: str, query: str, limit: int = 3) -> float:
+    # Same shape as Knight Core's local_recall_memories query.
+    terms = query.split()
+    where = " OR ".join(["LOWER(content) LIKE LOWER(?)" for _ in terms])
+    started = time.perf_counter()
+    conn.execute(
+        f"SELECT content FROM memories WHERE user_id = ? AND ({where}) ORDER BY id DESC LIMIT ?",
+        [user_id, *[f"%{t}%" for t in terms], limit],
+    ).fetchall()
+    return (time.perf_counter() - started) * 1000.0
+
+
+def sqlite_stats(db_path: Path, user_id: str, queries: List[str]) -> Dict[str, Any]:
+    size = sum(p.stat().st_size for p in (db_path, Path(f"{db_path}-wal")) if p.exists())
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM memories WHERE user_id = ?", (user_id,)).fetchone()[0]
+        timings = [_timed_recall_ms(conn, user_id, q) for q in queries for _ in range(3)]
+    return {
+        "size_bytes": size,
+        "rows": rows,
+        "recall_ms_p50": round(statistics.median(timings), 3) if timings else None,
+    }
+
+
+def maintain_sqlite(
+    db_path: Path,
+    user_id: str,
+    rules: Dict[str, Any] | None = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    started = time.perf_counter()
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        queries = _sample_queries(conn, user_id)
+    before = sqlite_stats(db_path, user_id, queries)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT id, content, created_at FROM memories WHERE user_id = ? ORDER BY id DESC", (user_id,)
+        ).fetchall()
+        expired = set(expired_ids(rows, rules, datetime.now()))
+        # near_duplicates keeps the later text, so feed it oldest first.
+        survivors = [r for r in reversed(rows) if int(r["id"]) not in expired]
+        dup_idx = near_duplicates([r["content"] for r in survivors], float(rules["dedupe_threshold"]))
+        duplicates = {int(survivors[i]["id"]) for i in dup_idx}
+        if not dry_run and (expired or duplicates):
+            conn.executemany("DELETE FROM memories WHERE id = ?", [(i,) for i in expired | duplicates])
+            conn.commit()
+
+    if not dry_run:
+        # VACUUM cannot run inside a transaction.
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # One-time conversion; afterwards free pages are reclaimed incrementally.
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            else:
+                conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+
+    return {
+        "store": "sqlite",
+        "dry_run": dry_run,
+        "expired": len(expired),
+        "duplicates": len(duplicates),
+        "before": before,
+        "after": sqlite_stats(db_path, user_id, queries),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+async def dedupe_mem0(
+    client: httpx.AsyncClient,
+    base_url: str,
+    user_id: str,
+    threshold: float = DEFAULT_RULES["dedupe_threshold"],
+    dry_run: bool = False,
+    page_size: int = 100,
+) -> Dict[str, Any]:
+    """Best-effort near-duplicate removal through the OpenMemory REST API."""
+    started = time.perf_counter()
+    items: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        r = await client.post(
+            f"{base_url}/api/v1/memories/filter",
+            json={"user_id": user_id, "page": page, "size": page_size},
+        )
+        r.raise_for_status()
+        body = r.json()
+        batch = body.get("items") or []
+        items.extend(i for i in batch if i.get("id") and i.get("content"))
+        if not batch or page >= int(body.get("pages") or page):
+            break
+        page += 1
+
+    # Oldest first so the newest copy survives.
+    items.sort(key=lambda i: str(i.get("created_at") or ""))
+    dup_idx = near_duplicates([i["content"] for i in items], threshold)
+    ids = [str(items[i]["id"]) for i in dup_idx]
+    if ids and not dry_run:
+        r = await client.request(
+            "DELETE", f"{base_url}/api/v1/memories/", json={"memory_ids": ids, "user_id": user_id}
+        )
+        r.raise_for_status()
+    return {
+        "store": "mem0",
+        "dry_run": dry_run,
+        "memories": len(items),
+        "duplicates": len(ids),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deduplicate and expire KnightBot memories.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB)
+    parser.add_argument("--user-id", default="knight_user")
+    parser.add_argument("--mem0-url", default="http://localhost:8050", help="empty to skip mem0")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_RULES["dedupe_threshold"])
+    parser.add_argument("--retention-days", type=float, default=DEFAULT_RULES["retention_days"])
+    parser.add_argument("--low-value-days", type=float, default=DEFAULT_RULES["low_value_days"])
+    parser.add_argument("--keep-latest", type=int, default=DEFAULT_RULES["keep_latest"])
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed")
+    args = parser.parse_args()
+
+    rules = {
+        "dedupe_threshold": args.threshold,
+        "retention_days": args.retention_days,
+        "low_value_days": args.low_value_days,
+        "keep_latest": args.keep_latest,
+    }
+    if args.db.exists():
+        print(maintain_sqlite(args.db, args.user_id, rules, dry_run=args.dry_run))
+    else:
+        print(f"⚠️ {args.db} not found; skipping local store")
+
+    if args.mem0_url:
+
+        async def _mem0() -> None:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                print(await dedupe_mem0(client, args.mem0_url, args.user_id, args.threshold, args.dry_run))
+
+        try:
+            asyncio.run(_mem0())
+        except Exception as e:
+            print(f"⚠️ mem0 dedupe skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
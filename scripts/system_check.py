@@ -82,7 +82,9 @@ async def _run_voice_roundtrip_test(client: httpx.AsyncClient, audio_path: Path)
     print(f"✅ Round-trip STT transcript: {transcript[:80]!r}")
 
     # 2) Core chat
-    chat = await client.post("http://localhost:8100/chat", json={"message": transcript})
+    chat = await client.post(
+        "http://localhost:8100/chat", json={"message": transcript, "session_id": "system_check"}
+    )
     if chat.status_code != 200:
         print(f"❌ Round-trip Core chat failed: {chat.status_code} - {chat.text[:200]}")
         return False
@@ -160,7 +162,10 @@ async def check_services():
     try:
         async with httpx.AsyncClient(timeout=120.0) as client:
             r = await client.post(
-                "http://localhost:8100/chat", json={"message": "Say 'Test Successful'"}
+                "http://localhost:8100/chat",
+                # Stateless: no history or memories in the prompt and nothing recorded, so
+                # repeated runs send the same prompt and Core's response cache answers them.
+                json={"message": "Say 'Test Successful'", "session_id": "system_check", "stateless": True},
             )
             if r.status_code == 200:
                 print(f"✅ Core Chat Response: {r.json()['text'][:50]}...")
@@ -0,0 +1,329 @@
+"""KnightBot voice metrics report: latency breakdowns over the per-turn logs.
+
+Reads the turn records the pipeline writes to data/logs/voice_metrics/: the old
+one-file-per-turn `*.json`, the batched `turns-*.jsonl` files and `turns.db`. Records are
+streamed one at a time into fixed-size log-bucket sketches (about 1% relative error),
+so memory does not grow with the number of turns. It reports:
+
+  1. p50/p95/p99/max of each duration, grouped by session, model, profile or hour;
+  2. the slowest stage of each turn (which stage dominates, and the slowest turns);
+  3. with --baseline/--candidate, a diff of two time ranges, with regressions flagged.
+
+Usage:
+    python scripts/voice_metrics_report.py --by model --by hour
+    python scripts/voice_metrics_report.py --baseline 2026-10-01..2026-10-08 --candidate 2026-10-08.. --format csv
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+DEFAULT_DIR = Path(__file__).resolve().parents[1] / "data" / "logs" / "voice_metrics"
+
+DEFAULT_METRICS = (
+    "stt_s",
+    "llm_s",
+    "llm_total_s_backend",
+    "first_audio_s",
+    "stt_to_first_audio_s",
+    "llm_to_first_audio_s",
+    "perceived_first_audio_s",
+    "barge_in_commit_s",
+    "barge_in_to_transcript_s",
+    "interrupt_to_silence_s",
+)
+
+# Sequential stages of a turn, used to find where each turn spent its time.
+STAGES = ("stt_s", "llm_s", "first_audio_s")
+
+GROUP_KEYS = {
+    "all": lambda r: "all",
+    "session": lambda r: str(r.get("session_id") or "unknown"),
+    "room": lambda r: str(r.get("room_id") or "unknown"),
+    "model": lambda r: str(r.get("llm_model") or "unknown"),
+    "profile": lambda r: str(r.get("voice_profile") or "unknown"),
+    "hour": lambda r: datetime.fromtimestamp(record_time(r)).strftime("%Y-%m-%d %H:00") if record_time(r) else "unknown",
+}
+
+
+class QuantileSketch:
+    """Log-bucketed histogram: bounded memory, quantiles within `accuracy` relative error."""
+
+    def __init__(self, accuracy: float = 0.01, floor: float = 1e-4):
+        self.gamma = (1.0 + accuracy) / (1.0 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.floor = floor
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if value <= self.floor:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Bucket midpoint (in relative terms) keeps the error symmetric.
+                return min(2.0 * self.gamma**key / (self.gamma + 1.0), self.max)
+        return self.max
+
+
+def record_time(record: Dict[str, Any]) -> float | None:
+    for key in ("flushed_at", "created_at"):
+        value = record.get(key)
+        if isinstance(value, (int, float)) and value > 1e9:
+            return float(value)
+    return None
+
+
+def parse_range(text: str) -> Tuple[float | None, float | None]:
+    """'START..END' with ISO dates or datetimes; either side may be empty."""
+    start, sep, end = text.partition("..")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected START..END, got {text!r}")
+    try:
+        return (
+            datetime.fromisoformat(start).timestamp() if start else None,
+            datetime.fromisoformat(end).timestamp() if end else None,
+        )
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def in_range(t: float | None, rng: Tuple[float | None, float | None] | None) -> bool:
+    if rng is None:
+        return True
+    if t is None:
+        return False
+    start, end = rng
+    return (start is None or t >= start) and (end is None or t < end)
+
+
+def _input_files(paths: List[Path]) -> Iterator[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(p for p in path.iterdir() if p.suffix in (".json", ".jsonl", ".db"))
+        elif path.exists():
+            yield path
+        else:
+            print(f"⚠️ {path} not found", file=sys.stderr)
+
+
+def iter_records(paths: List[Path]) -> Iterator[Dict[str, Any]]:
+    """Every turn record in `paths`, one at a time."""
+    for path in _input_files(paths):
+        try:
+            if path.suffix == ".db":
+                conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+                try:
+                    for (raw,) in conn.execute("SELECT record FROM turns"):
+                        yield json.loads(raw)
+                finally:
+                    conn.close()
+            elif path.suffix == ".jsonl":
+                with path.open(encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            # A writer may have been killed mid-line.
+                            continue
+            else:
+                record = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(record, dict):
+                    yield record
+        except (OSError, sqlite3.Error, json.JSONDecodeError) as e:
+            print(f"⚠️ skipping {path}: {e}", file=sys.stderr)
+
+
+def _number(record: Dict[str, Any], key: str) -> float | None:
+    value = record.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+        return None
+    return float(value)
+
+
+class Report:
+    def __init__(self, group_by: List[str], metrics: List[str], slowest: int):
+        self.group_by = group_by
+        self.metrics = metrics
+        self.slowest = slowest
+        self.turns = 0
+        self.sketches: Dict[Tuple[str, str], QuantileSketch] = {}
+        self.stage_wins: Dict[str, int] = {}
+        self._slowest_heap: List[Tuple[float, str, int, str, float]] = []
+
+    def group(self, record: Dict[str, Any]) -> str:
+        return " / ".join(GROUP_KEYS[g](record) for g in self.group_by)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.turns += 1
+        group = self.group(record)
+        for metric in self.metrics:
+            value = _number(record, metric)
+            if value is not None:
+                self.sketches.setdefault((group, metric), QuantileSketch()).add(value)
+
+        stages = [(v, s) for s in STAGES if (v := _number(record, s)) is not None]
+        if not stages:
+            return
+        value, stage = max(stages)
+        self.stage_wins[stage] = self.stage_wins.get(stage, 0) + 1
+        total = _number(record, "stt_to_first_audio_s") or sum(v for v, _ in stages)
+        entry = (total, str(record.get("session_id") or ""), int(record.get("turn_id") or 0), stage, value)
+        if len(self._slowest_heap) < self.slowest:
+            heapq.heappush(self._slowest_heap, entry)
+        elif self.slowest:
+            heapq.heappushpop(self._slowest_heap, entry)
+
+    def rows(self) -> List[List[Any]]:
+        out = []
+        for (group, metric), sk in sorted(self.sketches.items()):
+            out.append([group, metric, sk.count, *(_fmt(sk.quantile(q)) for q in (0.5, 0.95, 0.99)), _fmt(sk.max)])
+        return out
+
+    def slowest_rows(self) -> List[List[Any]]:
+        return [
+            [session, turn_id, _fmt(total), stage, _fmt(value)]
+            for total, session, turn_id, stage, value in sorted(self._slowest_heap, reverse=True)
+        ]
+
+
+def _fmt(value: float | None) -> str:
+    return "" if value is None else f"{value:.3f}"
+
+
+def diff_rows(baseline: Report, candidate: Report, threshold: float, min_count: int) -> List[List[Any]]:
+    rows = []
+    for key in sorted(baseline.sketches.keys() | candidate.sketches.keys()):
+        base, cand = baseline.sketches.get(key), candidate.sketches.get(key)
+        if base is None or cand is None:
+            continue
+        b50, c50 = base.quantile(0.5), cand.quantile(0.5)
+        b95, c95 = base.quantile(0.95), cand.quantile(0.95)
+        change = (c95 - b95) / b95 if b95 else 0.0
+        flag = ""
+        if base.count >= min_count and cand.count >= min_count:
+            if change > threshold:
+                flag = "REGRESSION"
+            elif change < -threshold:
+                flag = "improved"
+        rows.append(
+            [*key, base.count, cand.count, _fmt(b50), _fmt(c50), _fmt(b95), _fmt(c95), f"{change * 100.0:+.1f}%", flag]
+        )
+    return rows
+
+
+def emit(title: str, header: List[str], rows: List[List[Any]], fmt: str) -> None:
+    if fmt == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["section", *header])
+        writer.writerows([title, *row] for row in rows)
+        return
+    print(f"\n== {title} ==")
+    if not rows:
+        print("(no data)")
+        return
+    cells = [header, *[[str(c) for c in row] for row in rows]]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(header))]
+    for n, row in enumerate(cells):
+        print("  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+        if n == 0:
+            print("  ".join("-" * w for w in widths))
+
+
+def build_report(paths: List[Path], args: argparse.Namespace, rng) -> Report:
+    report = Report(args.by, args.metrics, args.slowest)
+    for record in iter_records(paths):
+        if args.status and record.get("status") not in args.status:
+            continue
+        if in_range(record_time(record), rng):
+            report.add(record)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate KnightBot per-turn voice metrics.")
+    parser.add_argument("paths", nargs="*", type=Path, default=[DEFAULT_DIR], help="files or directories")
+    parser.add_argument("--by", action="append", choices=sorted(GROUP_KEYS), help="group by (repeatable)")
+    parser.add_argument("--metric", dest="metrics", action="append", help="duration field (repeatable)")
+    parser.add_argument("--status", action="append", help="only turns with this status (repeatable)")
+    parser.add_argument("--range", type=parse_range, help="only turns in START..END")
+    parser.add_argument("--baseline", type=parse_range, help="time range to compare against")
+    parser.add_argument("--candidate", type=parse_range, help="time range compared with --baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p95 change flagged as a regression")
+    parser.add_argument("--min-count", type=int, default=20, help="turns needed on both sides to flag")
+    parser.add_argument("--slowest", type=int, default=10, help="slowest turns to list")
+    parser.add_argument("--format", choices=("table", "csv"), default="table")
+    args = parser.parse_args()
+    args.by = args.by or ["session"]
+    args.metrics = args.metrics or list(DEFAULT_METRICS)
+
+    if (args.baseline is None) != (args.candidate is None):
+        parser.error("--baseline and --candidate go together")
+
+    if args.baseline is not None:
+        # Two streaming passes keep memory flat instead of buffering records.
+        baseline = build_report(args.paths, args, args.baseline)
+        candidate = build_report(args.paths, args, args.candidate)
+        emit(
+            f"p95 change, baseline {baseline.turns} turns vs candidate {candidate.turns} turns",
+            ["group", "metric", "n_base", "n_cand", "p50_base", "p50_cand", "p95_base", "p95_cand", "p95_change", "flag"],
+            diff_rows(baseline, candidate, args.threshold, args.min_count),
+            args.format,
+        )
+        return
+
+    report = build_report(args.paths, args, args.range)
+    emit(
+        f"durations (s) over {report.turns} turns",
+        ["group", "metric", "n", "p50", "p95", "p99", "max"],
+        report.rows(),
+        args.format,
+    )
+    emit(
+        "slowest stage per turn",
+        ["stage", "turns", "share"],
+        [
+            [stage, n, f"{n / max(1, sum(report.stage_wins.values())) * 100.0:.1f}%"]
+            for stage, n in sorted(report.stage_wins.items(), key=lambda kv: -kv[1])
+        ],
+        args.format,
+    )
+    if args.slowest:
+        emit(
+            f"{args.slowest} slowest turns (transcript to first audio)",
+            ["session", "turn", "total_s", "slowest_stage", "stage_s"],
+            report.slowest_rows(),
+            args.format,
+        )
+
+
+if __name__ == "__main__":
+    main()
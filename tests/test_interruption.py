@@ -0,0 +1,70 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pipecat"))
+
+from interruption import InterruptionDetector  # noqa: E402
+
+RATE = 16000
+FRAME_S = 0.02
+
+
+def _tone(freq: float = 220.0, amplitude: float = 6000.0) -> bytes:
+    t = np.arange(int(RATE * FRAME_S)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def _silence() -> bytes:
+    return bytes(int(RATE * FRAME_S) * 2)
+
+
+def _feed(detector: InterruptionDetector, frames: list[bytes]):
+    async def run():
+        for pcm in frames:
+            decision = await detector.update(pcm)
+            if decision is not None:
+                return decision
+        return None
+
+    return asyncio.run(run())
+
+
+def _detector(whisper: str | None = None) -> InterruptionDetector:
+    detector = InterruptionDetector(rms_threshold=850, min_speech_s=0.36, sample_rate=RATE)
+    # The constructor drops the model name when faster_whisper is not installed.
+    detector.whisper_model = whisper
+    return detector
+
+
+def test_sustained_speech_commits_on_features():
+    decision = _feed(_detector(), [_tone()] * 40)
+    assert decision is not None
+    assert decision.commit and decision.path == "features"
+
+
+def test_gray_zone_share_is_confirmed_by_whisper():
+    detector = _detector(whisper="tiny.en")
+    detector._count_words = lambda pcm: 3
+    # Alternating speech and silence: share 0.5, inside [0.4, 0.6).
+    decision = _feed(detector, [_tone(), _silence()] * 60)
+    assert decision is not None
+    assert decision.path == "whisper"
+    assert 0.4 <= decision.speech_share < 0.6
+    assert decision.commit and decision.words == 3
+
+
+def test_gray_zone_share_with_too_few_words_is_rejected():
+    detector = _detector(whisper="tiny.en")
+    detector._count_words = lambda pcm: 0
+    decision = _feed(detector, [_tone(), _silence()] * 60)
+    assert decision is not None
+    assert decision.path == "whisper" and not decision.commit
+
+
+def test_gray_zone_share_without_whisper_is_rejected():
+    decision = _feed(_detector(), [_tone(), _silence()] * 60)
+    assert decision is not None
+    assert decision.path == "features" and not decision.commit